@@ -1,7 +1,75 @@
+from django import forms
 from django.contrib import admin
 
-from .models import Machine, WorkHour, WorkTag
+from .archive import is_archived
+from .models import (
+    AuditEntry,
+    Job,
+    Machine,
+    MachineRate,
+    PunchEvent,
+    PunchTerminal,
+    WorkHour,
+    WorkTag,
+)
 
-admin.site.register(WorkHour)
 admin.site.register(WorkTag)
 admin.site.register(Machine)
+admin.site.register(PunchTerminal)
+
+
+class WorkHourAdminForm(forms.ModelForm):
+    def clean_date(self):
+        day = self.cleaned_data["date"]
+        if is_archived(day.year):
+            raise forms.ValidationError(f"Rok {day.year} jest zarchiwizowany.")
+        return day
+
+
+@admin.register(WorkHour)
+class WorkHourAdmin(admin.ModelAdmin):
+    form = WorkHourAdminForm
+
+
+@admin.register(MachineRate)
+class MachineRateAdmin(admin.ModelAdmin):
+    list_display = ("machine", "valid_from", "hourly_rate")
+    list_filter = ("machine",)
+
+
+@admin.register(PunchEvent)
+class PunchEventAdmin(admin.ModelAdmin):
+    list_display = ("user", "kind", "timestamp", "terminal", "received_at")
+    list_filter = ("kind", "terminal")
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AuditEntry)
+class AuditEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "editor",
+        "source",
+        "action",
+        "user",
+        "machine",
+        "date",
+    )
+    list_filter = ("source", "action")
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("kind", "status", "created_by", "created_at", "finished_at")
+    list_filter = ("kind", "status")
@@ -0,0 +1,221 @@
+import json
+import shutil
+from array import array
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import tenants
+from .archive import querysets_for_all_years
+from .models import Machine, MachineWorkLog, WorkHour, WorkTag
+
+try:
+    import numpy as np
+except ImportError:  # optional, see the "analytics" extra
+    np = None
+
+# Snapshot layout: one .npy file per column, int32, plus names.json.
+# Ids are replaced by dense codes (positions in the names lists, 0 = none)
+# and dates by day numbers since 1970-01-01, so grouping is plain bincount.
+WORK_HOUR_COLUMNS = ("user", "tag", "day", "minutes")
+MACHINE_LOG_COLUMNS = ("machine", "day", "minutes")
+DIMENSIONS = ("user", "tag", "machine", "day", "week", "month", "year")
+
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+CHUNK_SIZE = 5000
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise RuntimeError(
+            "NumPy is required for analytics, install the 'analytics' extra."
+        )
+
+
+def snapshot_dir() -> Path:
+    # one snapshot per company, as with the job results
+    tenant = tenants.current_tenant()
+    path = Path(settings.ANALYTICS_DIR)
+    return path / tenant if tenant is not None else path
+
+
+def _minutes(start_time: time | None, end_time: time | None) -> int:
+    # Same rule as WorkHour.total_hours: an end before the start is overnight.
+    if not start_time or not end_time:
+        return 0
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    return end - start if end >= start else end - start + 24 * 60
+
+
+def _codes(names: dict[int, str]) -> tuple[dict[int, int], list[str]]:
+    # One code per name: every month has its own tag of the same name, and
+    # they are grouped together as pivot_report groups by tag__name.
+    labels = sorted(set(names.values()))
+    codes = {name: code for code, name in enumerate(labels, start=1)}
+    return {obj_id: codes[name] for obj_id, name in names.items()}, ["", *labels]
+
+
+def _write_columns(path: Path, prefix: str, columns: dict[str, array]) -> None:
+    for name, values in columns.items():
+        np.save(path / f"{prefix}_{name}.npy", np.frombuffer(values, dtype=np.int32))
+
+
+def export_snapshot(path: Path) -> dict[str, int]:
+    require_numpy()
+    users, user_names = _codes(dict(User.objects.values_list("id", "username")))
+    tags, tag_names = _codes(dict(WorkTag.objects.values_list("id", "name")))
+    machines, machine_names = _codes(dict(Machine.objects.values_list("id", "name")))
+
+    work_hours = {name: array("i") for name in WORK_HOUR_COLUMNS}
+    for qs in querysets_for_all_years(WorkHour.objects.all()):
+        rows = qs.values_list("user_id", "tag_id", "date", "start_time", "end_time")
+        for user_id, tag_id, day, start_time, end_time in rows.iterator(CHUNK_SIZE):
+            work_hours["user"].append(users.get(user_id, 0))
+            work_hours["tag"].append(tags.get(tag_id, 0))
+            work_hours["day"].append(day.toordinal() - EPOCH_ORDINAL)
+            work_hours["minutes"].append(_minutes(start_time, end_time))
+
+    machine_logs = {name: array("i") for name in MACHINE_LOG_COLUMNS}
+    for qs in querysets_for_all_years(MachineWorkLog.objects.all()):
+        rows = qs.values_list("machine_id", "date", "start_time", "end_time")
+        for machine_id, day, start_time, end_time in rows.iterator(CHUNK_SIZE):
+            machine_logs["machine"].append(machines.get(machine_id, 0))
+            machine_logs["day"].append(day.toordinal() - EPOCH_ORDINAL)
+            machine_logs["minutes"].append(_minutes(start_time, end_time))
+
+    # Written next to the old snapshot and swapped in, so readers never see
+    # a mix of two exports.
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    _write_columns(tmp, "work_hours", work_hours)
+    _write_columns(tmp, "machine_logs", machine_logs)
+    counts = {
+        "work_hours": len(work_hours["day"]),
+        "machine_logs": len(machine_logs["day"]),
+    }
+    (tmp / "names.json").write_text(
+        json.dumps(
+            {
+                "created_at": timezone.now().isoformat(),
+                "counts": counts,
+                "user": user_names,
+                "tag": tag_names,
+                "machine": machine_names,
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+
+    old = path.with_name(path.name + ".old")
+    if path.exists():
+        path.rename(old)
+    tmp.rename(path)
+    shutil.rmtree(old, ignore_errors=True)
+    return counts
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    created_at: datetime
+    names: dict[str, list[str]]
+    work_hours: dict[str, "np.ndarray"]
+    machine_logs: dict[str, "np.ndarray"]
+
+
+def load_snapshot(path: Path) -> Snapshot:
+    require_numpy()
+    meta = json.loads((path / "names.json").read_text(encoding="utf-8"))
+
+    def columns(prefix: str, names: Sequence[str]) -> dict[str, "np.ndarray"]:
+        return {
+            name: np.load(path / f"{prefix}_{name}.npy", mmap_mode="r")
+            for name in names
+        }
+
+    return Snapshot(
+        created_at=datetime.fromisoformat(meta["created_at"]),
+        names={key: meta[key] for key in ("user", "tag", "machine")},
+        work_hours=columns("work_hours", WORK_HOUR_COLUMNS),
+        machine_logs=columns("machine_logs", MACHINE_LOG_COLUMNS),
+    )
+
+
+def _dimension(columns: dict[str, "np.ndarray"], dim: str) -> "np.ndarray":
+    if dim in ("user", "tag", "machine", "day"):
+        return np.asarray(columns[dim], dtype=np.int64)
+    days = np.asarray(columns["day"], dtype=np.int64)
+    if dim == "week":
+        # 1970-01-01 was a Thursday; weeks start on Monday.
+        return (days + 3) // 7
+    dates = days.astype("datetime64[D]")
+    if dim == "month":
+        return dates.astype("datetime64[M]").astype(np.int64)
+    return dates.astype("datetime64[Y]").astype(np.int64)
+
+
+def _label(snapshot: Snapshot, dim: str, code: int) -> str | int | date:
+    if dim in ("user", "tag", "machine"):
+        return snapshot.names[dim][code]
+    if dim == "day":
+        return EPOCH + timedelta(days=code)
+    if dim == "week":
+        return EPOCH + timedelta(days=code * 7 - 3)
+    if dim == "month":
+        return date(1970 + code // 12, code % 12 + 1, 1)
+    return 1970 + code
+
+
+def group_hours(
+    snapshot: Snapshot,
+    dims: Iterable[str],
+    machines: bool = False,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> dict[tuple, float]:
+    # Hours summed per combination of dims, e.g. ("user", "tag", "week").
+    # The codes of all dims are packed into one int64 key per row, the keys
+    # that occur are numbered with unique() and summed with bincount().
+    dims = tuple(dims)
+    unknown = set(dims) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))}")
+    columns = snapshot.machine_logs if machines else snapshot.work_hours
+    for dim in dims:
+        if dim in ("user", "tag", "machine") and dim not in columns:
+            raise ValueError(f"Dimension {dim!r} does not apply to this table")
+
+    days = columns["day"]
+    mask = np.ones(len(days), dtype=bool)
+    if date_from is not None:
+        mask &= days >= date_from.toordinal() - EPOCH_ORDINAL
+    if date_to is not None:
+        mask &= days <= date_to.toordinal() - EPOCH_ORDINAL
+
+    minutes = np.asarray(columns["minutes"])[mask]
+    if not dims:
+        return {(): float(minutes.sum()) / 60}
+
+    keys = [_dimension(columns, dim)[mask] for dim in dims]
+    offsets = [int(k.min()) if len(k) else 0 for k in keys]
+    sizes = [int(k.max()) - o + 1 if len(k) else 1 for k, o in zip(keys, offsets)]
+    packed = np.ravel_multi_index([k - o for k, o in zip(keys, offsets)], sizes)
+
+    uniques, inverse = np.unique(packed, return_inverse=True)
+    sums = np.bincount(inverse, weights=minutes, minlength=len(uniques))
+
+    labels = []
+    for dim, dim_codes, offset in zip(dims, np.unravel_index(uniques, sizes), offsets):
+        # each distinct code is labelled once, then spread back over the groups
+        distinct, positions = np.unique(dim_codes, return_inverse=True)
+        names = [_label(snapshot, dim, code + offset) for code in distinct.tolist()]
+        labels.append([names[i] for i in positions.tolist()])
+    return {key: total / 60 for key, total in zip(zip(*labels), sums.tolist())}
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DjangoAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "django_app"
+
+    def ready(self):
+        from . import reports, signals  # noqa: F401
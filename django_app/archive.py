@@ -0,0 +1,145 @@
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from functools import wraps
+
+from django.contrib import messages
+from django.db import transaction
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import redirect
+
+from . import reference_cache
+from .models import ArchivedYear, Machine, MachineRate, MachineWorkLog, WorkHour
+from .replica import read_db
+
+ARCHIVE_DB = "archive"
+ARCHIVED_MODELS = (WorkHour, MachineWorkLog)
+
+_read_db: ContextVar[str | None] = ContextVar("archive_read_db", default=None)
+
+
+def archived_years() -> frozenset[int]:
+    return reference_cache.cached(
+        ("archived_years",),
+        lambda: frozenset(ArchivedYear.objects.values_list("year", flat=True)),
+    )
+
+
+def is_archived(year: int) -> bool:
+    return year in archived_years()
+
+
+def copy_rates() -> None:
+    # Archived months are billed in the archive with its copy of the rates,
+    # so every rate change is repeated there. Rates of machines deleted since
+    # are kept: their archived logs still need them.
+    machines = list(Machine.objects.using("default").all())
+    rates = list(MachineRate.objects.using("default").all())
+    with transaction.atomic(using=ARCHIVE_DB):
+        Machine.objects.using(ARCHIVE_DB).bulk_create(
+            machines,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["name"],
+        )
+        MachineRate.objects.using(ARCHIVE_DB).filter(machine__in=machines).exclude(
+            id__in=[rate.id for rate in rates]
+        ).delete()
+        MachineRate.objects.using(ARCHIVE_DB).bulk_create(
+            rates,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["machine", "valid_from", "hourly_rate"],
+        )
+
+
+@contextmanager
+def reading_year(year: int):
+    # Only an archived year is pinned; otherwise the next router decides.
+    token = _read_db.set(ARCHIVE_DB if is_archived(year) else None)
+    try:
+        yield
+    finally:
+        _read_db.reset(token)
+
+
+def querysets_for_range(
+    queryset: QuerySet, date_from: date, date_to: date
+) -> list[QuerySet]:
+    # Each database only holds its own years, so a range that crosses the
+    # archive boundary is the same date filter run on both.
+    queryset = queryset.filter(date__range=(date_from, date_to))
+    years = range(date_from.year, date_to.year + 1)
+    archived = archived_years()
+    result = []
+    if any(year in archived for year in years):
+        result.append(queryset.using(ARCHIVE_DB))
+    if any(year not in archived for year in years):
+        result.append(queryset.using(read_db()))
+    return result
+
+
+def querysets_for_all_years(queryset: QuerySet) -> list[QuerySet]:
+    result = [queryset.using(read_db())]
+    if archived_years():
+        result.insert(0, queryset.using(ARCHIVE_DB))
+    return result
+
+
+class ChainedQuerySets:
+    # The querysets of querysets_for_range read as one sequence, in order, so
+    # a Paginator can page across databases with a count and a slice each.
+    def __init__(self, querysets: list[QuerySet]):
+        self.querysets = querysets
+        self._counts: list[int] | None = None
+
+    def counts(self) -> list[int]:
+        if self._counts is None:
+            self._counts = [qs.count() for qs in self.querysets]
+        return self._counts
+
+    def count(self) -> int:
+        return sum(self.counts())
+
+    def __getitem__(self, index: slice) -> list:
+        start, stop = index.start or 0, index.stop
+        result: list = []
+        for queryset, count in zip(self.querysets, self.counts()):
+            if stop is not None and stop <= 0:
+                break
+            if start < count:
+                result.extend(queryset[start : count if stop is None else stop])
+            start = max(0, start - count)
+            if stop is not None:
+                stop -= count
+        return result
+
+
+class ArchiveRouter:
+    # Work hours and machine logs are read from the archive inside
+    # reading_year() for an archived year; everything else, and every write,
+    # goes to the default database unless .using() says otherwise.
+    def db_for_read(self, model, **hints):
+        if model in ARCHIVED_MODELS:
+            return _read_db.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+
+def route_month_reads(view: Callable) -> Callable:
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        year = int(request.GET.get("year", date.today().year))
+        if request.method == "POST" and is_archived(year):
+            messages.error(
+                request, f"Rok {year} jest zarchiwizowany, nie można go edytować."
+            )
+            return redirect(request.get_full_path())
+        with reading_year(year):
+            return view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,106 @@
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date, time
+from typing import Any
+
+from django.contrib.auth.models import User
+
+from . import tenants
+from .models import AuditEntry, MachineWorkLog, WorkHour
+
+Snapshot = dict[str, Any]
+
+
+def _format_time(value: time | None) -> str | None:
+    return value.strftime("%H:%M") if value else None
+
+
+def snapshot(obj: WorkHour | MachineWorkLog | None) -> Snapshot | None:
+    if obj is None:
+        return None
+    values: Snapshot = {
+        "start_time": _format_time(obj.start_time),
+        "end_time": _format_time(obj.end_time),
+    }
+    if isinstance(obj, WorkHour):
+        values["tag"] = obj.tag_id
+    return values
+
+
+class AuditBuffer:
+    # Collects the changes made while handling one request (or one import
+    # batch) and writes them with a single bulk_create once the surrounding
+    # transaction commits; nothing is written if it rolls back.
+    def __init__(self, editor: User | None = None, source: str = AuditEntry.WEB):
+        self.editor_id = editor.pk if editor is not None else None
+        self.source = source
+        self.entries: list[AuditEntry] = []
+        self._scheduled = False
+
+    def _add(
+        self, before: Snapshot | None, after: Snapshot | None, **subject: Any
+    ) -> None:
+        if before == after:
+            return
+        if before is None:
+            action = AuditEntry.CREATE
+        elif after is None:
+            action = AuditEntry.DELETE
+        else:
+            action = AuditEntry.UPDATE
+        self.entries.append(
+            AuditEntry(
+                editor_id=self.editor_id,
+                source=self.source,
+                action=action,
+                before=before,
+                after=after,
+                **subject,
+            )
+        )
+        if not self._scheduled:
+            self._scheduled = True
+            tenants.on_commit(self.flush)
+
+    def work_hour(
+        self,
+        user_id: int,
+        date_obj: date,
+        before: Snapshot | None,
+        after: Snapshot | None,
+    ) -> None:
+        self._add(before, after, user_id=user_id, date=date_obj)
+
+    def machine_day(
+        self,
+        date_obj: date,
+        before: Iterable[MachineWorkLog],
+        after: Iterable[MachineWorkLog],
+    ) -> None:
+        # Machine days are replaced as a whole, so only the logs that were
+        # actually removed or added are recorded.
+        def counts(logs: Iterable[MachineWorkLog]) -> Counter:
+            return Counter(
+                (log.machine_id, log.start_time, log.end_time) for log in logs
+            )
+
+        old, new = counts(before), counts(after)
+        for changes, removed in ((old - new, True), (new - old, False)):
+            for (machine_id, start_time, end_time), n in changes.items():
+                values = {
+                    "start_time": _format_time(start_time),
+                    "end_time": _format_time(end_time),
+                }
+                for _ in range(n):
+                    self._add(
+                        values if removed else None,
+                        None if removed else values,
+                        machine_id=machine_id,
+                        date=date_obj,
+                    )
+
+    def flush(self) -> None:
+        entries, self.entries = self.entries, []
+        self._scheduled = False
+        if entries:
+            AuditEntry.objects.bulk_create(entries)
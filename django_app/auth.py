@@ -1,6 +1,27 @@
 from django.contrib.auth import logout
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
 from django.shortcuts import redirect
 
+USER_CACHE_TIMEOUT = 300
+
+
+def user_cache_key(user_id) -> str:
+    return f"auth_user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    # AuthenticationMiddleware loads the user on every request; keep it in
+    # the cache until the user is saved or deleted (see signals).
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
+
 
 def logout_view(request):
     logout(request)
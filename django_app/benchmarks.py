@@ -0,0 +1,97 @@
+import time as timer
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.template import engines
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from . import reference_cache
+from .models import Machine, MachineWorkLog, WorkHour, WorkTag
+from .work_calendar import get_month_calendar
+
+
+@contextmanager
+def benchmark_database() -> Iterator[None]:
+    # Benchmarks run against a throwaway in-memory database, never the real one.
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        reference_cache.invalidate()
+
+
+def populate_month(users: int, year: int, month: int, machines: int = 10) -> User:
+    static_tags = WorkTag.objects.bulk_create(
+        [WorkTag(name=name, is_static=True) for name in ("Urlop", "L4", "Delegacja")]
+    )
+    month_tags = WorkTag.objects.bulk_create(
+        [WorkTag(name=f"Budowa {i}", year=year, month=month) for i in range(10)]
+    )
+    tags = static_tags + month_tags
+    workers = User.objects.bulk_create(
+        [User(username=f"pracownik{i:03d}") for i in range(users)]
+    )
+    machine_objs = Machine.objects.bulk_create(
+        [Machine(name=f"Maszyna {i}") for i in range(machines)]
+    )
+
+    working_days = [d for d in get_month_calendar(year, month).days if not d.is_day_off]
+    WorkHour.objects.bulk_create(
+        WorkHour(
+            user=worker,
+            date=day.date,
+            start_time=time(7, 0),
+            end_time=time(15, (i % 4) * 15),
+            tag=tags[(i + day.day) % len(tags)],
+        )
+        for i, worker in enumerate(workers)
+        for day in working_days
+    )
+    MachineWorkLog.objects.bulk_create(
+        MachineWorkLog(
+            machine=machine,
+            date=day.date,
+            start_time=time(6 + i % 3, 0),
+            end_time=time(14 + i % 3, 0),
+        )
+        for i, machine in enumerate(machine_objs)
+        for day in working_days
+    )
+
+    reference_cache.invalidate()
+    return User.objects.create(username="benchmark-admin", is_staff=True)
+
+
+def timed(func: Callable[[], object], repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = timer.perf_counter()
+        result = func()
+        best = min(best, timer.perf_counter() - started)
+    return best, result
+
+
+def traced(func: Callable[[], object]) -> tuple[int, object]:
+    # Peak bytes allocated while func ran.
+    tracemalloc.start()
+    try:
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+def reset_template_cache() -> None:
+    for loader in engines["django"].engine.template_loaders:  # type: ignore[attr-defined]
+        loader.reset()
@@ -0,0 +1,56 @@
+import re
+
+from django.http import HttpRequest, HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only
+    brotli = None
+
+BROTLI_QUALITY = 5
+MIN_COMPRESS_LENGTH = 200
+
+re_accepts_br = re.compile(r"\bbr\b")
+re_indented_newline = re.compile(r"[ \t\r]*\n\s*")
+
+
+class CompressionMiddleware(GZipMiddleware):
+    # Brotli when the client accepts it and the package is installed,
+    # otherwise Django's gzip handling.
+    def process_response(self, request: HttpRequest, response: HttpResponse):
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            # events must reach the browser as they are written, not buffered
+            # into compressed blocks
+            return response
+        if brotli is None or not re_accepts_br.search(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        ):
+            return super().process_response(request, response)
+
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < MIN_COMPRESS_LENGTH
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = "br"
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        return response
+
+
+def minify_html(content: str) -> str:
+    # Only indentation goes: every run of whitespace that contains a newline
+    # becomes a single newline, which renders the same.
+    return re_indented_newline.sub("\n", content)
@@ -0,0 +1,76 @@
+import hashlib
+from collections.abc import Callable
+from datetime import date
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import (
+    add_never_cache_headers,
+    get_conditional_response,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from .month_context import month_from_request
+from .revisions import REFERENCE_KEY, get_revisions, month_key
+
+
+def _has_pending_messages(request: HttpRequest) -> bool:
+    # len() loads the storage without marking the messages as shown.
+    return len(get_messages(request)) > 0
+
+
+def conditional_month_page(per_user: bool = False) -> Callable:
+    # The validator combines the month's change marker (or the user's own one
+    # with per_user), the reference-data marker, the viewer, today's date and
+    # the CSRF secret, so a new login, a rotated token or a new day always
+    # renders the page again.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            if _has_pending_messages(request):
+                # Flash messages are rendered once; never let that page be reused.
+                response = view(request, *args, **kwargs)
+                add_never_cache_headers(response)
+                return response
+
+            year, month = month_from_request(request)
+            scope = request.user.pk if per_user else 0
+            keys = [month_key(year, month, scope), REFERENCE_KEY]
+            revisions = get_revisions(keys)
+
+            parts = [
+                str(request.user.pk),
+                date.today().isoformat(),
+                request.META.get("CSRF_COOKIE", ""),
+                *(revisions.get(key, ("-", None))[0] for key in keys),
+            ]
+            etag = quote_etag(
+                hashlib.sha1(
+                    "|".join(parts).encode(), usedforsecurity=False
+                ).hexdigest()
+            )
+            updated = [ts for _, ts in revisions.values() if ts is not None]
+            last_modified = int(max(updated).timestamp()) if updated else None
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response.headers["ETag"] = etag
+            if last_modified is not None:
+                response.headers["Last-Modified"] = http_date(last_modified)
+            response.headers["Cache-Control"] = "private, no-cache"
+            patch_vary_headers(response, ("Cookie",))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,278 @@
+import json
+import multiprocessing
+import shutil
+import tempfile
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import TextIO
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max, Min, QuerySet
+
+from .archive import ARCHIVE_DB, archived_years
+from .models import (
+    Machine,
+    MachineWorkLog,
+    MonthRevision,
+    PunchEvent,
+    WorkHour,
+    WorkTag,
+)
+from .replica import read_db
+from .utils import is_editable_date, is_valid_time_range
+
+# Checks rows that predate today's validation or lost their references.
+# Tables are read in primary key order, one short query per chunk, so memory
+# stays bounded however long the history is. Fixes are only written where
+# the right value is unambiguous; the rest is left for a person to decide.
+
+CHUNK_SIZE = 2000
+
+WORK_HOUR_FIELDS = ("user_id", "date", "start_time", "end_time", "tag_id", "version")
+MACHINE_LOG_FIELDS = ("machine_id", "date", "start_time", "end_time", "version")
+
+
+class References:
+    # The small tables the rows point at, loaded once per database.
+    def __init__(self, db: str):
+        self.users = frozenset(User.objects.using(db).values_list("id", flat=True))
+        self.machines = frozenset(
+            Machine.objects.using(db).values_list("id", flat=True)
+        )
+        self.tags = {
+            tag_id: (name, is_static, year, month)
+            for tag_id, name, is_static, year, month in WorkTag.objects.using(
+                db
+            ).values_list("id", "name", "is_static", "year", "month")
+        }
+        self.month_tags = {
+            (name, year, month): tag_id
+            for tag_id, (name, is_static, year, month) in self.tags.items()
+            if not is_static and year and month
+        }
+        # days still open at a punch terminal: the row has its start and gets
+        # its end with the closing punch, while the day can still be edited
+        self.open_days = frozenset(
+            PunchEvent.objects.using(db)
+            .filter(date__gte=date.today() - timedelta(days=3))
+            .values_list("user_id", "date")
+        )
+
+
+def keyset_chunks(
+    queryset: QuerySet, fields: tuple[str, ...], chunk_size: int
+) -> Iterator[tuple]:
+    # (pk, *fields) rows; every chunk starts after the last primary key seen
+    # instead of at an OFFSET, so late chunks cost as little as early ones.
+    last_pk = 0
+    while True:
+        chunk = (
+            queryset.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", *fields)[:chunk_size]
+        )
+        count = 0
+        for row in chunk.iterator(chunk_size=chunk_size):
+            yield row
+            last_pk = row[0]
+            count += 1
+        if count < chunk_size:
+            return
+
+
+def _update(table: str, pk: int, version: int, assignment: str) -> str:
+    # Only the row as scanned is fixed; one edited since then has a newer
+    # version and is left alone. The version bump makes editors holding the
+    # old row report a conflict.
+    return (
+        f"UPDATE {table} SET {assignment}, version = version + 1 "
+        f"WHERE id = {pk} AND version = {version};"
+    )
+
+
+def _delete(table: str, pk: int, version: int) -> str:
+    return f"DELETE FROM {table} WHERE id = {pk} AND version = {version};"
+
+
+def work_hour_issues(row: tuple, refs: References) -> Iterator[tuple]:
+    # (issue, detail, fix SQL or None)
+    pk, user_id, day, start, end, tag_id, version = row
+    table = connections[DEFAULT_DB_ALIAS].ops.quote_name(WorkHour._meta.db_table)
+    if user_id not in refs.users:
+        yield (
+            "orphan_user",
+            f"user {user_id} does not exist",
+            _delete(table, pk, version),
+        )
+        return
+
+    if tag_id is not None and tag_id not in refs.tags:
+        yield (
+            "missing_tag",
+            f"tag {tag_id} does not exist",
+            _update(table, pk, version, "tag_id = NULL"),
+        )
+    elif tag_id is not None:
+        name, is_static, year, month = refs.tags[tag_id]
+        if not is_static and year and month and (year, month) != (day.year, day.month):
+            same_name = refs.month_tags.get((name, day.year, day.month))
+            yield (
+                "tag_other_month",
+                f"tag {name!r} belongs to {year}-{month:02d}",
+                _update(table, pk, version, f"tag_id = {same_name}")
+                if same_name
+                else None,
+            )
+
+    if (start is None) != (end is None):
+        if end is None and (user_id, day) in refs.open_days and is_editable_date(day):
+            return
+        yield "half_time", f"start {start}, end {end}", None
+    elif start is not None and not is_valid_time_range(start, end):
+        yield "end_before_start", f"{start:%H:%M}-{end:%H:%M}", None
+
+
+def machine_log_issues(row: tuple, refs: References) -> Iterator[tuple]:
+    pk, machine_id, day, start, end, version = row
+    table = connections[DEFAULT_DB_ALIAS].ops.quote_name(MachineWorkLog._meta.db_table)
+    if machine_id not in refs.machines:
+        yield (
+            "orphan_machine",
+            f"machine {machine_id} does not exist",
+            _delete(table, pk, version),
+        )
+        return
+    # machine logs may run past midnight, so only half-filled rows are wrong
+    if (start is None) != (end is None):
+        yield "half_time", f"start {start}, end {end}", None
+
+
+SCANNED = (
+    ("workhour", WorkHour, WORK_HOUR_FIELDS, work_hour_issues),
+    ("machineworklog", MachineWorkLog, MACHINE_LOG_FIELDS, machine_log_issues),
+)
+
+
+def scan_part(
+    db: str, date_from: date, date_to: date, chunk_size: int, directory: str
+) -> Counter:
+    # One database and date range; issues and fixes go to files of their
+    # own so parts can run in separate processes and be joined in order.
+    refs = References(db)
+    counts: Counter = Counter()
+    name = f"{db}-{date_from:%Y%m%d}"
+    # the fix script only covers the main database; archived rows are reported
+    fixable = db != ARCHIVE_DB
+    with (
+        open(Path(directory) / f"{name}.jsonl", "w") as issues_file,
+        open(Path(directory) / f"{name}.sql", "w") as fix_file,
+    ):
+        for model_name, model, fields, check in SCANNED:
+            queryset = model.objects.using(db).filter(date__range=(date_from, date_to))
+            for row in keyset_chunks(queryset, fields, chunk_size):
+                counts[model_name] += 1
+                for issue, detail, fix in check(row, refs):
+                    counts[issue] += 1
+                    issues_file.write(
+                        json.dumps(
+                            {
+                                "database": db,
+                                "model": model_name,
+                                "id": row[0],
+                                "date": row[2].isoformat(),
+                                "issue": issue,
+                                "detail": detail,
+                                "fixable": bool(fix and fixable),
+                            }
+                        )
+                        + "\n"
+                    )
+                    if fix and fixable:
+                        counts["fixes"] += 1
+                        fix_file.write(f"-- {model_name} {row[0]}: {issue}\n{fix}\n")
+    return counts
+
+
+def date_ranges(first: date, last: date, parts: int) -> list[tuple[date, date]]:
+    days = (last - first).days + 1
+    parts = max(1, min(parts, days))
+    bounds = [first + timedelta(days=days * i // parts) for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1] - timedelta(days=1)) for i in range(parts)]
+
+
+def _date_span(db: str) -> tuple[date, date] | None:
+    spans = [
+        model.objects.using(db).aggregate(first=Min("date"), last=Max("date"))
+        for model in (WorkHour, MachineWorkLog)
+    ]
+    firsts = [s["first"] for s in spans if s["first"]]
+    lasts = [s["last"] for s in spans if s["last"]]
+    return (min(firsts), max(lasts)) if firsts else None
+
+
+def scan(
+    report: TextIO,
+    fix_script: TextIO | None = None,
+    workers: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> dict:
+    # Writes {"issues": [...], "summary": {...}} to report, one issue per
+    # line, and returns the summary.
+    databases = [read_db()]
+    if archived_years():
+        databases.insert(0, ARCHIVE_DB)
+    parts = []
+    for db in databases:
+        span = _date_span(db)
+        if span is not None:
+            parts.extend((db, *r) for r in date_ranges(*span, workers))
+
+    counts: Counter = Counter()
+    with tempfile.TemporaryDirectory() as directory:
+        jobs = [(db, first, last, chunk_size, directory) for db, first, last in parts]
+        if workers > 1:
+            # forked workers open their own connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("fork")
+            ) as pool:
+                results = list(pool.map(scan_part, *zip(*jobs)))
+        else:
+            results = [scan_part(*job) for job in jobs]
+        for result in results:
+            counts.update(result)
+
+        report.write('{"issues": [')
+        separator = "\n"
+        for db, first, _, _, _ in jobs:
+            with open(Path(directory) / f"{db}-{first:%Y%m%d}.jsonl") as part:
+                for line in part:
+                    report.write(separator + line.rstrip("\n"))
+                    separator = ",\n"
+        summary = {
+            "work_hours": counts.pop("workhour", 0),
+            "machine_logs": counts.pop("machineworklog", 0),
+            "fixes": counts.pop("fixes", 0),
+            "issues": dict(sorted(counts.items())),
+        }
+        report.write(f'\n], "summary": {json.dumps(summary)}}}\n')
+
+        if fix_script is not None:
+            fix_script.write(
+                "-- Generated by scan_consistency. Review it, then run it with the\n"
+                "-- sqlite3 shell against the scanned database.\nBEGIN;\n"
+            )
+            for db, first, _, _, _ in jobs:
+                with open(Path(directory) / f"{db}-{first:%Y%m%d}.sql") as part:
+                    shutil.copyfileobj(part, fix_script)
+            # month pages are cached by revision, so force them to re-render
+            fix_script.write(
+                f"UPDATE {MonthRevision._meta.db_table} "
+                "SET revision = lower(hex(randomblob(16))), "
+                "updated_at = CURRENT_TIMESTAMP;\nCOMMIT;\n"
+            )
+    return summary
@@ -0,0 +1,40 @@
+from django.db.models import Expression, F, IntegerField, QuerySet, Sum, Window
+from django.db.models.functions import Cast, ExtractWeek, Substr
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minute_of_day(field: str) -> Expression:
+    # TimeFields are stored as "HH:MM:SS" text in SQLite.
+    return Cast(Substr(F(field), 1, 2), IntegerField()) * 60 + Cast(
+        Substr(F(field), 4, 2), IntegerField()
+    )
+
+
+def worked_minutes(start: str = "start_time", end: str = "end_time") -> Expression:
+    # Minutes between start and end, computed in SQL with the same rule as
+    # total_hours: an end before the start is an overnight shift. NULL when
+    # either time is missing, so Sum() skips tag-only days.
+    return (
+        _minute_of_day(end) - _minute_of_day(start) + MINUTES_PER_DAY
+    ) % MINUTES_PER_DAY
+
+
+def with_month_totals(queryset: QuerySet) -> QuerySet:
+    # Work hours with their user's totals from the same query, as window sums:
+    # week_minutes for the row's ISO week and running_minutes up to and
+    # including the row's day. Both only count rows the queryset selects, so
+    # on a month page a week that starts in the previous month is cut at the
+    # 1st. A user has one row per day, so ordering by date is enough for the
+    # running sum.
+    return queryset.annotate(
+        week=ExtractWeek("date"),
+        week_minutes=Window(
+            Sum(worked_minutes()), partition_by=[F("user_id"), ExtractWeek("date")]
+        ),
+        running_minutes=Window(
+            Sum(worked_minutes()),
+            partition_by=[F("user_id")],
+            order_by=F("date").asc(),
+        ),
+    )
@@ -0,0 +1,154 @@
+from array import array
+from collections.abc import Iterable
+from datetime import time
+
+NO_TIME = -1
+NO_TAG = 0
+
+GRID_FIELDS = (
+    "user_id",
+    "date",
+    "start_time",
+    "end_time",
+    "tag_id",
+    "version",
+    "week",
+    "week_minutes",
+    "running_minutes",
+)
+
+
+def _minutes(value: time | None) -> int:
+    return NO_TIME if value is None else value.hour * 60 + value.minute
+
+
+def minutes_to_hours(minutes: int | None) -> float:
+    return round((minutes or 0) / 60, 2)
+
+
+class GridCell:
+    # What one filled cell of the admin grid renders; built on access from
+    # the user's arrays and dropped with the template context.
+    __slots__ = (
+        "start_hour",
+        "start_minute",
+        "end_hour",
+        "end_minute",
+        "tag_id",
+        "total_hours",
+        "running_hours",
+        "filled",
+        "version",
+        "conflict",
+    )
+
+    def __init__(
+        self,
+        start: int,
+        end: int,
+        tag_id: int,
+        version: int,
+        conflict: bool,
+        running: int,
+    ):
+        # a clocked-in day has a start but no end yet
+        has_time = start != NO_TIME and end != NO_TIME
+        self.start_hour, self.start_minute = (
+            divmod(start, 60) if start != NO_TIME else (None, None)
+        )
+        self.end_hour, self.end_minute = (
+            divmod(end, 60) if end != NO_TIME else (None, None)
+        )
+        self.tag_id = tag_id or None
+        # past midnight counts into the next day, as in WorkHour.total_hours
+        self.total_hours = round((end - start) % 1440 / 60, 2) if has_time else 0.0
+        self.running_hours = minutes_to_hours(running)
+        self.filled = has_time and self.tag_id is not None
+        self.version = version
+        self.conflict = conflict
+
+
+class UserGrid:
+    # One user's month as arrays indexed by day (index 0 unused): start and
+    # end as minutes after midnight, the tag id, the row version and the
+    # month's minutes so far. Days whose last save lost to another editor are
+    # kept in conflicts. Week and month totals come from the query's window
+    # sums (expressions.with_month_totals), not from adding up the arrays.
+    __slots__ = (
+        "start",
+        "end",
+        "tag",
+        "version",
+        "running",
+        "weeks",
+        "total_minutes",
+        "conflicts",
+    )
+
+    def __init__(self, num_days: int):
+        self.start = array("h", [NO_TIME]) * (num_days + 1)
+        self.end = array("h", [NO_TIME]) * (num_days + 1)
+        self.tag = array("i", [NO_TAG]) * (num_days + 1)
+        self.version = array("I", [0]) * (num_days + 1)
+        self.running = array("i", [0]) * (num_days + 1)
+        self.weeks: dict[int, float] = {}
+        self.total_minutes = 0
+        self.conflicts: set[int] = set()
+
+    def set(
+        self,
+        day: int,
+        start: time | None,
+        end: time | None,
+        tag_id: int | None,
+        version: int,
+        week: int,
+        week_minutes: int | None,
+        running_minutes: int | None,
+    ):
+        self.start[day] = _minutes(start)
+        self.end[day] = _minutes(end)
+        self.tag[day] = tag_id or NO_TAG
+        self.version[day] = version
+        self.running[day] = running_minutes or 0
+        self.weeks[week] = minutes_to_hours(week_minutes)
+        # the running sum of the last day is the month total
+        self.total_minutes = max(self.total_minutes, running_minutes or 0)
+
+    def __contains__(self, day: int) -> bool:
+        # every stored row has a version, whichever of its fields are set
+        return 0 < day < len(self.start) and self.version[day] != 0
+
+    def get(self, day: int) -> GridCell | None:
+        if day not in self:
+            return None
+        return GridCell(
+            self.start[day],
+            self.end[day],
+            self.tag[day],
+            self.version[day],
+            day in self.conflicts,
+            self.running[day],
+        )
+
+    def __getitem__(self, day: int) -> GridCell:
+        cell = self.get(day)
+        if cell is None:
+            raise KeyError(day)
+        return cell
+
+    @property
+    def total_hours(self) -> float:
+        return minutes_to_hours(self.total_minutes)
+
+
+def build_month_grid(
+    user_ids: Iterable[int],
+    num_days: int,
+    rows: Iterable[tuple],
+) -> dict[int, UserGrid]:
+    # rows as with_month_totals(queryset).values_list(*GRID_FIELDS)
+    grid = {user_id: UserGrid(num_days) for user_id in user_ids}
+    for user_id, day, *values in rows:
+        grid[user_id].set(day.day, *values)
+    return grid
@@ -0,0 +1,305 @@
+import csv
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date, time
+from typing import IO
+
+from django.contrib.auth.models import User
+from django.db import models
+
+from . import tenants
+from .archive import is_archived
+from .audit import AuditBuffer, snapshot
+from .models import AuditEntry, Machine, MachineWorkLog, WorkHour, WorkTag
+from .revisions import mark_dates_changed
+from .utils import is_valid_time_range
+
+WORK_HOUR_COLUMNS = ("username", "date", "start_time", "end_time", "tag")
+MACHINE_LOG_COLUMNS = ("machine", "date", "start_time", "end_time")
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 50
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    def reject(self, line: int, message: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+class _RejectWriter:
+    def __init__(self, stream: IO[str] | None, columns: Iterable[str]):
+        self.writer = None
+        if stream is not None:
+            self.writer = csv.writer(stream)
+            self.writer.writerow(["line", *columns, "error"])
+        self.columns = tuple(columns)
+
+    def write(self, line: int, row: dict[str, str], message: str) -> None:
+        if self.writer is not None:
+            self.writer.writerow(
+                [line, *(row.get(c, "") for c in self.columns), message]
+            )
+
+
+def _read_rows(stream: IO[str], columns: tuple[str, ...]) -> csv.DictReader:
+    reader = csv.DictReader(stream)
+    missing = set(columns) - set(reader.fieldnames or ())
+    if missing:
+        raise ImportFormatError(
+            f"Brak kolumn w pliku CSV: {', '.join(sorted(missing))}."
+        )
+    return reader
+
+
+def _parse_date(value: str | None) -> date:
+    try:
+        date_obj = date.fromisoformat((value or "").strip())
+    except ValueError:
+        raise RowError(f"nieprawidłowa data: {value!r}") from None
+    if is_archived(date_obj.year):
+        raise RowError(f"rok {date_obj.year} jest zarchiwizowany")
+    return date_obj
+
+
+def _parse_time(value: str | None) -> time | None:
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        hour, minute = value.split(":")[:2]
+        return time(int(hour), int(minute))
+    except ValueError:
+        raise RowError(f"nieprawidłowa godzina: {value!r}") from None
+
+
+def _parse_time_range(
+    row: dict[str, str],
+) -> tuple[time | None, time | None]:
+    start_time = _parse_time(row.get("start_time"))
+    end_time = _parse_time(row.get("end_time"))
+    if (start_time is None) != (end_time is None):
+        raise RowError("podano tylko jedną z godzin (start/koniec)")
+    if start_time and end_time and not is_valid_time_range(start_time, end_time):
+        raise RowError("koniec pracy nie może być wcześniejszy niż początek")
+    return start_time, end_time
+
+
+class _TagLookup:
+    def __init__(self) -> None:
+        self.static: dict[str, int] = {}
+        self.monthly: dict[tuple[int | None, int | None, str], int] = {}
+        for tag_id, name, year, month, is_static in WorkTag.objects.values_list(
+            "id", "name", "year", "month", "is_static"
+        ):
+            if is_static:
+                self.static.setdefault(name, tag_id)
+            else:
+                self.monthly.setdefault((year, month, name), tag_id)
+
+    def resolve(self, name: str, date_obj: date) -> int:
+        tag_id = self.monthly.get((date_obj.year, date_obj.month, name))
+        if tag_id is None:
+            tag_id = self.static.get(name)
+        if tag_id is None:
+            raise RowError(f"nieznany tag: {name!r}")
+        return tag_id
+
+
+def _flush_work_hours(
+    batch: dict[tuple[int, date], WorkHour], audit: AuditBuffer
+) -> None:
+    with tenants.atomic():
+        existing = {
+            (wh.user_id, wh.date): wh
+            for wh in WorkHour.objects.filter(
+                user_id__in={user_id for user_id, _ in batch},
+                date__in={date_obj for _, date_obj in batch},
+            )
+        }
+        for key, wh in batch.items():
+            if key in existing:
+                wh.version = existing[key].version + 1
+        WorkHour.objects.bulk_create(
+            batch.values(),
+            update_conflicts=True,
+            unique_fields=["user", "date"],
+            update_fields=["start_time", "end_time", "tag", "version"],
+        )
+        for (user_id, date_obj), wh in batch.items():
+            audit.work_hour(
+                user_id,
+                date_obj,
+                snapshot(existing.get((user_id, date_obj))),
+                snapshot(wh),
+            )
+        mark_dates_changed(batch)
+    batch.clear()
+
+
+def import_work_hours(
+    stream: IO[str],
+    rejects: IO[str] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    editor: User | None = None,
+) -> ImportResult:
+    reader = _read_rows(stream, WORK_HOUR_COLUMNS)
+    reject_writer = _RejectWriter(rejects, WORK_HOUR_COLUMNS)
+    result = ImportResult()
+    audit = AuditBuffer(editor=editor, source=AuditEntry.IMPORT)
+
+    users = dict(User.objects.values_list("username", "id"))
+    tags = _TagLookup()
+
+    batch: dict[tuple[int, date], WorkHour] = {}
+    counted: set[tuple[int, date]] = set()
+    for row in reader:
+        line = reader.line_num
+        try:
+            username = (row.get("username") or "").strip()
+            user_id = users.get(username)
+            if user_id is None:
+                raise RowError(f"nieznany użytkownik: {username!r}")
+
+            date_obj = _parse_date(row.get("date"))
+            start_time, end_time = _parse_time_range(row)
+
+            tag_name = (row.get("tag") or "").strip()
+            tag_id = tags.resolve(tag_name, date_obj) if tag_name else None
+
+            if start_time is None and tag_id is None:
+                raise RowError("brak godzin i tagu")
+        except RowError as e:
+            result.reject(line, str(e))
+            reject_writer.write(line, row, str(e))
+            continue
+
+        # a later row for the same user and day replaces the earlier one (in
+        # this batch or in the database), so each key is counted once
+        key = (user_id, date_obj)
+        if key not in counted:
+            counted.add(key)
+            result.imported += 1
+        batch[key] = WorkHour(
+            user_id=user_id,
+            date=date_obj,
+            start_time=start_time,
+            end_time=end_time,
+            tag_id=tag_id,
+        )
+
+        if len(batch) >= batch_size:
+            _flush_work_hours(batch, audit)
+
+    if batch:
+        _flush_work_hours(batch, audit)
+
+    return result
+
+
+def _flush_machine_logs(
+    batch: list[MachineWorkLog],
+    replaced: set[tuple[int, date]],
+    audit: AuditBuffer,
+) -> None:
+    # An imported (machine, day) replaces what that machine logged that day,
+    # but only the first time it shows up in the file. Unlike the machines
+    # form, which saves whole days, other machines of the day are kept.
+    to_replace: dict[date, set[int]] = {}
+    for log in batch:
+        key = (log.machine_id, log.date)
+        if key not in replaced:
+            to_replace.setdefault(log.date, set()).add(log.machine_id)
+            replaced.add(key)
+
+    removed: dict[date, list[MachineWorkLog]] = {}
+    added: dict[date, list[MachineWorkLog]] = {}
+    for log in batch:
+        added.setdefault(log.date, []).append(log)
+
+    with tenants.atomic():
+        if to_replace:
+            query = models.Q()
+            for date_obj, machine_ids in to_replace.items():
+                query |= models.Q(date=date_obj, machine_id__in=machine_ids)
+            for log in MachineWorkLog.objects.filter(query):
+                removed.setdefault(log.date, []).append(log)
+            MachineWorkLog.objects.filter(query).delete()
+        MachineWorkLog.objects.bulk_create(batch)
+        for date_obj in removed.keys() | added.keys():
+            audit.machine_day(
+                date_obj, removed.get(date_obj, []), added.get(date_obj, [])
+            )
+        mark_dates_changed((None, log.date) for log in batch)
+    batch.clear()
+
+
+def import_machine_logs(
+    stream: IO[str],
+    rejects: IO[str] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    editor: User | None = None,
+) -> ImportResult:
+    reader = _read_rows(stream, MACHINE_LOG_COLUMNS)
+    reject_writer = _RejectWriter(rejects, MACHINE_LOG_COLUMNS)
+    result = ImportResult()
+    audit = AuditBuffer(editor=editor, source=AuditEntry.IMPORT)
+
+    machines = dict(Machine.objects.values_list("name", "id"))
+
+    batch: list[MachineWorkLog] = []
+    replaced: set[tuple[int, date]] = set()
+    for row in reader:
+        line = reader.line_num
+        try:
+            name = (row.get("machine") or "").strip()
+            machine_id = machines.get(name)
+            if machine_id is None:
+                raise RowError(f"nieznana maszyna: {name!r}")
+
+            date_obj = _parse_date(row.get("date"))
+            start_time, end_time = _parse_time_range(row)
+            if start_time is None:
+                raise RowError("brak godzin pracy maszyny")
+        except RowError as e:
+            result.reject(line, str(e))
+            reject_writer.write(line, row, str(e))
+            continue
+
+        batch.append(
+            MachineWorkLog(
+                machine_id=machine_id,
+                date=date_obj,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        )
+        result.imported += 1
+
+        if len(batch) >= batch_size:
+            _flush_machine_logs(batch, replaced, audit)
+
+    if batch:
+        _flush_machine_logs(batch, replaced, audit)
+
+    return result
+
+
+IMPORTERS = {
+    "work-hours": import_work_hours,
+    "machine-logs": import_machine_logs,
+}
@@ -0,0 +1,50 @@
+import os
+
+from django.conf import settings
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.html import conditional_escape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from .compression import minify_html
+from .templatetags.get_item import get_item
+
+# Jinja2 ports of the grid pages live in django_app/jinja2 and are rendered
+# with using=settings.GRID_TEMPLATE_ENGINE; every other page stays on the
+# Django engine. The ports must produce the same markup as the originals.
+
+
+class MinifyingLoader(FileSystemLoader):
+    # Same indentation stripping as template_loaders.MinifyingLoader.
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        if getattr(settings, "MINIFY_HTML", True):
+            source = minify_html(source)
+        return source, filename, uptodate
+
+
+def url(name: str, *args) -> str:
+    return reverse(name, args=args)
+
+
+def bytecode_cache() -> FileSystemBytecodeCache:
+    directory = getattr(settings, "JINJA2_BYTECODE_DIR", None)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return FileSystemBytecodeCache(directory)
+
+
+def environment(**options) -> Environment:
+    loader = options.pop("loader")
+    env = Environment(
+        loader=MinifyingLoader(loader.searchpath),
+        bytecode_cache=bytecode_cache(),
+        # Django's escaping (quotes as &#x27;) and trailing newlines, so the
+        # output matches the Django templates byte for byte.
+        finalize=conditional_escape,
+        keep_trailing_newline=True,
+        **options,
+    )
+    env.globals.update(static=static, url=url)
+    env.filters["get_item"] = get_item
+    return env
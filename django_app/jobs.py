@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import traceback
+from collections.abc import Callable
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import tenants
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# A handler gets the job params and returns the result file name and content.
+JobHandler = Callable[[dict[str, Any]], tuple[str, bytes]]
+
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    def register(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = func
+        return func
+
+    return register
+
+
+def params_hash(kind: str, params: dict[str, Any]) -> str:
+    payload = json.dumps([kind, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def results_dir() -> Path:
+    # job ids repeat across companies, so each gets a directory of its own
+    tenant = tenants.current_tenant()
+    path = Path(settings.JOB_RESULTS_DIR)
+    if tenant is not None:
+        path /= tenant
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def enqueue(kind: str, params: dict[str, Any], user: User | None = None) -> Job:
+    # The same report asked for twice while the first one is still queued or
+    # running is served by that job. The IMMEDIATE transaction holds the write
+    # lock, so two requests cannot both miss the existing job.
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    digest = params_hash(kind, params)
+    with tenants.atomic():
+        job = Job.objects.filter(
+            kind=kind, params_hash=digest, status__in=[Job.QUEUED, Job.RUNNING]
+        ).first()
+        if job is None:
+            job = Job.objects.create(
+                kind=kind, params=params, params_hash=digest, created_by=user
+            )
+    return job
+
+
+def claim_next_job() -> Job | None:
+    with tenants.atomic():
+        job = Job.objects.filter(status=Job.QUEUED).order_by("created_at", "id").first()
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def requeue_stale_jobs(older_than: timedelta) -> int:
+    # Jobs left running by a worker that was killed go back to the queue.
+    return Job.objects.filter(
+        status=Job.RUNNING, started_at__lt=timezone.now() - older_than
+    ).update(status=Job.QUEUED, started_at=None)
+
+
+def run_job(job: Job) -> None:
+    try:
+        name, content = JOB_HANDLERS[job.kind](job.params)
+        result_file = f"{job.pk}-{name}"
+        (results_dir() / result_file).write_bytes(content)
+    except Exception:
+        logger.exception("Job %s failed", job.pk)
+        job.status = Job.FAILED
+        job.error = traceback.format_exc()
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return
+
+    job.status = Job.DONE
+    job.result_file = result_file
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "result_file", "finished_at"])
+
+
+def run_pending_jobs() -> int:
+    count = 0
+    while (job := claim_next_job()) is not None:
+        run_job(job)
+        count += 1
+    return count
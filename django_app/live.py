@@ -0,0 +1,122 @@
+import asyncio
+import json
+import time as timer
+from collections.abc import AsyncIterator
+
+from asgiref.sync import sync_to_async
+
+from .expressions import with_month_totals
+from .grid import GRID_FIELDS, NO_TIME, build_month_grid
+from .models import AuditEntry, WorkHour
+from .tenants import using_tenant
+from .work_calendar import get_month_calendar
+
+# Live admin grid: audit entries are written when a save commits, so polling
+# them by id is a change feed every process (and every tenant) shares.
+POLL_INTERVAL = 2.0
+KEEPALIVE_INTERVAL = 15.0
+# A stream ends after this long and the browser reconnects with the last
+# event id, so a forgotten tab does not hold a worker connection forever.
+STREAM_DURATION = 300.0
+RECONNECT_MS = 3000
+
+
+def latest_change_id() -> int:
+    return AuditEntry.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def _time_or_none(minutes: int) -> int | None:
+    return None if minutes == NO_TIME else minutes
+
+
+def month_changes(year: int, month: int, after: int) -> tuple[int, dict | None]:
+    # The grid cells of this month changed since audit entry `after`, as
+    # they are now, plus the new running, week and month totals of their
+    # users.
+    entries = list(
+        AuditEntry.objects.filter(id__gt=after)
+        .order_by("id")
+        .values_list("id", "user_id", "date")
+    )
+    if not entries:
+        return after, None
+    last_id = entries[-1][0]
+    changed = {
+        (user_id, day.day)
+        for _, user_id, day in entries
+        if user_id is not None and (day.year, day.month) == (year, month)
+    }
+    if not changed:
+        return last_id, None
+
+    user_ids = {user_id for user_id, _ in changed}
+    rows = with_month_totals(
+        WorkHour.objects.filter(date__year=year, date__month=month, user__in=user_ids)
+    ).values_list(*GRID_FIELDS)
+    grid = build_month_grid(
+        user_ids, len(get_month_calendar(year, month).days), rows.iterator()
+    )
+
+    cells = []
+    for user_id, day in sorted(changed):
+        row = grid[user_id]
+        cell = row.get(day)
+        cells.append(
+            {
+                "user": user_id,
+                "day": day,
+                "start": _time_or_none(row.start[day]),
+                "end": _time_or_none(row.end[day]),
+                "tag": row.tag[day] or None,
+                "version": row.version[day],
+                # as the grid renders them
+                "hours": str(cell.total_hours) if cell else "—",
+                "filled": bool(cell and cell.filled),
+            }
+        )
+    # an earlier day changes the running total of every later one
+    running = {
+        user_id: {
+            day: str(grid[user_id][day].running_hours)
+            for day in range(1, len(grid[user_id].start))
+            if day in grid[user_id]
+        }
+        for user_id in user_ids
+    }
+    weeks = {
+        user_id: {
+            week: str(hours or "—") for week, hours in grid[user_id].weeks.items()
+        }
+        for user_id in user_ids
+    }
+    totals = {user_id: str(grid[user_id].total_hours or "—") for user_id in user_ids}
+    return last_id, {
+        "cells": cells,
+        "running": running,
+        "weeks": weeks,
+        "totals": totals,
+    }
+
+
+def _poll(tenant: str | None, year: int, month: int, after: int):
+    # The stream outlives the request's middleware, so the tenant is set again.
+    with using_tenant(tenant):
+        return month_changes(year, month, after)
+
+
+async def month_events(
+    tenant: str | None, year: int, month: int, after: int
+) -> AsyncIterator[str]:
+    poll = sync_to_async(_poll)
+    yield f"retry: {RECONNECT_MS}\n\n"
+    started = last_sent = timer.monotonic()
+    while timer.monotonic() - started < STREAM_DURATION:
+        after, payload = await poll(tenant, year, month, after)
+        now = timer.monotonic()
+        if payload is not None:
+            yield f"id: {after}\nevent: cells\ndata: {json.dumps(payload)}\n\n"
+            last_sent = now
+        elif now - last_sent >= KEEPALIVE_INTERVAL:
+            yield ": keepalive\n\n"
+            last_sent = now
+        await asyncio.sleep(POLL_INTERVAL)
@@ -0,0 +1,195 @@
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from django_app.archive import ARCHIVE_DB, copy_rates
+from django_app.models import (
+    ArchivedYear,
+    MachineWorkLog,
+    WorkHour,
+    WorkTag,
+)
+
+CHUNK_SIZE = 2000
+
+
+def copy_reference_data() -> None:
+    # Archived rows keep their foreign keys, so the users, tags and machines
+    # they point to are copied too (users without a usable password), and
+    # the machine rates so archived months can still be billed.
+    User.objects.using(ARCHIVE_DB).bulk_create(
+        [
+            User(
+                id=u.id,
+                username=u.username,
+                first_name=u.first_name,
+                last_name=u.last_name,
+                is_staff=u.is_staff,
+                is_active=u.is_active,
+                date_joined=u.date_joined,
+                password="!",
+            )
+            for u in User.objects.all()
+        ],
+        update_conflicts=True,
+        unique_fields=["id"],
+        update_fields=["username", "first_name", "last_name", "is_staff", "is_active"],
+    )
+    WorkTag.objects.using(ARCHIVE_DB).bulk_create(
+        WorkTag.objects.all(),
+        update_conflicts=True,
+        unique_fields=["id"],
+        update_fields=["name", "month", "year", "is_static"],
+    )
+    copy_rates()
+
+
+def data_fields(model) -> list[str]:
+    return [f.attname for f in model._meta.concrete_fields if not f.primary_key]
+
+
+def drop_superseded_hours(year: int) -> None:
+    # A (user, date) already in the archive under another id was entered
+    # again in the main database; its row is the newer one and replaces the
+    # archived one, which would otherwise block it on the unique key.
+    archived = {
+        (user_id, day): pk
+        for pk, user_id, day in WorkHour.objects.using(ARCHIVE_DB)
+        .filter(date__year=year)
+        .values_list("id", "user_id", "date")
+    }
+    hot = WorkHour.objects.using("default").filter(date__year=year)
+    superseded = [
+        archived[(user_id, day)]
+        for pk, user_id, day in hot.values_list("id", "user_id", "date").iterator(
+            chunk_size=CHUNK_SIZE
+        )
+        if archived.get((user_id, day), pk) != pk
+    ]
+    for start in range(0, len(superseded), CHUNK_SIZE):
+        WorkHour.objects.using(ARCHIVE_DB).filter(
+            id__in=superseded[start : start + CHUNK_SIZE]
+        ).delete()
+
+
+def copy_rows(model, year: int) -> int:
+    # Rows archived by an earlier, interrupted run are overwritten, so a
+    # row edited since then is not lost when the main copy is deleted.
+    fields = [f.name for f in model._meta.concrete_fields if not f.primary_key]
+    rows = model.objects.using("default").filter(date__year=year).order_by("id")
+    batch = []
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        batch.append(row)
+        if len(batch) >= CHUNK_SIZE:
+            model.objects.using(ARCHIVE_DB).bulk_create(
+                batch, update_conflicts=True, unique_fields=["id"], update_fields=fields
+            )
+            batch = []
+    if batch:
+        model.objects.using(ARCHIVE_DB).bulk_create(
+            batch, update_conflicts=True, unique_fields=["id"], update_fields=fields
+        )
+    return model.objects.using(ARCHIVE_DB).filter(date__year=year).count()
+
+
+def count_missing(model, year: int) -> int:
+    # Rows of the main database the archive does not hold with every value.
+    fields = ["id", *data_fields(model)]
+    rows = (
+        model.objects.using("default")
+        .filter(date__year=year)
+        .order_by("id")
+        .values_list(*fields)
+    )
+    missing = 0
+    chunk = []
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            missing += count_missing_chunk(model, fields, chunk)
+            chunk = []
+    if chunk:
+        missing += count_missing_chunk(model, fields, chunk)
+    return missing
+
+
+def count_missing_chunk(model, fields: list[str], chunk: list[tuple]) -> int:
+    archived = set(
+        model.objects.using(ARCHIVE_DB)
+        .filter(id__in=[row[0] for row in chunk])
+        .values_list(*fields)
+    )
+    return sum(row not in archived for row in chunk)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the work hours and machine logs of closed years from the main "
+        "database to the archive database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "years",
+            nargs="*",
+            type=int,
+            help="Years to archive (default: every year before last year).",
+        )
+
+    def handle(self, *args, **options):
+        if settings.TENANT_HOSTS:
+            raise CommandError("The archive is not available in tenant mode.")
+        last_closed = date.today().year - 1
+        years = options["years"] or sorted(
+            {d.year for d in WorkHour.objects.dates("date", "year")}
+            | {d.year for d in MachineWorkLog.objects.dates("date", "year")}
+        )
+        if not options["years"]:
+            years = [y for y in years if y < last_closed]
+        if any(y > last_closed for y in years):
+            raise CommandError(
+                f"Only closed years (up to {last_closed}) can be archived."
+            )
+
+        call_command("migrate", database=ARCHIVE_DB, verbosity=0)
+        for year in years:
+            self.archive_year(year)
+
+    def archive_year(self, year: int) -> None:
+        # Copy first and only delete once the archive holds every row, so an
+        # interrupted run can simply be repeated.
+        with transaction.atomic(using=ARCHIVE_DB):
+            copy_reference_data()
+            drop_superseded_hours(year)
+            archived_counts = {
+                model: copy_rows(model, year) for model in (WorkHour, MachineWorkLog)
+            }
+
+        # The write lock is taken when the block starts, so nothing changes
+        # between the check and the delete.
+        with transaction.atomic():
+            for model in (WorkHour, MachineWorkLog):
+                missing = count_missing(model, year)
+                if missing:
+                    raise CommandError(
+                        f"{year}: {missing} {model._meta.verbose_name_plural} "
+                        "differ in the archive, nothing was deleted."
+                    )
+            for model in (WorkHour, MachineWorkLog):
+                model.objects.filter(date__year=year).delete()
+            ArchivedYear.objects.update_or_create(
+                year=year,
+                defaults={
+                    "work_hours": archived_counts[WorkHour],
+                    "machine_logs": archived_counts[MachineWorkLog],
+                },
+            )
+
+        self.stdout.write(
+            f"{year}: archived {archived_counts[WorkHour]} work hours and "
+            f"{archived_counts[MachineWorkLog]} machine logs"
+        )
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from django_app.sqlite_backup import (
+    DEFAULT_PAUSE,
+    DEFAULT_STEP_PAGES,
+    BackupError,
+    backup_database,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Back up the SQLite database online, in small steps that let writers "
+        "through, verify the copy and keep the newest --keep backups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--dir", type=Path, help="Backup directory (default: settings.BACKUP_DIR)."
+        )
+        parser.add_argument("--keep", type=int, default=7)
+        parser.add_argument("--step-pages", type=int, default=DEFAULT_STEP_PAGES)
+        parser.add_argument(
+            "--pause-ms",
+            type=float,
+            default=DEFAULT_PAUSE * 1000,
+            help="Pause between steps, left to writers.",
+        )
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        if alias not in settings.DATABASES:
+            raise CommandError(f"Unknown database: {alias}")
+        if settings.DATABASES[alias]["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError(f"{alias} is not a SQLite database.")
+
+        directory: Path = options["dir"] or Path(settings.BACKUP_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / f"{alias}-{timezone.now():%Y%m%d-%H%M%S}.sqlite3"
+
+        try:
+            stats = backup_database(
+                target,
+                alias=alias,
+                step_pages=options["step_pages"],
+                pause=options["pause_ms"] / 1000,
+            )
+        except BackupError as e:
+            raise CommandError(str(e)) from e
+
+        self.stdout.write(
+            f"Backed up {alias} to {target}: {stats.size / 2**20:.1f} MiB "
+            f"in {stats.seconds:.2f}s ({stats.throughput / 2**20:.1f} MiB/s), "
+            f"{stats.steps} steps of up to {stats.step_pages} pages, "
+            f"{stats.restarts} restarts, "
+            f"worst writer stall {stats.longest_step * 1000:.1f} ms"
+        )
+
+        backups = sorted(directory.glob(f"{alias}-*.sqlite3"), reverse=True)
+        for old in backups[options["keep"] :]:
+            old.unlink()
+            self.stdout.write(f"Removed old backup {old.name}")
@@ -0,0 +1,189 @@
+import gzip
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from django_app.benchmarks import (
+    benchmark_database,
+    populate_month,
+    reset_template_cache,
+    timed,
+    traced,
+)
+from django_app.compression import brotli
+from django_app.models import WorkHour
+from django_app.month_context import MonthContext
+
+PAGES = ("dashboard", "machines-report")
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the grid pages for a synthetic month and compare response "
+        "size and estimated delivery time over a slow link."
+    )
+
+    def add_arguments(self, parser):
+        today = date.today()
+        parser.add_argument("--users", type=int, default=40)
+        parser.add_argument("--year", type=int, default=today.year)
+        parser.add_argument("--month", type=int, default=today.month)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--bandwidth-kbit",
+            type=float,
+            default=256,
+            help="Link speed used for the transfer estimate.",
+        )
+        parser.add_argument("--rtt-ms", type=float, default=300)
+        parser.add_argument(
+            "--tracemalloc",
+            action="store_true",
+            help="Compare peak memory of the admin grid data and pages instead.",
+        )
+        parser.add_argument(
+            "--engines",
+            action="store_true",
+            help="Compare Django and Jinja2 rendering of the grid templates instead.",
+        )
+
+    def handle(self, *args, **options):
+        # the test database only replaces the default connection, so a
+        # tenant's writes would land in its real database
+        if settings.TENANT_HOSTS:
+            raise CommandError("Benchmarks are not available in tenant mode.")
+        year, month = options["year"], options["month"]
+        with benchmark_database():
+            admin = populate_month(options["users"], year, month)
+            client = Client()
+            client.force_login(admin)
+
+            if options["tracemalloc"]:
+                self.memory(client, year, month, options)
+                return
+            if options["engines"]:
+                self.engines(admin, year, month, options)
+                return
+
+            for page in PAGES:
+                url = f"{reverse(page)}?year={year}&month={month}"
+                self.stdout.write(f"\n{page} ({options['users']} users)")
+                self.stdout.write(
+                    f"{'variant':<18}{'bytes':>10}{'render ms':>11}{'link ms':>10}"
+                )
+                for minify in (False, True):
+                    with override_settings(MINIFY_HTML=minify):
+                        reset_template_cache()
+                        render, response = timed(
+                            lambda url=url: client.get(url), options["repeat"]
+                        )
+                    self.report(page, minify, render, response.content, options)
+            reset_template_cache()
+
+    def report(self, page, minify, render, body, options):
+        variants = [("html", body, 0.0)]
+        gzip_time, gzipped = timed(
+            lambda: gzip.compress(body, compresslevel=6), options["repeat"]
+        )
+        variants.append(("gzip", gzipped, gzip_time))
+        if brotli is not None:
+            br_time, br_body = timed(
+                lambda: brotli.compress(body, quality=5), options["repeat"]
+            )
+            variants.append(("br", br_body, br_time))
+
+        prefix = "minified" if minify else "raw"
+        for name, content, extra in variants:
+            link = options["rtt_ms"] + len(content) * 8 / options["bandwidth_kbit"]
+            self.stdout.write(
+                f"{prefix + '+' + name:<18}{len(content):>10}"
+                f"{(render + extra) * 1000:>11.1f}{link:>10.0f}"
+            )
+
+    def memory(self, client, year, month, options):
+        def instances():
+            users = MonthContext(year, month).users
+            entries = {u.id: {} for u in users}
+            for entry in WorkHour.objects.select_related("user", "tag").filter(
+                date__year=year, date__month=month, user__in=users
+            ):
+                entries[entry.user.id][entry.date.day] = entry
+            return entries
+
+        variants = [
+            ("model instances", instances),
+            ("compact grid", lambda: MonthContext(year, month).grid),
+        ]
+        for page in PAGES:
+            url = f"{reverse(page)}?year={year}&month={month}"
+            variants.append((page, lambda url=url: client.get(url)))
+
+        self.stdout.write(f"\nPeak memory ({options['users']} users)")
+        self.stdout.write(f"{'variant':<18}{'peak KiB':>10}{'ms':>9}")
+        for name, func in variants:
+            func()
+            peak, _ = traced(func)
+            seconds, _ = timed(func, options["repeat"])
+            self.stdout.write(f"{name:<18}{peak / 1024:>10.0f}{seconds * 1000:>9.1f}")
+
+    def engines(self, admin, year, month, options):
+        if "jinja2" not in engines.templates:
+            raise CommandError("jinja2 is not installed.")
+
+        request = RequestFactory().get("/")
+        request.user = admin
+        ctx = MonthContext(year, month)
+        worker_ctx = MonthContext(year, month, ctx.users[0])
+        # the same contexts the views build
+        pages = {
+            "admin_dashboard.html": ctx.page_context(
+                days=ctx.days,
+                users=ctx.users,
+                grid=ctx.grid,
+                total_hours_dict=ctx.total_hours_dict,
+                tags=ctx.tags,
+            ),
+            "user_dashboard.html": worker_ctx.page_context(
+                days=worker_ctx.editable_days,
+                hours=worker_ctx.hours,
+                running_hours=worker_ctx.running_hours,
+                week_hours=worker_ctx.week_hours,
+                total_hours=worker_ctx.total_hours,
+                tags=worker_ctx.tags,
+            ),
+            "admin_machines_report.html": ctx.page_context(
+                days=ctx.days,
+                machines=ctx.machines,
+                logs_dict=ctx.machine_logs,
+                machine_tokens=ctx.machine_tokens,
+            ),
+        }
+
+        self.stdout.write(f"\nTemplate engines ({options['users']} users)")
+        self.stdout.write(
+            f"{'template':<28}{'engine':<8}{'bytes':>10}{'first ms':>10}{'ms':>9}"
+        )
+        for name, context in pages.items():
+            for alias in ("django", "jinja2"):
+                # "first" loads and compiles the template in a fresh engine
+                # cache; Jinja2 reads the compiled code from its bytecode cache.
+                reset_template_cache()
+                engines["jinja2"].env.cache.clear()  # type: ignore[attr-defined]
+                first, _ = timed(
+                    lambda: (
+                        engines[alias].get_template(name).render(dict(context), request)
+                    ),
+                    1,
+                )
+                template = engines[alias].get_template(name)
+                seconds, html = timed(
+                    lambda: template.render(dict(context), request), options["repeat"]
+                )
+                self.stdout.write(
+                    f"{name:<28}{alias:<8}{len(html.encode()):>10}"
+                    f"{first * 1000:>10.1f}{seconds * 1000:>9.1f}"
+                )
@@ -0,0 +1,36 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_app.analytics import export_snapshot, np, snapshot_dir
+from django_app.replica import replica_reads
+
+
+class Command(BaseCommand):
+    help = (
+        "Export work hours and machine logs into memory-mappable column "
+        "files for the analytics module."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Snapshot directory (default: settings.ANALYTICS_DIR, "
+            "per tenant in tenant mode).",
+        )
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError("NumPy is not installed (uv sync --extra analytics).")
+
+        path = options["output"] or snapshot_dir()
+        started = time.perf_counter()
+        with replica_reads():
+            counts = export_snapshot(path)
+        self.stdout.write(
+            f"Exported {counts['work_hours']} work hours and "
+            f"{counts['machine_logs']} machine logs to {path} "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_app.importers import DEFAULT_BATCH_SIZE, IMPORTERS, ImportFormatError
+
+
+class Command(BaseCommand):
+    help = "Import work hours or machine logs from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(IMPORTERS))
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--rejects",
+            type=Path,
+            help="Where to write rejected rows (default: <path>.rejects.csv).",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path: Path = options["path"]
+        rejects_path: Path = options["rejects"] or path.with_suffix(".rejects.csv")
+
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        importer = IMPORTERS[options["kind"]]
+        with (
+            path.open(encoding="utf-8-sig", newline="") as stream,
+            rejects_path.open("w", encoding="utf-8", newline="") as rejects,
+        ):
+            try:
+                result = importer(
+                    stream, rejects=rejects, batch_size=options["batch_size"]
+                )
+            except ImportFormatError as e:
+                raise CommandError(str(e)) from e
+
+        self.stdout.write(f"Imported: {result.imported}, rejected: {result.rejected}")
+        if result.rejected:
+            self.stdout.write(f"Rejected rows written to {rejects_path}")
+        else:
+            rejects_path.unlink()
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from django_app.tenants import using_tenant
+
+
+class Command(BaseCommand):
+    help = "Create or migrate the database of every tenant (TENANTS setting)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "tenants", nargs="*", help="Tenants to migrate (default: all)."
+        )
+
+    def handle(self, *args, **options):
+        databases = settings.TENANT_DATABASES
+        if not databases:
+            raise CommandError("No tenants configured (TENANTS).")
+        tenants = options["tenants"] or list(databases)
+        unknown = sorted(set(tenants) - set(databases))
+        if unknown:
+            raise CommandError(f"Unknown tenants: {', '.join(unknown)}")
+
+        Path(settings.TENANT_DB_DIR).mkdir(parents=True, exist_ok=True)
+        for tenant in tenants:
+            self.stdout.write(f"{tenant} ({databases[tenant]})")
+            with using_tenant(tenant):
+                call_command(
+                    "migrate",
+                    database=databases[tenant],
+                    interactive=False,
+                    verbosity=options["verbosity"],
+                    stdout=self.stdout,
+                )
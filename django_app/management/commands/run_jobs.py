@@ -0,0 +1,49 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from django_app.jobs import requeue_stale_jobs, run_pending_jobs
+from django_app.tenants import using_tenant
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (e.g. yearly reports)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Run what is queued and exit."
+        )
+        parser.add_argument("--poll-interval", type=float, default=2.0)
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=60,
+            help="Minutes after which a running job is considered abandoned.",
+        )
+
+    def handle(self, *args, **options):
+        # In tenant mode one worker serves every company, unless TENANT picks one.
+        if settings.TENANT or not settings.TENANT_DATABASES:
+            tenants = [settings.TENANT]
+        else:
+            tenants = list(settings.TENANT_DATABASES)
+
+        for tenant in tenants:
+            prefix = f"{tenant}: " if tenant else ""
+            with using_tenant(tenant):
+                requeued = requeue_stale_jobs(timedelta(minutes=options["stale_after"]))
+            if requeued:
+                self.stdout.write(f"{prefix}Requeued {requeued} abandoned jobs")
+
+        while True:
+            for tenant in tenants:
+                prefix = f"{tenant}: " if tenant else ""
+                with using_tenant(tenant):
+                    count = run_pending_jobs()
+                if count:
+                    self.stdout.write(f"{prefix}Finished {count} jobs")
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
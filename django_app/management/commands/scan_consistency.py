@@ -0,0 +1,56 @@
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from django_app.consistency import CHUNK_SIZE, scan
+from django_app.replica import replica_reads
+
+
+class Command(BaseCommand):
+    help = (
+        "Scan all work hours and machine logs for rows that break today's "
+        "rules and write a JSON report and, optionally, a SQL fix script."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--report", type=Path, help="JSON report path (default: stdout)."
+        )
+        parser.add_argument("--fix-sql", type=Path, help="Write a fix script here.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Scan this many date ranges in separate processes.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = open(options["report"], "w") if options["report"] else self.stdout
+        fix_script = open(options["fix_sql"], "w") if options["fix_sql"] else None
+        try:
+            # the fix script must match the rows as they are on the primary
+            reads = nullcontext() if fix_script else replica_reads()
+            with reads:
+                summary = scan(
+                    report,
+                    fix_script,
+                    workers=options["workers"],
+                    chunk_size=options["chunk_size"],
+                )
+        finally:
+            if options["report"]:
+                report.close()
+            if fix_script is not None:
+                fix_script.close()
+
+        issues = ", ".join(f"{k} {v}" for k, v in summary["issues"].items())
+        self.stderr.write(
+            f"Scanned {summary['work_hours']} work hours and "
+            f"{summary['machine_logs']} machine logs in "
+            f"{time.perf_counter() - started:.1f}s: {issues or 'no issues'}, "
+            f"{summary['fixes']} fixes"
+        )
@@ -0,0 +1,89 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate many punch terminals flushing their buffers at the same "
+        "moment against a running server and report request latencies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://localhost:8002/api/punch-events")
+        parser.add_argument("--token", required=True)
+        parser.add_argument(
+            "--users",
+            required=True,
+            help="Comma separated usernames the terminals punch for.",
+        )
+        parser.add_argument("--terminals", type=int, default=200)
+        parser.add_argument(
+            "--events", type=int, default=20, help="Events per terminal batch."
+        )
+        parser.add_argument("--timeout", type=float, default=60)
+
+    def handle(self, *args, **options):
+        usernames = [u for u in options["users"].split(",") if u]
+        if not usernames:
+            raise CommandError("At least one user is required.")
+
+        terminals = options["terminals"]
+        shift_start = datetime.now().replace(hour=6, minute=0, second=0)
+        barrier = threading.Barrier(terminals)
+
+        def flush(terminal_no: int) -> tuple[float, int]:
+            events = []
+            for i in range(options["events"]):
+                offset = timedelta(minutes=(terminal_no + i) % 30)
+                events.append(
+                    {
+                        "user": usernames[(terminal_no + i) % len(usernames)],
+                        "kind": "in" if i % 2 == 0 else "out",
+                        "timestamp": (shift_start + offset).isoformat(),
+                    }
+                )
+            request = urllib.request.Request(
+                options["url"],
+                data=json.dumps({"events": events}).encode(),
+                headers={
+                    "Authorization": f"Token {options['token']}",
+                    "Content-Type": "application/json",
+                },
+                method="POST",
+            )
+            barrier.wait()
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=options["timeout"]) as r:
+                    status = r.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError:
+                status = 0
+            return time.perf_counter() - started, status
+
+        burst_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=terminals) as pool:
+            results = list(pool.map(flush, range(terminals)))
+        wall = time.perf_counter() - burst_started
+
+        latencies = sorted(elapsed for elapsed, _ in results)
+        failures = sum(1 for _, status in results if status != 200)
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+
+        self.stdout.write(
+            f"{terminals} terminals x {options['events']} events in {wall:.2f}s"
+        )
+        self.stdout.write(
+            f"latency p50={statistics.median(latencies) * 1000:.0f}ms "
+            f"p95={p95 * 1000:.0f}ms max={latencies[-1] * 1000:.0f}ms"
+        )
+        self.stdout.write(f"failed requests: {failures}")
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_app', '0008_punch_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('scope', models.IntegerField(default=0)),
+                ('revision', models.CharField(max_length=32)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('year', 'month', 'scope')},
+            },
+        ),
+    ]
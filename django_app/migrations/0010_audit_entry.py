@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_app', '0009_month_revision'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('web', 'Formularz'), ('import', 'Import CSV'), ('punch', 'Czytnik')], default='web', max_length=10)),
+                ('action', models.CharField(choices=[('create', 'Dodanie'), ('update', 'Zmiana'), ('delete', 'Usunięcie')], max_length=10)),
+                ('date', models.DateField()),
+                ('before', models.JSONField(blank=True, null=True)),
+                ('after', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('editor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('machine', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='django_app.machine')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['user', 'date'], name='django_app__user_id_f3db80_idx'), models.Index(fields=['editor', 'created_at'], name='django_app__editor__91fcad_idx'), models.Index(fields=['date'], name='django_app__date_7ad3eb_idx'), models.Index(fields=['created_at'], name='django_app__created_5ad672_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_app', '0011_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(unique=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('work_hours', models.IntegerField(default=0)),
+                ('machine_logs', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['year'],
+            },
+        ),
+    ]
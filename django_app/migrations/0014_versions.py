@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_app', '0013_replica_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='machineworklog',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='workhour',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
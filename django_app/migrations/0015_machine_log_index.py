@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_app', '0014_versions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='machineworklog',
+            index=models.Index(fields=['machine', 'date'], name='django_app__machine_6f634a_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_app', '0015_machine_log_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MachineRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valid_from', models.DateField()),
+                ('hourly_rate', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rates', to='django_app.machine')),
+            ],
+            options={
+                'ordering': ['machine', '-valid_from'],
+                'unique_together': {('machine', 'valid_from')},
+            },
+        ),
+    ]
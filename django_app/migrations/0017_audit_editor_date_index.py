@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_app', '0016_machine_rates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditentry',
+            name='django_app__editor__91fcad_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditentry',
+            index=models.Index(fields=['editor', 'date'], name='django_app__editor__5560c6_idx'),
+        ),
+    ]
@@ -1,7 +1,9 @@
+import secrets
 from datetime import datetime, timedelta
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 
 
 class WorkTag(models.Model):
@@ -17,7 +19,23 @@ class WorkTag(models.Model):
         return self.name
 
 
-class WorkHour(models.Model):
+class Versioned(models.Model):
+    # Bumped on every change; editors send back the version they saw and a
+    # save only applies while it still matches (see save_admin_grid_changes).
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
+
+
+class WorkHour(Versioned):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     date = models.DateField()
     start_time = models.TimeField(null=True, blank=True)
@@ -52,12 +70,16 @@ class Machine(models.Model):
         return self.name
 
 
-class MachineWorkLog(models.Model):
+class MachineWorkLog(Versioned):
     machine = models.ForeignKey(Machine, on_delete=models.CASCADE)
     date = models.DateField()
     start_time = models.TimeField(null=True, blank=True)
     end_time = models.TimeField(null=True, blank=True)
 
+    class Meta:
+        # machine timeline: one machine over a date range
+        indexes = [models.Index(fields=["machine", "date"])]
+
     @property
     def total_hours(self) -> float:
         if not self.start_time or not self.end_time:
@@ -73,3 +95,187 @@ class MachineWorkLog(models.Model):
 
     def __str__(self):
         return f"{self.machine.name} - {self.date}"
+
+
+class MachineRate(models.Model):
+    # Hourly rental price of a machine from valid_from until the day before
+    # the machine's next rate.
+    machine = models.ForeignKey(Machine, on_delete=models.CASCADE, related_name="rates")
+    valid_from = models.DateField()
+    hourly_rate = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        unique_together = ("machine", "valid_from")
+        ordering = ["machine", "-valid_from"]
+
+    def __str__(self):
+        return f"{self.machine.name} od {self.valid_from}: {self.hourly_rate} zł/h"
+
+
+def generate_terminal_token() -> str:
+    return secrets.token_hex(20)
+
+
+class PunchTerminal(models.Model):
+    name = models.CharField(max_length=100)
+    token = models.CharField(
+        max_length=64, unique=True, default=generate_terminal_token
+    )
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return self.name
+
+
+class PunchEvent(models.Model):
+    IN = "in"
+    OUT = "out"
+    KIND_CHOICES = [(IN, "Wejście"), (OUT, "Wyjście")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    terminal = models.ForeignKey(
+        PunchTerminal, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    kind = models.CharField(max_length=3, choices=KIND_CHOICES)
+    timestamp = models.DateTimeField()
+    date = models.DateField()
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["timestamp"]
+        indexes = [models.Index(fields=["user", "date"])]
+
+    def save(self, *args, **kwargs):
+        # Punch events are an append-only record of what the terminals sent.
+        if not self._state.adding:
+            raise ValueError("Punch events cannot be modified.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.user.username} — {self.kind} {self.timestamp}"
+
+
+class MonthRevision(models.Model):
+    # scope: 0 for the whole month, otherwise the id of the user whose hours
+    # changed. (0, 0, 0) tracks reference data (tags, machines, users).
+    year = models.IntegerField()
+    month = models.IntegerField()
+    scope = models.IntegerField(default=0)
+    revision = models.CharField(max_length=32)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("year", "month", "scope")
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d}/{self.scope}: {self.revision}"
+
+
+class AuditEntry(models.Model):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    ACTION_CHOICES = [(CREATE, "Dodanie"), (UPDATE, "Zmiana"), (DELETE, "Usunięcie")]
+
+    WEB = "web"
+    IMPORT = "import"
+    PUNCH = "punch"
+    SOURCE_CHOICES = [(WEB, "Formularz"), (IMPORT, "Import CSV"), (PUNCH, "Czytnik")]
+
+    editor = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default=WEB)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # user for work hours, machine for machine logs
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    machine = models.ForeignKey(
+        Machine, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    date = models.DateField()
+    before = models.JSONField(null=True, blank=True)
+    after = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["user", "date"]),
+            models.Index(fields=["editor", "date"]),
+            models.Index(fields=["date"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Audit entries cannot be modified.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.created_at:%Y-%m-%d %H:%M} {self.action} {self.date}"
+
+
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "W kolejce"),
+        (RUNNING, "W trakcie"),
+        (DONE, "Gotowe"),
+        (FAILED, "Błąd"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    params_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    result_file = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["kind", "params_hash"]),
+        ]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class ArchivedYear(models.Model):
+    # Years whose work hours and machine logs were moved to the archive
+    # database by the archive_years command.
+    year = models.IntegerField(unique=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+    work_hours = models.IntegerField(default=0)
+    machine_logs = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["year"]
+
+    def __str__(self):
+        return str(self.year)
+
+
+class ReplicaHeartbeat(models.Model):
+    # Single row, touched on the primary and read back from the replica to
+    # tell how far behind the replica is.
+    beat = models.DateTimeField()
+
+    def __str__(self):
+        return self.beat.isoformat()
@@ -0,0 +1,157 @@
+from collections import defaultdict
+from datetime import date
+from functools import cached_property
+from typing import cast
+
+from django.contrib.auth.models import User
+from django.http import HttpRequest
+
+from .constants import HOURS_LIST, MINUTES_LIST
+from .expressions import with_month_totals
+from .grid import GRID_FIELDS, UserGrid, build_month_grid, minutes_to_hours
+from .models import Machine, MachineWorkLog, WorkHour, WorkTag
+from .utils import (
+    get_days_list,
+    get_days_list_editable,
+    get_machines,
+    get_month_users,
+    get_months_list,
+    get_tags,
+    machine_day_token,
+)
+from .work_calendar import CalendarDay, EditableDay, MonthCalendar, get_month_calendar
+
+
+def month_from_request(request: HttpRequest) -> tuple[int, int]:
+    today = date.today()
+    return (
+        int(request.GET.get("year", today.year)),
+        int(request.GET.get("month", today.month)),
+    )
+
+
+class MonthContext:
+    # Everything a month page shows, loaded on first use with one query per
+    # part: work hours (one user's or every listed worker's) and machine logs.
+    # Calendar, tags, machines and workers come from the in-process caches.
+    def __init__(self, year: int, month: int, user: User | None = None):
+        self.year = year
+        self.month = month
+        self.user = user
+
+    @cached_property
+    def calendar(self) -> MonthCalendar:
+        return get_month_calendar(self.year, self.month)
+
+    @property
+    def days(self) -> tuple[CalendarDay, ...]:
+        return get_days_list(self.year, self.month)
+
+    @property
+    def editable_days(self) -> tuple[EditableDay, ...]:
+        return get_days_list_editable(self.year, self.month)
+
+    @property
+    def tags(self) -> tuple[WorkTag, ...]:
+        return get_tags(year=self.year, month=self.month)
+
+    @property
+    def machines(self) -> tuple[Machine, ...]:
+        return get_machines()
+
+    @cached_property
+    def users(self) -> list[User]:
+        return get_month_users(year=self.year, month=self.month)
+
+    @cached_property
+    def work_hours(self) -> list[WorkHour]:
+        queryset = WorkHour.objects.select_related("tag").filter(
+            date__year=self.year, date__month=self.month
+        )
+        if self.user is not None:
+            queryset = queryset.filter(user=self.user)
+        else:
+            queryset = queryset.filter(user__in=self.users)
+        return list(with_month_totals(queryset))
+
+    @cached_property
+    def hours(self) -> dict[int, WorkHour]:
+        return {e.date.day: e for e in self.work_hours}
+
+    # hours, running_hours, week_hours and total_hours are one user's month
+    # (per-user pages); the grid below keeps them apart per user.
+
+    @cached_property
+    def running_hours(self) -> dict[int, float]:
+        return {
+            e.date.day: minutes_to_hours(e.running_minutes) for e in self.work_hours
+        }
+
+    @cached_property
+    def week_hours(self) -> dict[int, float]:
+        return {e.week: minutes_to_hours(e.week_minutes) for e in self.work_hours}
+
+    @cached_property
+    def total_hours(self) -> float:
+        # rows come in date order, so the last running sum is the month's
+        if not self.work_hours:
+            return 0.0
+        return minutes_to_hours(self.work_hours[-1].running_minutes)
+
+    @cached_property
+    def grid(self) -> dict[int, UserGrid]:
+        # The admin grid only needs times, tag ids and totals, so no model
+        # instances.
+        rows = with_month_totals(
+            WorkHour.objects.filter(
+                date__year=self.year, date__month=self.month, user__in=self.users
+            )
+        ).values_list(*GRID_FIELDS)
+        return build_month_grid(
+            (u.id for u in self.users), len(self.calendar.days), rows.iterator()
+        )
+
+    @cached_property
+    def total_hours_dict(self) -> dict[int, float]:
+        return {user_id: row.total_hours for user_id, row in self.grid.items()}
+
+    @cached_property
+    def machine_logs(self) -> dict[int, list[MachineWorkLog]]:
+        logs: dict[int, list[MachineWorkLog]] = defaultdict(list)
+        for log in MachineWorkLog.objects.select_related("machine").filter(
+            date__year=self.year, date__month=self.month
+        ):
+            logs[log.date.day].append(log)
+        return {d.day: logs[d.day] for d in self.days}
+
+    @cached_property
+    def machine_tokens(self) -> dict[int, str]:
+        return {day: machine_day_token(logs) for day, logs in self.machine_logs.items()}
+
+    def page_context(self, **extra) -> dict:
+        today = date.today()
+        is_current = (self.year, self.month) == (today.year, today.month)
+        return {
+            "month": self.month,
+            "year": self.year,
+            "today_day": today.day if is_current else None,
+            "working_days": self.calendar.working_days,
+            "working_hours": self.calendar.working_hours,
+            "months_list": get_months_list(),
+            "years_list": list(range(today.year - 2, today.year + 3)),
+            "hours_list": HOURS_LIST,
+            "minutes_list": MINUTES_LIST,
+            **extra,
+        }
+
+
+def get_month_context(request: HttpRequest, per_user: bool = False) -> MonthContext:
+    # One loader per (year, month, scope) and request, so decorators and the
+    # view share what has already been fetched.
+    year, month = month_from_request(request)
+    user = cast(User, request.user) if per_user else None
+    key = (year, month, user.pk if user is not None else None)
+    contexts = request.__dict__.setdefault("_month_contexts", {})
+    if key not in contexts:
+        contexts[key] = MonthContext(year, month, user)
+    return contexts[key]
@@ -0,0 +1,161 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Any
+
+from django.contrib.auth.models import User
+from django.db.models import F, Max, Min
+from django.http import HttpRequest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import tenants
+from .archive import is_archived
+from .audit import AuditBuffer, snapshot
+from .constants import MINUTES_LIST
+from .models import AuditEntry, PunchEvent, PunchTerminal, WorkHour
+from .revisions import mark_dates_changed
+
+MAX_BATCH_SIZE = 5000
+
+
+@dataclass
+class PunchIngestResult:
+    accepted: int = 0
+    rejected: list[dict[str, Any]] = field(default_factory=list)
+
+
+def get_terminal(request: HttpRequest) -> PunchTerminal | None:
+    header = request.headers.get("Authorization", "")
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "token" or not token:
+        return None
+    return PunchTerminal.objects.filter(token=token.strip(), is_active=True).first()
+
+
+def round_to_quarter(value: time) -> time:
+    # The dashboards only offer quarter-hour minutes, so punches are stored
+    # on that grid; otherwise the next form save would drop them.
+    step = MINUTES_LIST[1] - MINUTES_LIST[0]
+    minutes = value.hour * 60 + value.minute + (value.second >= 30)
+    minutes = min(round(minutes / step) * step, 24 * 60 - step)
+    return time(minutes // 60, minutes % 60)
+
+
+def _parse_event(
+    raw: Any, users: dict[str, int], terminal: PunchTerminal
+) -> PunchEvent:
+    if not isinstance(raw, dict):
+        raise ValueError("event must be an object")
+
+    user_id = users.get(str(raw.get("user", "")))
+    if user_id is None:
+        raise ValueError("unknown user")
+
+    kind = raw.get("kind")
+    if kind not in (PunchEvent.IN, PunchEvent.OUT):
+        raise ValueError("kind must be 'in' or 'out'")
+
+    timestamp = parse_datetime(str(raw.get("timestamp", "")))
+    if timestamp is None:
+        raise ValueError("invalid timestamp")
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    date_obj = timezone.localtime(timestamp).date()
+    if is_archived(date_obj.year):
+        raise ValueError("year is archived")
+
+    return PunchEvent(
+        user_id=user_id,
+        terminal=terminal,
+        kind=kind,
+        timestamp=timestamp,
+        date=date_obj,
+    )
+
+
+def ingest_punch_events(
+    terminal: PunchTerminal, events: list[Any]
+) -> PunchIngestResult:
+    result = PunchIngestResult()
+
+    usernames = {str(e.get("user", "")) for e in events if isinstance(e, dict)}
+    users = dict(
+        User.objects.filter(username__in=usernames).values_list("username", "id")
+    )
+
+    parsed: list[PunchEvent] = []
+    for index, raw in enumerate(events):
+        try:
+            parsed.append(_parse_event(raw, users, terminal))
+        except ValueError as e:
+            result.rejected.append({"index": index, "error": str(e)})
+
+    if parsed:
+        with tenants.atomic():
+            PunchEvent.objects.bulk_create(parsed)
+            fold_punch_events({(e.user_id, e.date) for e in parsed})
+    result.accepted = len(parsed)
+
+    return result
+
+
+def fold_punch_events(keys: set[tuple[int, date]]) -> None:
+    user_ids = {user_id for user_id, _ in keys}
+    dates = {date_obj for _, date_obj in keys}
+
+    first_in: dict[tuple[int, date], datetime] = {}
+    last_out: dict[tuple[int, date], datetime] = {}
+    rows = (
+        PunchEvent.objects.filter(user_id__in=user_ids, date__in=dates)
+        .values("user_id", "date", "kind")
+        .annotate(first=Min("timestamp"), last=Max("timestamp"))
+    )
+    for row in rows:
+        key = (row["user_id"], row["date"])
+        if key not in keys:
+            continue
+        if row["kind"] == PunchEvent.IN:
+            first_in[key] = row["first"]
+        else:
+            last_out[key] = row["last"]
+
+    existing = {
+        (wh.user_id, wh.date): wh
+        for wh in WorkHour.objects.filter(user_id__in=user_ids, date__in=dates)
+    }
+
+    audit = AuditBuffer(source=AuditEntry.PUNCH)
+    to_update: list[WorkHour] = []
+    to_create: list[WorkHour] = []
+    for key in keys:
+        start = first_in.get(key)
+        end = last_out.get(key)
+        start_time = (
+            round_to_quarter(timezone.localtime(start).time()) if start else None
+        )
+        end_time = round_to_quarter(timezone.localtime(end).time()) if end else None
+
+        wh = existing.get(key)
+        before = None if wh is None else snapshot(wh)
+        if wh is None:
+            wh = WorkHour(user_id=key[0], date=key[1])
+        # Checked against the merged row, as the punches may pair up with a
+        # time already there: a punched end before the start is not applied,
+        # and a kept end that a later punched start overtakes is cleared.
+        if start_time:
+            wh.start_time = start_time
+        if end_time and not (wh.start_time and end_time < wh.start_time):
+            wh.end_time = end_time
+        if wh.start_time and wh.end_time and wh.end_time < wh.start_time:
+            wh.end_time = None
+
+        if before is None:
+            to_create.append(wh)
+        else:
+            wh.version = F("version") + 1
+            to_update.append(wh)
+        audit.work_hour(*key, before, snapshot(wh))
+
+    WorkHour.objects.bulk_update(to_update, ["start_time", "end_time", "version"])
+    WorkHour.objects.bulk_create(to_create)
+    mark_dates_changed(keys)
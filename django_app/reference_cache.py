@@ -0,0 +1,60 @@
+import threading
+import uuid
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+
+from .tenants import current_tenant
+
+T = TypeVar("T")
+
+GENERATION_KEY = "reference_data:generation"
+
+# Reference data (tags, machines, staff) lives in each process; only the
+# generation token is shared, so every worker reloads after a change.
+_entries: dict[Hashable, tuple[str, Any]] = {}
+_local_generation = uuid.uuid4().hex
+_lock = threading.Lock()
+
+
+def _shared_cache() -> BaseCache | None:
+    alias = getattr(settings, "REFERENCE_CACHE_ALIAS", None)
+    return caches[alias] if alias else None
+
+
+def current_generation() -> str:
+    shared = _shared_cache()
+    if shared is None:
+        return _local_generation
+
+    generation = shared.get(GENERATION_KEY)
+    if generation is None:
+        shared.add(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+        generation = shared.get(GENERATION_KEY, _local_generation)
+    return generation
+
+
+def invalidate() -> None:
+    global _local_generation
+    with _lock:
+        _local_generation = uuid.uuid4().hex
+        _entries.clear()
+
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def cached(key: Hashable, loader: Callable[[], T]) -> T:
+    key = (current_tenant(), key)
+    generation = current_generation()
+    entry = _entries.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+
+    value = loader()
+    with _lock:
+        _entries[key] = (generation, value)
+    return value
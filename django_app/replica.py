@@ -0,0 +1,97 @@
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+from .models import ReplicaHeartbeat
+from .tenants import tenant_db
+
+REPLICA_DB = "replica"
+FRESHNESS_CHECK_INTERVAL = 30
+
+_use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
+_last_check: tuple[float, bool] | None = None
+
+
+def replica_configured() -> bool:
+    return REPLICA_DB in settings.DATABASES
+
+
+def touch_heartbeat() -> None:
+    ReplicaHeartbeat.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+        pk=1, defaults={"beat": timezone.now()}
+    )
+
+
+def replica_lag() -> timedelta | None:
+    try:
+        beat = (
+            ReplicaHeartbeat.objects.using(REPLICA_DB)
+            .values_list("beat", flat=True)
+            .first()
+        )
+    except DatabaseError:
+        return None
+    return timezone.now() - beat if beat else None
+
+
+def replica_is_fresh() -> bool:
+    # Checked at most every FRESHNESS_CHECK_INTERVAL seconds per process; a
+    # missing, unreadable or too old replica sends the reads to the primary.
+    global _last_check
+    now = time.monotonic()
+    if _last_check is not None and now - _last_check[0] < FRESHNESS_CHECK_INTERVAL:
+        return _last_check[1]
+
+    lag = replica_lag()
+    fresh = lag is not None and lag <= timedelta(seconds=settings.REPLICA_MAX_STALENESS)
+    _last_check = (now, fresh)
+    return fresh
+
+
+def read_db() -> str:
+    if _use_replica.get() and replica_configured() and replica_is_fresh():
+        return REPLICA_DB
+    return tenant_db()
+
+
+@contextmanager
+def replica_reads():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def reads_from_replica(view: Callable) -> Callable:
+    # For report pages only: views that show what the user has just saved
+    # must keep reading from the primary.
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        db = read_db()
+        return db if db == REPLICA_DB else None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary, never migrated on its own.
+        return False if db == REPLICA_DB else None
@@ -0,0 +1,306 @@
+import calendar
+import csv
+import io
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import chain
+from typing import Any
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Substr, TruncWeek
+
+from .archive import ChainedQuerySets, querysets_for_range
+from .constants import POLISH_MONTHS
+from .expressions import worked_minutes
+from .jobs import job_handler
+from .models import MachineRate, MachineWorkLog, WorkHour
+from .replica import replica_reads
+from .revisions import REFERENCE_KEY, get_revisions, month_key
+from .utils import get_machines
+
+YEARLY_REPORT = "yearly-report"
+
+
+@job_handler(YEARLY_REPORT)
+def yearly_report(params: dict[str, Any]) -> tuple[str, bytes]:
+    year = int(params["year"])
+
+    hours: dict[int, list[float]] = defaultdict(lambda: [0.0] * 12)
+    entries = WorkHour.objects.filter(user__is_staff=False).only(
+        "user_id", "date", "start_time", "end_time"
+    )
+    with replica_reads():
+        for entry in chain.from_iterable(
+            qs.iterator(chunk_size=2000)
+            for qs in querysets_for_range(entries, date(year, 1, 1), date(year, 12, 31))
+        ):
+            hours[entry.user_id][entry.date.month - 1] += entry.total_hours
+
+        usernames = dict(
+            User.objects.filter(id__in=hours).values_list("id", "username")
+        )
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["Pracownik", *(POLISH_MONTHS[m] for m in range(1, 13)), "Razem"])
+    # users removed since are only left in the archive
+    names = {user_id: usernames.get(user_id, f"#{user_id}") for user_id in hours}
+    for user_id, months in sorted(hours.items(), key=lambda i: names[i[0]]):
+        writer.writerow(
+            [
+                names[user_id],
+                *(round(h, 2) for h in months),
+                round(sum(months), 2),
+            ]
+        )
+
+    return f"raport-roczny-{year}.csv", output.getvalue().encode("utf-8-sig")
+
+
+NO_TAG = "(bez tagu)"
+
+
+@dataclass
+class PivotMonth:
+    label: str
+    cells: list[tuple[str, float]] = field(default_factory=list)
+
+
+@dataclass
+class PivotRow:
+    username: str
+    total: float = 0.0
+    months: list[PivotMonth] = field(default_factory=list)
+
+
+@dataclass
+class PivotReport:
+    rows: list[PivotRow]
+    tag_totals: list[tuple[str, float]]
+    total: float
+    cells: int
+
+
+def pivot_report(date_from: date, date_to: date, by_month: bool = False) -> PivotReport:
+    # One grouped query per database returns only the non-empty
+    # (user, tag[, month]) cells, so the work follows the number of cells
+    # rather than users x tags x months.
+    fields = ["user__username", "tag__name"]
+    if by_month:
+        fields.append("month")
+    entries = WorkHour.objects.filter(user__is_staff=False).annotate(
+        month=Substr("date", 1, 7)
+    )
+
+    minutes: dict[tuple, int] = defaultdict(int)
+    for qs in querysets_for_range(entries, date_from, date_to):
+        groups = qs.values_list(*fields).annotate(total=Sum(worked_minutes()))
+        for *key, total in groups.filter(total__gt=0).order_by():
+            minutes[tuple(key)] += total
+
+    rows: dict[str, PivotRow] = {}
+    tag_totals: dict[str, float] = defaultdict(float)
+    for key in sorted(minutes, key=lambda k: (k[0], k[2:], k[1] or "")):
+        username, tag_name = key[0], key[1] or NO_TAG
+        hours = round(minutes[key] / 60, 2)
+        row = rows.setdefault(username, PivotRow(username))
+        label = key[2] if by_month else ""
+        if not row.months or row.months[-1].label != label:
+            row.months.append(PivotMonth(label))
+        row.months[-1].cells.append((tag_name, hours))
+        row.total += hours
+        tag_totals[tag_name] += hours
+
+    for row in rows.values():
+        row.total = round(row.total, 2)
+    return PivotReport(
+        rows=list(rows.values()),
+        tag_totals=[
+            (tag, round(hours, 2)) for tag, hours in sorted(tag_totals.items())
+        ],
+        total=round(sum(tag_totals.values()), 2),
+        cells=len(minutes),
+    )
+
+
+@dataclass
+class TimelineRow:
+    period: date
+    period_end: date
+    hours: float
+    logs: int
+
+
+def machine_timeline(
+    machine_id: int, date_from: date, date_to: date, by_week: bool = False
+) -> tuple[ChainedQuerySets | list[dict[str, Any]], float]:
+    # Daily (or weekly, from Monday) hours of one machine, oldest first, as a
+    # sequence to paginate, plus the total for the whole range. Every query
+    # is a range scan of the (machine, date) index.
+    logs = MachineWorkLog.objects.filter(machine_id=machine_id)
+    periods = []
+    total_minutes = 0
+    for qs in querysets_for_range(logs, date_from, date_to):
+        periods.append(
+            qs.values(period=TruncWeek("date") if by_week else F("date"))
+            .annotate(minutes=Sum(worked_minutes()), logs=Count("id"))
+            .order_by("period")
+        )
+        total_minutes += qs.aggregate(minutes=Sum(worked_minutes()))["minutes"] or 0
+    total_hours = round(total_minutes / 60, 2)
+    if not by_week:
+        return ChainedQuerySets(periods), total_hours
+
+    # The week the archive boundary falls in comes back from both databases
+    # and is added up here; weeks are few enough to read all at once.
+    weeks: dict[date, dict[str, Any]] = {}
+    for row in chain.from_iterable(periods):
+        week = weeks.setdefault(
+            row["period"], {"period": row["period"], "minutes": 0, "logs": 0}
+        )
+        week["minutes"] += row["minutes"] or 0
+        week["logs"] += row["logs"]
+    return list(weeks.values()), total_hours
+
+
+def timeline_row(values: dict[str, Any], by_week: bool) -> TimelineRow:
+    period = values["period"]
+    return TimelineRow(
+        period=period,
+        period_end=period + timedelta(days=6) if by_week else period,
+        hours=round((values["minutes"] or 0) / 60, 2),
+        logs=values["logs"],
+    )
+
+
+BILLING_CACHE_TIMEOUT = 30 * 24 * 3600
+# ten years; longer ranges are cut to this many months
+MAX_BILLING_MONTHS = 120
+CENT = Decimal("0.01")
+
+
+@dataclass
+class BillingRow:
+    machine: str
+    month: str
+    hours: float
+    # logged before the machine's first rate
+    unpriced_hours: float
+    cost: Decimal
+
+
+@dataclass
+class BillingReport:
+    rows: list[BillingRow]
+    hours: float
+    unpriced_hours: float
+    cost: Decimal
+
+
+def rate_in_effect() -> Subquery:
+    # the hourly rate of the log's machine on the log's date
+    return Subquery(
+        MachineRate.objects.filter(
+            machine=OuterRef("machine_id"), valid_from__lte=OuterRef("date")
+        )
+        .order_by("-valid_from")
+        .values("hourly_rate")[:1]
+    )
+
+
+def _billing_months(months: list[date]) -> dict[date, list[tuple]]:
+    # (machine_id, minutes, unpriced minutes, cost) per machine for each month,
+    # from one grouped query per database; minutes times rate is summed in
+    # SQL and only divided into money here.
+    date_to = months[-1].replace(
+        day=calendar.monthrange(months[-1].year, months[-1].month)[1]
+    )
+    by_label: dict[str, list[tuple]] = {f"{m:%Y-%m}": [] for m in months}
+    # the months between that are already cached are left out by label
+    logs = (
+        MachineWorkLog.objects.filter(date__range=(months[0], date_to))
+        .annotate(
+            month=Substr("date", 1, 7), worked=worked_minutes(), rate=rate_in_effect()
+        )
+        .filter(month__in=by_label)
+    )
+    for qs in querysets_for_range(logs, months[0], date_to):
+        groups = (
+            qs.values_list("month", "machine_id")
+            .annotate(
+                minutes=Sum("worked"),
+                unpriced=Sum("worked", filter=Q(rate__isnull=True)),
+                rated=Sum(
+                    F("worked") * F("rate"),
+                    output_field=DecimalField(max_digits=20, decimal_places=4),
+                ),
+            )
+            .order_by()
+        )
+        for label, machine_id, minutes, unpriced, rated in groups:
+            if not minutes:
+                continue
+            cost = ((rated or Decimal(0)) / 60).quantize(CENT)
+            by_label[label].append((machine_id, minutes, unpriced or 0, cost))
+    return {m: by_label[f"{m:%Y-%m}"] for m in months}
+
+
+def billing_months(month_from: date, month_to: date) -> list[date]:
+    # first days of the months from month_from on, at most MAX_BILLING_MONTHS
+    months = []
+    year, month = month_from.year, month_from.month
+    while (year, month) <= (month_to.year, month_to.month):
+        months.append(date(year, month, 1))
+        if len(months) == MAX_BILLING_MONTHS:
+            break
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def machine_billing(month_from: date, month_to: date) -> BillingReport:
+    # Each month is cached under its change marker and the reference marker
+    # (machines, rates), so only months edited since they were last billed
+    # are queried again. The markers are read before the rows: a save in
+    # between leaves newer rows under an older key, never the reverse.
+    months = billing_months(month_from, month_to)
+    revisions = get_revisions(
+        [month_key(m.year, m.month) for m in months] + [REFERENCE_KEY]
+    )
+    reference = revisions.get(REFERENCE_KEY, ("-", None))[0]
+    keys = {
+        m: "machine-billing:{:%Y-%m}:{}:{}".format(
+            m, revisions.get(month_key(m.year, m.month), ("-", None))[0], reference
+        )
+        for m in months
+    }
+    cached = cache.get_many(keys.values())
+    missing = [m for m in months if keys[m] not in cached]
+    if missing:
+        fresh = {keys[m]: groups for m, groups in _billing_months(missing).items()}
+        cache.set_many(fresh, BILLING_CACHE_TIMEOUT)
+        cached.update(fresh)
+
+    # machines deleted since are only left in the archive
+    names = {machine.id: machine.name for machine in get_machines()}
+    rows = [
+        BillingRow(
+            machine=names.get(machine_id, f"#{machine_id}"),
+            month=f"{m:%Y-%m}",
+            hours=round(minutes / 60, 2),
+            unpriced_hours=round(unpriced / 60, 2),
+            cost=cost,
+        )
+        for m in months
+        for machine_id, minutes, unpriced, cost in cached[keys[m]]
+    ]
+    rows.sort(key=lambda r: (r.machine, r.month))
+    return BillingReport(
+        rows=rows,
+        hours=round(sum(r.hours for r in rows), 2),
+        unpriced_hours=round(sum(r.unpriced_hours for r in rows), 2),
+        cost=sum((r.cost for r in rows), Decimal(0)),
+    )
@@ -0,0 +1,86 @@
+import threading
+import uuid
+from collections.abc import Iterable
+from datetime import date, datetime
+
+from django.utils import timezone
+
+from . import tenants
+from .models import MonthRevision
+
+RevisionKey = tuple[int, int, int]
+
+REFERENCE_KEY: RevisionKey = (0, 0, 0)
+
+_pending = threading.local()
+
+
+def month_key(year: int, month: int, user_id: int = 0) -> RevisionKey:
+    return (year, month, user_id)
+
+
+def bump(keys: Iterable[RevisionKey]) -> None:
+    now = timezone.now()
+    MonthRevision.objects.bulk_create(
+        [
+            MonthRevision(
+                year=year,
+                month=month,
+                scope=scope,
+                revision=uuid.uuid4().hex,
+                updated_at=now,
+            )
+            for year, month, scope in set(keys)
+        ],
+        update_conflicts=True,
+        unique_fields=["year", "month", "scope"],
+        update_fields=["revision", "updated_at"],
+    )
+
+
+def _flush_pending() -> None:
+    keys = getattr(_pending, "keys", None)
+    if keys:
+        _pending.keys = set()
+        bump(keys)
+
+
+def mark_changed(keys: Iterable[RevisionKey]) -> None:
+    # Collected per thread and written once when the surrounding transaction
+    # commits, so a save loop touching many rows costs a single upsert.
+    pending = getattr(_pending, "keys", None)
+    if pending is None:
+        pending = _pending.keys = set()
+    pending.update(keys)
+    tenants.on_commit(_flush_pending)
+
+
+def mark_dates_changed(entries: Iterable[tuple[int | None, date]]) -> None:
+    keys: set[RevisionKey] = set()
+    for user_id, date_obj in entries:
+        keys.add(month_key(date_obj.year, date_obj.month))
+        if user_id:
+            keys.add(month_key(date_obj.year, date_obj.month, user_id))
+    if keys:
+        mark_changed(keys)
+
+
+def mark_reference_changed() -> None:
+    mark_changed([REFERENCE_KEY])
+
+
+def get_revisions(
+    keys: Iterable[RevisionKey],
+) -> dict[RevisionKey, tuple[str, datetime]]:
+    keys = set(keys)
+    years = {year for year, _, _ in keys}
+    months = {month for _, month, _ in keys}
+    scopes = {scope for _, _, scope in keys}
+    rows = MonthRevision.objects.filter(
+        year__in=years, month__in=months, scope__in=scopes
+    ).values_list("year", "month", "scope", "revision", "updated_at")
+    return {
+        (year, month, scope): (revision, updated_at)
+        for year, month, scope, revision, updated_at in rows
+        if (year, month, scope) in keys
+    }
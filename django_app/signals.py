@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import reference_cache, revisions, tenants
+from .archive import ARCHIVE_DB, archived_years, copy_rates, is_archived
+from .auth import user_cache_key
+from .models import (
+    ArchivedYear,
+    Machine,
+    MachineRate,
+    MachineWorkLog,
+    WorkHour,
+    WorkTag,
+)
+
+
+@receiver([post_save, post_delete], sender=ArchivedYear)
+@receiver([post_save, post_delete], sender=WorkTag)
+@receiver([post_save, post_delete], sender=Machine)
+@receiver([post_save, post_delete], sender=User)
+def invalidate_reference_data(sender, **kwargs):
+    if kwargs.get("update_fields") == frozenset({"last_login"}):
+        return
+    reference_cache.invalidate()
+    # Again after commit, so no other worker keeps data it re-read in between.
+    tenants.on_commit(reference_cache.invalidate)
+    revisions.mark_reference_changed()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+    tenants.on_commit(lambda: cache.delete(user_cache_key(instance.pk)))
+
+
+@receiver(pre_save, sender=WorkHour)
+@receiver(pre_save, sender=MachineWorkLog)
+def refuse_archived_years(sender, instance, using, **kwargs):
+    # The forms, importers and terminals check this themselves; this also
+    # covers the Django admin and the shell. A row saved here would be
+    # deleted by the next archive run or hide the archived one.
+    if using != ARCHIVE_DB and is_archived(instance.date.year):
+        raise ValueError(f"Year {instance.date.year} is archived.")
+
+
+@receiver([post_save, post_delete], sender=WorkHour)
+def mark_work_hour_changed(sender, instance, **kwargs):
+    revisions.mark_dates_changed([(instance.user_id, instance.date)])
+
+
+@receiver([post_save, post_delete], sender=MachineWorkLog)
+def mark_machine_log_changed(sender, instance, **kwargs):
+    revisions.mark_dates_changed([(None, instance.date)])
+
+
+@receiver([post_save, post_delete], sender=MachineRate)
+def mark_rates_changed(sender, **kwargs):
+    # a rate applies to every month from valid_from on, so all cached
+    # billing is dropped
+    revisions.mark_reference_changed()
+    if archived_years():
+        tenants.on_commit(copy_rates)
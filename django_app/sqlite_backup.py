@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULT_STEP_PAGES = 512
+DEFAULT_PAUSE = 0.005
+DEFAULT_MAX_RESTARTS = 5
+# rounds of ever larger steps before giving up on a busy database
+MAX_ROUNDS = 4
+STEP_GROWTH = 4
+
+
+class BackupError(RuntimeError):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+@dataclass
+class BackupStats:
+    pages: int = 0
+    page_size: int = 0
+    steps: int = 0
+    restarts: int = 0
+    seconds: float = 0.0
+    longest_step: float = 0.0
+    # of the round that finished
+    step_pages: int = 0
+
+    @property
+    def size(self) -> int:
+        return self.pages * self.page_size
+
+    @property
+    def throughput(self) -> float:
+        # bytes per second, pauses included
+        return self.size / self.seconds if self.seconds else 0.0
+
+
+def backup_database(
+    target: Path,
+    alias: str = DEFAULT_DB_ALIAS,
+    step_pages: int = DEFAULT_STEP_PAGES,
+    pause: float = DEFAULT_PAUSE,
+    journal_mode: str | None = None,
+    max_restarts: int = DEFAULT_MAX_RESTARTS,
+) -> BackupStats:
+    # SQLite online backup in steps of step_pages pages. The source is only
+    # locked while a step runs, and writers get the pause between steps, so
+    # the longest step is the longest a writer can have been kept waiting.
+    # The copy is written next to the target, checked with integrity_check
+    # and only then moved into place.
+    # Every write from another connection makes SQLite start the copy over,
+    # so under a steady stream of writes the steps would never finish; after
+    # max_restarts the copy starts again with STEP_GROWTH times larger steps
+    # (fewer pauses for writes to land in), and after MAX_ROUNDS it fails
+    # rather than lock writers out for a copy in one pass.
+    source_name = connections[alias].settings_dict["NAME"]
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    stats = BackupStats()
+    remaining_before: int | None = None
+    round_restarts = 0
+    step_started = started = time.perf_counter()
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        nonlocal remaining_before, round_restarts, step_started
+        stats.longest_step = max(stats.longest_step, time.perf_counter() - step_started)
+        stats.steps += 1
+        # a step that got through copies pages, so no progress means the copy
+        # started over (a busy step is retried and reported too)
+        if (
+            status == sqlite3.SQLITE_OK
+            and remaining_before is not None
+            and remaining >= remaining_before
+        ):
+            stats.restarts += 1
+            round_restarts += 1
+            if round_restarts > max_restarts:
+                raise _TooManyRestarts
+        remaining_before = remaining
+        if remaining:
+            time.sleep(pause)
+        step_started = time.perf_counter()
+
+    try:
+        with (
+            closing(sqlite3.connect(source_name, uri=True)) as source,
+            closing(sqlite3.connect(tmp)) as copy,
+        ):
+            stats.step_pages = step_pages
+            for _ in range(MAX_ROUNDS):
+                remaining_before, round_restarts = None, 0
+                step_started = time.perf_counter()
+                try:
+                    source.backup(copy, pages=stats.step_pages, progress=progress)
+                    break
+                except _TooManyRestarts:
+                    stats.step_pages *= STEP_GROWTH
+            else:
+                raise BackupError(
+                    "the database kept changing during the copy "
+                    f"({stats.restarts} restarts), try again when it is quieter"
+                )
+            stats.seconds = time.perf_counter() - started
+            stats.pages = copy.execute("PRAGMA page_count").fetchone()[0]
+            stats.page_size = copy.execute("PRAGMA page_size").fetchone()[0]
+            if journal_mode:
+                copy.execute(f"PRAGMA journal_mode={journal_mode}")
+            result = [row[0] for row in copy.execute("PRAGMA integrity_check")]
+            if result != ["ok"]:
+                raise BackupError(f"integrity_check failed: {'; '.join(result[:5])}")
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp, target)
+    return stats
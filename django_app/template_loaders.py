@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.template.loaders.app_directories import Loader as AppDirectoriesLoader
+
+from .compression import minify_html
+
+
+class MinifyingLoader(AppDirectoriesLoader):
+    # Strips the indentation from the template source once, when it is
+    # compiled, so the nested grid loops stop repeating it in every response.
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if getattr(settings, "MINIFY_HTML", True):
+            return minify_html(contents)
+        return contents
@@ -0,0 +1,90 @@
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import Http404, HttpRequest, HttpResponse
+from django.http.request import split_domain_port
+
+# Multi-tenant mode (settings.TENANT_HOSTS): every company has its own SQLite
+# database, picked by host name for requests and by the TENANT environment
+# variable for management commands. Outside tenant mode nothing here changes
+# where queries go.
+
+_tenant: ContextVar[str | None] = ContextVar("tenant", default=None)
+
+
+def current_tenant() -> str | None:
+    return _tenant.get() or getattr(settings, "TENANT", None)
+
+
+def tenant_db() -> str:
+    tenant = current_tenant()
+    if tenant is None:
+        return DEFAULT_DB_ALIAS
+    return settings.TENANT_DATABASES[tenant]
+
+
+@contextmanager
+def using_tenant(tenant: str | None):
+    token = _tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def atomic(func: Callable | None = None):
+    # transaction.atomic() on the current tenant's database; the plain one
+    # would only ever wrap the default database.
+    if func is None:
+        return transaction.atomic(using=tenant_db())
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with transaction.atomic(using=tenant_db()):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def on_commit(func: Callable[[], object]) -> None:
+    transaction.on_commit(func, using=tenant_db())
+
+
+def make_cache_key(key: str, key_prefix: str, version: int) -> str:
+    # Django's default key, prefixed with the tenant so companies sharing a
+    # cache backend never read each other's sessions, users or revisions.
+    tenant = current_tenant()
+    if tenant is None:
+        return f"{key_prefix}:{version}:{key}"
+    return f"{tenant}:{key_prefix}:{version}:{key}"
+
+
+class TenantMiddleware:
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not settings.TENANT_HOSTS:
+            return self.get_response(request)
+
+        host, _ = split_domain_port(request.get_host())
+        tenant = settings.TENANT_HOSTS.get(host)
+        if tenant is None:
+            raise Http404("Nieznana firma.")
+        with using_tenant(tenant):
+            return self.get_response(request)
+
+
+class TenantRouter:
+    # Everything, reads and writes, goes to the tenant's database while a
+    # tenant is active; the archive and the replica are off in tenant mode.
+    def db_for_read(self, model, **hints):
+        tenant = current_tenant()
+        return settings.TENANT_DATABASES[tenant] if tenant else None
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
@@ -162,25 +162,62 @@ class AdminDashboardTests(TestCase):
         response = self.client.get(self.url + self.base_qs)
         self.assertEqual(response.status_code, 200)
 
-        entries_dict = response.context["entries_dict"]
+        grid = response.context["grid"]
         total_hours_dict = response.context["total_hours_dict"]
 
-        self.assertIn(self.u1.id, entries_dict)
-        self.assertIn(self.u2.id, entries_dict)
-        self.assertIn(5, entries_dict[self.u1.id])
-        self.assertIn(6, entries_dict[self.u1.id])
-        self.assertIn(5, entries_dict[self.u2.id])
-
-        e1 = entries_dict[self.u1.id][5]
-        self.assertEqual(e1.start_time, time(8, 0))
-        self.assertEqual(e1.end_time, time(12, 0))
-        self.assertEqual(e1.tag, self.static_tag)
-
-        e2 = entries_dict[self.u1.id][6]
+        self.assertIn(self.u1.id, grid)
+        self.assertIn(self.u2.id, grid)
+        self.assertIn(5, grid[self.u1.id])
+        self.assertIn(6, grid[self.u1.id])
+        self.assertIn(5, grid[self.u2.id])
+        self.assertNotIn(7, grid[self.u1.id])
+        self.assertIsNone(grid[self.u1.id].get(7))
+
+        e1 = grid[self.u1.id][5]
+        self.assertEqual((e1.start_hour, e1.start_minute), (8, 0))
+        self.assertEqual((e1.end_hour, e1.end_minute), (12, 0))
+        self.assertEqual(e1.tag_id, self.static_tag.id)
+        self.assertTrue(e1.filled)
+
+        e2 = grid[self.u1.id][6]
         self.assertEqual(e2.total_hours, 2.5)
 
-        e3 = entries_dict[self.u2.id][5]
+        e3 = grid[self.u2.id][5]
         self.assertEqual(e3.total_hours, 4.5)
 
         self.assertAlmostEqual(total_hours_dict[self.u1.id], 4 + 2.5)
         self.assertAlmostEqual(total_hours_dict[self.u2.id], 4.5)
+
+    def test_grid_renders_saved_values(self):
+        WorkHour.objects.create(
+            user=self.u1,
+            date=date(2025, 1, 7),
+            start_time=time(22, 15),
+            end_time=time(6, 0),
+            tag=self.normal_tag,
+        )
+
+        response = self.client.get(self.url + self.base_qs)
+
+        self.assertEqual(response.context["grid"][self.u1.id][7].total_hours, 7.75)
+        self.assertAlmostEqual(response.context["total_hours_dict"][self.u1.id], 7.75)
+        content = response.content.decode()
+        name = self.p(self.u1, 7, "start_hour")
+        select = content[content.index(f'name="{name}"') :]
+        select = select[: select.index("</select>")]
+        self.assertRegex(select, r'value="22"\s+selected')
+
+    def test_grid_renders_start_of_open_day(self):
+        # clocked in, not out yet
+        WorkHour.objects.create(user=self.u1, date=date(2025, 1, 8), start_time=time(7))
+
+        response = self.client.get(self.url + self.base_qs)
+
+        cell = response.context["grid"][self.u1.id][8]
+        self.assertEqual((cell.start_hour, cell.start_minute), (7, 0))
+        self.assertEqual((cell.end_hour, cell.total_hours), (None, 0.0))
+        content = response.content.decode()
+        name = self.p(self.u1, 8, "start_hour")
+        select = content[content.index(f'name="{name}"') :]
+        select = select[: select.index("</select>")]
+        self.assertRegex(select, r'value="7"\s+selected')
@@ -0,0 +1,114 @@
+import io
+import tempfile
+import unittest
+from collections import defaultdict
+from datetime import date, time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from django_app.analytics import group_hours, load_snapshot, np
+from django_app.models import Machine, MachineWorkLog, WorkHour, WorkTag
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class AnalyticsSnapshotTests(TestCase):
+    def setUp(self):
+        self.jan = User.objects.create_user(username="jan")
+        self.ola = User.objects.create_user(username="ola")
+        self.budowa = WorkTag.objects.create(name="Budowa", month=1, year=2025)
+        self.urlop = WorkTag.objects.create(name="Urlop", is_static=True)
+        self.tokarka = Machine.objects.create(name="Tokarka")
+
+        rows = [
+            (self.jan, date(2024, 12, 30), time(8, 0), time(16, 30), self.budowa),
+            (self.jan, date(2025, 1, 2), time(7, 15), time(15, 0), self.budowa),
+            (self.jan, date(2025, 1, 3), None, None, self.urlop),
+            (self.ola, date(2025, 1, 2), time(22, 0), time(6, 0), None),
+            (self.ola, date(2025, 1, 7), time(6, 0), time(14, 45), self.budowa),
+        ]
+        for user, day, start, end, tag in rows:
+            WorkHour.objects.create(
+                user=user, date=day, start_time=start, end_time=end, tag=tag
+            )
+        for day, start, end in [
+            (date(2025, 1, 2), time(6, 0), time(10, 0)),
+            (date(2025, 1, 2), time(12, 0), time(13, 30)),
+        ]:
+            MachineWorkLog.objects.create(
+                machine=self.tokarka, date=day, start_time=start, end_time=end
+            )
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "snapshot"
+        call_command("export_analytics", output=self.path, stdout=io.StringIO())
+        self.snapshot = load_snapshot(self.path)
+
+    def test_columns_are_memory_mapped(self):
+        self.assertIsInstance(self.snapshot.work_hours["minutes"], np.memmap)
+        self.assertEqual(len(self.snapshot.work_hours["day"]), 5)
+
+    def test_matches_orm_totals_per_user_and_tag(self):
+        expected: dict[tuple, float] = defaultdict(float)
+        for wh in WorkHour.objects.select_related("user", "tag"):
+            key = (wh.user.username, wh.tag.name if wh.tag else "")
+            expected[key] += wh.total_hours
+
+        result = group_hours(self.snapshot, ["user", "tag"])
+
+        self.assertEqual(result.keys(), expected.keys())
+        for key, hours in expected.items():
+            self.assertAlmostEqual(result[key], hours, places=2)
+
+    def test_month_tags_of_one_name_are_added_up(self):
+        february = WorkTag.objects.create(name="Budowa", month=2, year=2025)
+        WorkHour.objects.create(
+            user=self.jan,
+            date=date(2025, 2, 3),
+            start_time=time(8, 0),
+            end_time=time(12, 0),
+            tag=february,
+        )
+        call_command("export_analytics", output=self.path, stdout=io.StringIO())
+
+        result = group_hours(load_snapshot(self.path), ["user", "tag"])
+
+        expected = sum(
+            wh.total_hours
+            for wh in WorkHour.objects.filter(user=self.jan, tag__name="Budowa")
+        )
+        self.assertAlmostEqual(result[("jan", "Budowa")], expected, places=2)
+        self.assertAlmostEqual(expected, 8.5 + 7.75 + 4)
+
+    def test_weeks_start_on_monday(self):
+        result = group_hours(self.snapshot, ["week", "user"])
+
+        self.assertAlmostEqual(result[(date(2024, 12, 30), "jan")], 16.25)
+        self.assertAlmostEqual(result[(date(2024, 12, 30), "ola")], 8.0)
+        self.assertAlmostEqual(result[(date(2025, 1, 6), "ola")], 8.75)
+
+    def test_date_range_and_months(self):
+        result = group_hours(self.snapshot, ["month"], date_from=date(2025, 1, 1))
+
+        self.assertEqual(result, {(date(2025, 1, 1),): 24.5})
+
+    def test_machine_logs(self):
+        result = group_hours(self.snapshot, ["machine", "day"], machines=True)
+
+        self.assertEqual(result, {("Tokarka", date(2025, 1, 2)): 5.5})
+
+    def test_rejects_dimension_of_other_table(self):
+        with self.assertRaises(ValueError):
+            group_hours(self.snapshot, ["machine"])
+
+    def test_export_replaces_previous_snapshot(self):
+        WorkHour.objects.all().delete()
+        call_command("export_analytics", output=self.path, stdout=io.StringIO())
+
+        self.assertEqual(group_hours(load_snapshot(self.path), []), {(): 0.0})
+        self.assertEqual(
+            sorted(p.name for p in self.path.parent.iterdir()), ["snapshot"]
+        )
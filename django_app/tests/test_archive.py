@@ -0,0 +1,192 @@
+import io
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.archive import ARCHIVE_DB, querysets_for_range
+from django_app.importers import import_work_hours
+from django_app.models import (
+    ArchivedYear,
+    Machine,
+    MachineRate,
+    MachineWorkLog,
+    WorkHour,
+    WorkTag,
+)
+from django_app.reports import machine_billing
+
+OLD_YEAR = date.today().year - 3
+
+
+class ArchiveTests(TestCase):
+    databases = {"default", ARCHIVE_DB}
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.client.login(username="admin", password="pass")
+        self.jan = User.objects.create_user(username="jan", password="pass")
+        self.tag = WorkTag.objects.create(name="Urlop", is_static=True)
+        self.machine = Machine.objects.create(name="Tokarka")
+
+        for year in (OLD_YEAR, OLD_YEAR + 1):
+            WorkHour.objects.create(
+                user=self.jan,
+                date=date(year, 12, 30),
+                start_time=time(8, 0),
+                end_time=time(16, 0),
+                tag=self.tag,
+            )
+        MachineWorkLog.objects.create(
+            machine=self.machine,
+            date=date(OLD_YEAR, 12, 30),
+            start_time=time(6, 0),
+            end_time=time(10, 0),
+        )
+
+    def archive(self, *years):
+        call_command("archive_years", *map(str, years), stdout=io.StringIO())
+
+    def test_moves_rows_to_archive(self):
+        self.archive(OLD_YEAR)
+
+        self.assertFalse(WorkHour.objects.filter(date__year=OLD_YEAR).exists())
+        self.assertTrue(WorkHour.objects.filter(date__year=OLD_YEAR + 1).exists())
+        archived = WorkHour.objects.using(ARCHIVE_DB).get()
+        self.assertEqual(
+            (archived.user_id, archived.tag_id), (self.jan.id, self.tag.id)
+        )
+        self.assertEqual(MachineWorkLog.objects.using(ARCHIVE_DB).count(), 1)
+
+        year = ArchivedYear.objects.get()
+        self.assertEqual(
+            (year.year, year.work_hours, year.machine_logs), (OLD_YEAR, 1, 1)
+        )
+        # users are copied without a usable password
+        self.assertFalse(
+            User.objects.using(ARCHIVE_DB).get(id=self.jan.id).has_usable_password()
+        )
+
+    def test_archiving_twice_is_harmless(self):
+        self.archive(OLD_YEAR)
+        self.archive(OLD_YEAR)
+
+        self.assertEqual(WorkHour.objects.using(ARCHIVE_DB).count(), 1)
+        self.assertEqual(ArchivedYear.objects.count(), 1)
+
+    def test_refuses_open_years(self):
+        with self.assertRaises(CommandError):
+            self.archive(date.today().year)
+
+    def test_month_views_read_from_archive(self):
+        self.archive(OLD_YEAR)
+        qs = f"?year={OLD_YEAR}&month=12"
+
+        response = self.client.get(reverse("dashboard") + qs)
+        self.assertEqual(response.context["grid"][self.jan.id][30].total_hours, 8.0)
+
+        response = self.client.get(reverse("machines-report") + qs)
+        self.assertEqual(len(response.context["logs_dict"][30]), 1)
+
+        response = self.client.get(reverse("monthly-report") + qs)
+        self.assertEqual(response.context["tag_hours"], [("Urlop", 8.0)])
+
+    def test_archived_month_is_read_only(self):
+        self.archive(OLD_YEAR)
+        url = reverse("dashboard") + f"?year={OLD_YEAR}&month=12"
+        payload = {
+            f"user_{self.jan.id}_day_2_start_hour": "08",
+            f"user_{self.jan.id}_day_2_start_minute": "00",
+            f"user_{self.jan.id}_day_2_end_hour": "12",
+            f"user_{self.jan.id}_day_2_end_minute": "00",
+        }
+
+        response = self.client.post(url, payload, follow=True)
+
+        self.assertContains(response, "zarchiwizowany")
+        self.assertFalse(WorkHour.objects.filter(date__year=OLD_YEAR).exists())
+
+    def test_range_across_archive_boundary(self):
+        self.archive(OLD_YEAR)
+
+        querysets = querysets_for_range(
+            WorkHour.objects.all(), date(OLD_YEAR, 12, 1), date(OLD_YEAR + 1, 12, 31)
+        )
+
+        self.assertEqual(
+            sorted(wh.date.year for qs in querysets for wh in qs),
+            [OLD_YEAR, OLD_YEAR + 1],
+        )
+
+    def test_import_rejects_archived_year(self):
+        self.archive(OLD_YEAR)
+        csv_data = (
+            "username,date,start_time,end_time,tag\n"
+            f"jan,{OLD_YEAR}-05-05,08:00,16:00,\n"
+        )
+
+        result = import_work_hours(io.StringIO(csv_data))
+
+        self.assertEqual(result.rejected, 1)
+        self.assertIn("zarchiwizowany", result.errors[0][1])
+
+    def test_rerun_overwrites_stale_archive_rows(self):
+        # an interrupted run left copies behind, and the rows were edited
+        # (or deleted and entered again) before the next run
+        hour = WorkHour.objects.get(date__year=OLD_YEAR)
+        log = MachineWorkLog.objects.get()
+        call_command("migrate", database=ARCHIVE_DB, verbosity=0)
+        User.objects.using(ARCHIVE_DB).bulk_create([User(id=self.jan.id)])
+        Machine.objects.using(ARCHIVE_DB).bulk_create([Machine(id=self.machine.id)])
+        WorkHour.objects.using(ARCHIVE_DB).bulk_create(
+            [WorkHour(user=self.jan, date=hour.date, start_time=time(7, 0))]
+        )
+        MachineWorkLog.objects.using(ARCHIVE_DB).bulk_create(
+            [MachineWorkLog(id=log.id, machine=self.machine, date=log.date)]
+        )
+
+        self.archive(OLD_YEAR)
+
+        archived = WorkHour.objects.using(ARCHIVE_DB).get()
+        self.assertEqual(
+            (archived.id, archived.start_time, archived.end_time),
+            (hour.id, time(8, 0), time(16, 0)),
+        )
+        self.assertEqual(
+            MachineWorkLog.objects.using(ARCHIVE_DB).get().end_time, time(10, 0)
+        )
+
+    def test_saves_to_archived_year_are_refused(self):
+        self.archive(OLD_YEAR)
+
+        with self.assertRaises(ValueError):
+            WorkHour.objects.create(user=self.jan, date=date(OLD_YEAR, 5, 5))
+        self.assertFalse(WorkHour.objects.filter(date__year=OLD_YEAR).exists())
+
+        self.admin.is_superuser = True
+        self.admin.save()
+        response = self.client.post(
+            reverse("admin:django_app_workhour_add"),
+            {"user": self.jan.id, "date": f"{OLD_YEAR}-05-05"},
+        )
+        self.assertContains(response, "zarchiwizowany")
+
+    def test_rate_changes_reach_archived_months(self):
+        self.archive(OLD_YEAR)
+        december = date(OLD_YEAR, 12, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rate = MachineRate.objects.create(
+                machine=self.machine, valid_from=date(OLD_YEAR, 1, 1), hourly_rate=100
+            )
+        self.assertEqual(machine_billing(december, december).cost, 400)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rate.delete()
+        self.assertEqual(machine_billing(december, december).cost, 0)
+        self.assertFalse(MachineRate.objects.using(ARCHIVE_DB).exists())
@@ -0,0 +1,193 @@
+import io
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.audit import AuditBuffer
+from django_app.importers import import_work_hours
+from django_app.models import AuditEntry, Machine, MachineWorkLog, WorkHour, WorkTag
+
+
+class AuditLogTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.client.login(username="admin", password="pass")
+        self.u1 = User.objects.create_user(username="jan", password="pass")
+        self.u2 = User.objects.create_user(username="ola", password="pass")
+        self.tag = WorkTag.objects.create(name="Urlop", is_static=True)
+        self.url = reverse("dashboard") + "?year=2025&month=1"
+
+    def test_admin_save_records_changed_cells_once_committed(self):
+        WorkHour.objects.create(
+            user=self.u1,
+            date=date(2025, 1, 2),
+            start_time=time(8, 0),
+            end_time=time(12, 0),
+        )
+        WorkHour.objects.create(
+            user=self.u2,
+            date=date(2025, 1, 2),
+            start_time=time(8, 0),
+            end_time=time(12, 0),
+        )
+        payload = {
+            f"user_{self.u1.id}_day_2_start_hour": "08",
+            f"user_{self.u1.id}_day_2_start_minute": "00",
+            f"user_{self.u1.id}_day_2_end_hour": "16",
+            f"user_{self.u1.id}_day_2_end_minute": "00",
+            f"user_{self.u2.id}_day_2_start_hour": "08",
+            f"user_{self.u2.id}_day_2_start_minute": "00",
+            f"user_{self.u2.id}_day_2_end_hour": "12",
+            f"user_{self.u2.id}_day_2_end_minute": "00",
+            f"user_{self.u2.id}_day_3_tag": str(self.tag.id),
+        }
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(self.url, payload)
+        self.assertFalse(AuditEntry.objects.exists())
+
+        for callback in callbacks:
+            callback()
+
+        update = AuditEntry.objects.get(user=self.u1)
+        self.assertEqual(update.action, AuditEntry.UPDATE)
+        self.assertEqual(update.editor, self.admin)
+        self.assertEqual(update.before["end_time"], "12:00")
+        self.assertEqual(update.after["end_time"], "16:00")
+
+        # the unchanged cell of ola is not recorded, only the new tag
+        create = AuditEntry.objects.get(user=self.u2)
+        self.assertEqual(create.action, AuditEntry.CREATE)
+        self.assertEqual(create.date, date(2025, 1, 3))
+        self.assertIsNone(create.before)
+        self.assertEqual(create.after["tag"], self.tag.id)
+
+    def test_user_save_records_own_entry(self):
+        self.client.login(username="jan", password="pass")
+        today = date.today()
+        payload = {
+            f"start_hour_{today.day}": "07",
+            f"start_minute_{today.day}": "00",
+            f"end_hour_{today.day}": "15",
+            f"end_minute_{today.day}": "00",
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("dashboard"), payload)
+
+        entry = AuditEntry.objects.get()
+        self.assertEqual(entry.editor, self.u1)
+        self.assertEqual(entry.user, self.u1)
+        self.assertEqual(
+            entry.after, {"start_time": "07:00", "end_time": "15:00", "tag": None}
+        )
+
+    def test_machine_save_records_only_replaced_logs(self):
+        m1 = Machine.objects.create(name="Tokarka")
+        m2 = Machine.objects.create(name="Frezarka")
+        for machine in (m1, m2):
+            MachineWorkLog.objects.create(
+                machine=machine,
+                date=date(2025, 1, 10),
+                start_time=time(6, 0),
+                end_time=time(10, 0),
+            )
+        payload = {"day_10_count": 2}
+        for i, (machine, end_hour) in enumerate(((m1, "10"), (m2, "14"))):
+            payload[f"day_10_machine_{i}"] = machine.id
+            payload[f"day_10_start_hour_{i}"] = "06"
+            payload[f"day_10_start_minute_{i}"] = "00"
+            payload[f"day_10_end_hour_{i}"] = end_hour
+            payload[f"day_10_end_minute_{i}"] = "00"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("machines-report") + "?year=2025&month=1", payload)
+
+        entries = AuditEntry.objects.filter(machine=m2)
+        self.assertEqual(
+            sorted((e.action, (e.before or e.after)["end_time"]) for e in entries),
+            [(AuditEntry.CREATE, "14:00"), (AuditEntry.DELETE, "10:00")],
+        )
+        self.assertFalse(AuditEntry.objects.filter(machine=m1).exists())
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    AuditBuffer(editor=self.admin).work_hour(
+                        self.u1.id, date(2025, 1, 2), None, {"start_time": "08:00"}
+                    )
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(AuditEntry.objects.exists())
+
+    def test_import_records_source(self):
+        csv_data = (
+            "username,date,start_time,end_time,tag\njan,2025-01-02,07:00,15:00,\n"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            import_work_hours(io.StringIO(csv_data), editor=self.admin)
+
+        entry = AuditEntry.objects.get()
+        self.assertEqual(entry.source, AuditEntry.IMPORT)
+        self.assertEqual(entry.editor, self.admin)
+
+    def test_view_filters_by_user_and_date(self):
+        AuditEntry.objects.bulk_create(
+            [
+                AuditEntry(
+                    editor=self.admin,
+                    action=AuditEntry.CREATE,
+                    user=user,
+                    date=day,
+                    after={"start_time": "08:00", "end_time": "16:00"},
+                )
+                for user in (self.u1, self.u2)
+                for day in (date(2025, 1, 2), date(2025, 2, 2))
+            ]
+        )
+        response = self.client.get(
+            reverse("audit-log"),
+            {"user": self.u1.id, "date_from": "2025-01-01", "date_to": "2025-01-31"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        entries = list(response.context["page"].object_list)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(
+            (entries[0].user, entries[0].date), (self.u1, date(2025, 1, 2))
+        )
+
+    def test_view_ignores_impossible_dates(self):
+        AuditEntry.objects.create(
+            editor=self.admin,
+            action=AuditEntry.CREATE,
+            user=self.u1,
+            date=date(2025, 2, 2),
+        )
+
+        response = self.client.get(
+            reverse("audit-log"), {"date_from": "2025-02-01", "date_to": "2025-02-30"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["page"].object_list), 1)
+
+    def test_editor_and_date_filter_uses_index(self):
+        index = next(
+            i.name for i in AuditEntry._meta.indexes if i.fields == ["editor", "date"]
+        )
+        plan = AuditEntry.objects.filter(
+            editor=self.admin, date__range=(date(2025, 1, 1), date(2025, 1, 31))
+        ).explain()
+
+        self.assertIn(index, plan)
+
+    def test_view_requires_staff(self):
+        self.client.login(username="jan", password="pass")
+        response = self.client.get(reverse("audit-log"))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,99 @@
+import io
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import date, time
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase
+
+from django_app import sqlite_backup
+from django_app.models import WorkHour
+from django_app.sqlite_backup import BackupError, backup_database
+
+
+class BackupTests(TransactionTestCase):
+    # The backup reads the database from its own connection, which a
+    # TestCase would keep locked in its open transaction.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        user = User.objects.create_user(username="jan")
+        WorkHour.objects.bulk_create(
+            WorkHour(
+                user=user,
+                date=date(2025, 1, day),
+                start_time=time(8),
+                end_time=time(16),
+            )
+            for day in range(1, 32)
+        )
+
+    def test_stepped_backup(self):
+        target = self.dir / "copy.sqlite3"
+
+        stats = backup_database(target, step_pages=4, pause=0)
+
+        self.assertGreater(stats.steps, 1)
+        self.assertEqual(stats.size, target.stat().st_size)
+        self.assertLessEqual(stats.longest_step, stats.seconds)
+        with closing(sqlite3.connect(target)) as db:
+            self.assertEqual(
+                db.execute("SELECT COUNT(*) FROM django_app_workhour").fetchone(),
+                (31,),
+            )
+        self.assertFalse((self.dir / "copy.sqlite3.tmp").exists())
+
+    def busy_backup(self, writes: int):
+        # a file database written to from another connection between steps,
+        # which makes SQLite start the copy over
+        source = self.dir / "busy.sqlite3"
+        with closing(sqlite3.connect(source)) as db:
+            db.execute("CREATE TABLE t (x)")
+            db.executemany("INSERT INTO t VALUES (?)", [("x" * 1000,)] * 2000)
+            db.commit()
+        writer = sqlite3.connect(source)
+        self.addCleanup(writer.close)
+
+        def write(seconds):
+            nonlocal writes
+            if writes:
+                writes -= 1
+                writer.execute("INSERT INTO t VALUES ('y')")
+                writer.commit()
+
+        with (
+            mock.patch.dict(connections["default"].settings_dict, NAME=str(source)),
+            mock.patch.object(sqlite_backup.time, "sleep", side_effect=write),
+        ):
+            return backup_database(self.dir / "copy.sqlite3", step_pages=1, pause=0)
+
+    def test_larger_steps_after_restarts(self):
+        stats = self.busy_backup(writes=sqlite_backup.DEFAULT_MAX_RESTARTS + 1)
+
+        self.assertEqual(stats.restarts, sqlite_backup.DEFAULT_MAX_RESTARTS + 1)
+        self.assertEqual(stats.step_pages, sqlite_backup.STEP_GROWTH)
+        self.assertTrue((self.dir / "copy.sqlite3").exists())
+
+    def test_fails_when_every_round_is_overtaken(self):
+        with self.assertRaises(BackupError):
+            self.busy_backup(writes=10**6)
+
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ["busy.sqlite3"])
+
+    def test_command_rotates_backups(self):
+        for i in range(3):
+            (self.dir / f"default-2020010{i}-000000.sqlite3").write_bytes(b"")
+
+        out = io.StringIO()
+        call_command("backup_db", dir=self.dir, keep=2, stdout=out)
+
+        backups = sorted(p.name for p in self.dir.iterdir())
+        self.assertEqual(len(backups), 2)
+        self.assertEqual(backups[0], "default-20200102-000000.sqlite3")
+        self.assertIn("worst writer stall", out.getvalue())
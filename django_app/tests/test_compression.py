@@ -0,0 +1,63 @@
+import gzip
+from unittest import skipIf
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.compression import brotli, minify_html
+
+
+class MinifyHtmlTests(TestCase):
+    def test_collapses_indentation(self):
+        html = (
+            "<select>\n"
+            '    <option value="4"\n'
+            "            selected>\n"
+            "        04\n"
+            "    </option>\n"
+            "</select>"
+        )
+        self.assertEqual(
+            minify_html(html),
+            '<select>\n<option value="4"\nselected>\n04\n</option>\n</select>',
+        )
+
+    def test_keeps_inline_whitespace(self):
+        self.assertEqual(minify_html("<p>Suma:  8 h</p>"), "<p>Suma:  8 h</p>")
+
+    def test_grid_page_is_minified(self):
+        User.objects.create_user(username="admin", password="pass", is_staff=True)
+        self.client.login(username="admin", password="pass")
+        response = self.client.get(reverse("dashboard"))
+        self.assertNotIn(b"\n    ", response.content)
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="admin", password="pass", is_staff=True)
+        User.objects.create_user(username="jan", password="pass")
+        self.client.login(username="admin", password="pass")
+        self.url = reverse("dashboard") + "?year=2025&month=1"
+        self.client.get(self.url)
+
+    def test_gzip(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn(b"Raport godzinowy", gzip.decompress(response.content))
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+
+    @skipIf(brotli is None, "brotli is not installed")
+    def test_brotli(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response.headers["Content-Encoding"], "br")
+        self.assertIn(b"Raport godzinowy", brotli.decompress(response.content))
+        self.assertTrue(response.headers["ETag"].startswith('W/"'))
+
+    def test_weak_etag_still_matches(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        etag = response.headers["ETag"]
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,84 @@
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.models import WorkHour, WorkTag
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username="jan", password="pass")
+            self.other = User.objects.create_user(username="ola", password="pass")
+        self.client.login(username="jan", password="pass")
+        self.url = reverse("dashboard") + "?year=2025&month=1"
+        # First render sets the CSRF cookie, which is part of the validator.
+        self.client.get(self.url)
+
+    def get_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.headers["ETag"]
+
+    def test_not_modified(self):
+        etag = self.get_etag()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+
+    def test_not_modified_skips_page_queries(self):
+        etag = self.get_etag()
+        # session and user come from the cache; only the change markers
+        with self.assertNumQueries(1):
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_own_change_invalidates(self):
+        etag = self.get_etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkHour.objects.create(
+                user=self.user,
+                date=date(2025, 1, 2),
+                start_time=time(8, 0),
+                end_time=time(12, 0),
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_users_change_keeps_page(self):
+        etag = self.get_etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkHour.objects.create(
+                user=self.other,
+                date=date(2025, 1, 2),
+                start_time=time(8, 0),
+                end_time=time(12, 0),
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_tag_change_invalidates(self):
+        etag = self.get_etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkTag.objects.create(name="Budowa", month=1, year=2025)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_flash_messages_are_never_cached(self):
+        etag = self.get_etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Dane zapisano")
+        self.assertNotIn("ETag", response.headers)
+        self.assertIn("no-store", response.headers["Cache-Control"])
+
+    def test_other_viewer_gets_full_page(self):
+        etag = self.get_etag()
+        self.client.login(username="ola", password="pass")
+        self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,202 @@
+import io
+import json
+import tempfile
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from django_app.consistency import keyset_chunks, scan
+from django_app.models import Machine, MachineWorkLog, PunchEvent, WorkHour, WorkTag
+
+
+class ConsistencyScanTests(TestCase):
+    def setUp(self):
+        self.jan = User.objects.create_user(username="jan")
+        self.machine = Machine.objects.create(name="Tokarka")
+        self.january = WorkTag.objects.create(name="Budowa", year=2025, month=1)
+        self.february = WorkTag.objects.create(name="Budowa", year=2025, month=2)
+        self.other = WorkTag.objects.create(name="Hala", year=2025, month=1)
+
+        def row(day, start=None, end=None, **kwargs):
+            return WorkHour(
+                user_id=kwargs.pop("user_id", self.jan.id),
+                date=date(2025, *day),
+                start_time=start,
+                end_time=end,
+                **kwargs,
+            )
+
+        # rows written before today's checks, or whose references were
+        # deleted with foreign keys off
+        self.hours = WorkHour.objects.bulk_create(
+            [
+                row((1, 2), time(7), time(15), tag=self.january),
+                row((1, 3), user_id=999),
+                row((1, 4), tag_id=999),
+                row((2, 3), tag=self.january),
+                row((2, 4), tag=self.other),
+                row((1, 5), time(7)),
+                row((1, 6), time(15), time(7)),
+            ]
+        )
+        self.logs = MachineWorkLog.objects.bulk_create(
+            [
+                MachineWorkLog(
+                    machine=self.machine,
+                    date=date(2025, 1, 2),
+                    start_time=time(22),
+                    end_time=time(6),
+                ),
+                MachineWorkLog(machine_id=999, date=date(2025, 1, 3)),
+                MachineWorkLog(
+                    machine=self.machine, date=date(2025, 1, 4), end_time=time(6)
+                ),
+            ]
+        )
+        # the orphans would fail the constraint check at the end of the test
+        self.addCleanup(WorkHour.objects.filter(user_id=999).delete)
+        self.addCleanup(WorkHour.objects.filter(tag_id=999).delete)
+        self.addCleanup(MachineWorkLog.objects.filter(machine_id=999).delete)
+
+    def run_scan(self, **kwargs):
+        report, fix_script = io.StringIO(), io.StringIO()
+        summary = scan(report, fix_script, **kwargs)
+        return summary, json.loads(report.getvalue()), fix_script.getvalue()
+
+    def test_report(self):
+        summary, report, _ = self.run_scan(chunk_size=2)
+
+        self.assertEqual(report["summary"], summary)
+        self.assertEqual(summary["work_hours"], 7)
+        self.assertEqual(summary["machine_logs"], 3)
+        self.assertEqual(
+            summary["issues"],
+            {
+                "end_before_start": 1,
+                "half_time": 2,
+                "missing_tag": 1,
+                "orphan_machine": 1,
+                "orphan_user": 1,
+                "tag_other_month": 2,
+            },
+        )
+        issues = {
+            (i["model"], i["id"]): (i["issue"], i["fixable"]) for i in report["issues"]
+        }
+        h, logs = self.hours, self.logs
+        self.assertEqual(
+            issues,
+            {
+                ("workhour", h[1].id): ("orphan_user", True),
+                ("workhour", h[2].id): ("missing_tag", True),
+                ("workhour", h[3].id): ("tag_other_month", True),
+                ("workhour", h[4].id): ("tag_other_month", False),
+                ("workhour", h[5].id): ("half_time", False),
+                ("workhour", h[6].id): ("end_before_start", False),
+                ("machineworklog", logs[1].id): ("orphan_machine", True),
+                ("machineworklog", logs[2].id): ("half_time", False),
+            },
+        )
+
+    def test_open_punch_day_is_not_half_time(self):
+        # a punched-in day has only its start until the closing punch; once
+        # the day can no longer be edited it is reported like any other
+        today = date.today()
+        stale = today - timedelta(days=10)
+        for day in (today, stale):
+            WorkHour.objects.create(user=self.jan, date=day, start_time=time(7))
+            PunchEvent.objects.create(
+                user=self.jan,
+                kind=PunchEvent.IN,
+                timestamp=timezone.make_aware(datetime.combine(day, time(7))),
+                date=day,
+            )
+
+        _, report, _ = self.run_scan()
+
+        half_time = {i["date"] for i in report["issues"] if i["issue"] == "half_time"}
+        self.assertIn(stale.isoformat(), half_time)
+        self.assertNotIn(today.isoformat(), half_time)
+        self.assertEqual(report["summary"]["issues"]["half_time"], 3)
+
+    def test_fix_script(self):
+        summary, _, script = self.run_scan()
+
+        self.assertEqual(summary["fixes"], 4)
+        self.assertTrue(script.startswith("-- Generated by scan_consistency"))
+        self.assertIn(
+            f'UPDATE "django_app_workhour" SET tag_id = {self.february.id}, '
+            f"version = version + 1 WHERE id = {self.hours[3].id} AND version = 1;",
+            script,
+        )
+        self.assertIn(
+            f'DELETE FROM "django_app_workhour" WHERE id = {self.hours[1].id} '
+            "AND version = 1;",
+            script,
+        )
+        self.assertIn(
+            f'DELETE FROM "django_app_machineworklog" WHERE id = {self.logs[1].id} '
+            "AND version = 1;",
+            script,
+        )
+        self.assertTrue(script.endswith("COMMIT;\n"))
+
+    def test_fix_skips_rows_changed_since_the_scan(self):
+        _, _, script = self.run_scan()
+        hour = self.hours[3]
+        fix = next(
+            line for line in script.splitlines() if f"WHERE id = {hour.id} " in line
+        )
+        hour.refresh_from_db()
+        hour.start_time = time(8)
+        hour.save()
+
+        with connection.cursor() as cursor:
+            cursor.execute(fix)
+            self.assertEqual(cursor.rowcount, 0)
+        hour.refresh_from_db()
+        self.assertEqual(hour.tag_id, self.january.id)
+
+    def test_keyset_chunks(self):
+        queryset = WorkHour.objects.filter(date__month=1)
+
+        # five rows: chunks of two, two and one
+        with self.assertNumQueries(3):
+            rows = list(keyset_chunks(queryset, ("date",), 2))
+        self.assertEqual([r[0] for r in rows], sorted(r[0] for r in rows))
+        self.assertEqual(len(rows), 5)
+
+    def test_workers_give_same_report(self):
+        # the date ranges are scanned in forked processes; rows come out
+        # grouped by range instead of by id
+        def contents(summary, report, script):
+            issues = sorted(report["issues"], key=lambda i: (i["model"], i["id"]))
+            return summary, issues, sorted(script.splitlines())
+
+        self.assertEqual(
+            contents(*self.run_scan(workers=3)), contents(*self.run_scan(workers=1))
+        )
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            report, fixes = Path(directory, "report.json"), Path(directory, "fix.sql")
+            err = io.StringIO()
+
+            call_command(
+                "scan_consistency",
+                "--report",
+                report,
+                "--fix-sql",
+                fixes,
+                stdout=io.StringIO(),
+                stderr=err,
+            )
+
+            self.assertEqual(json.loads(report.read_text())["summary"]["fixes"], 4)
+            self.assertIn("DELETE FROM", fixes.read_text())
+        self.assertIn("Scanned 7 work hours and 3 machine logs", err.getvalue())
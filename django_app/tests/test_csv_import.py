@@ -0,0 +1,177 @@
+import io
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.importers import (
+    ImportFormatError,
+    import_machine_logs,
+    import_work_hours,
+)
+from django_app.models import Machine, MachineWorkLog, WorkHour, WorkTag
+
+
+class WorkHourImportTests(TestCase):
+    def setUp(self):
+        self.u1 = User.objects.create(username="jan")
+        self.u2 = User.objects.create(username="ola")
+        self.static_tag = WorkTag.objects.create(name="Urlop", is_static=True)
+        self.month_tag = WorkTag.objects.create(name="Budowa", month=1, year=2025)
+
+    def test_import_rows(self):
+        csv_data = (
+            "username,date,start_time,end_time,tag\n"
+            "jan,2025-01-02,07:00,15:00,Budowa\n"
+            "ola,2025-01-02,,,Urlop\n"
+        )
+        result = import_work_hours(io.StringIO(csv_data))
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(result.rejected, 0)
+
+        e1 = WorkHour.objects.get(user=self.u1, date=date(2025, 1, 2))
+        self.assertEqual(e1.total_hours, 8.0)
+        self.assertEqual(e1.tag, self.month_tag)
+
+        e2 = WorkHour.objects.get(user=self.u2, date=date(2025, 1, 2))
+        self.assertEqual(e2.tag, self.static_tag)
+        self.assertIsNone(e2.start_time)
+
+    def test_updates_existing_entry(self):
+        WorkHour.objects.create(
+            user=self.u1,
+            date=date(2025, 1, 3),
+            start_time=time(6, 0),
+            end_time=time(8, 0),
+        )
+        csv_data = "username,date,start_time,end_time,tag\njan,2025-01-03,8:00,16:30,\n"
+
+        import_work_hours(io.StringIO(csv_data), batch_size=1)
+
+        entry = WorkHour.objects.get(user=self.u1, date=date(2025, 1, 3))
+        self.assertEqual(entry.total_hours, 8.5)
+
+    def test_repeated_row_counts_once(self):
+        csv_data = (
+            "username,date,start_time,end_time,tag\n"
+            "jan,2025-01-03,07:00,15:00,\n"
+            "jan,2025-01-03,08:00,16:00,\n"
+        )
+
+        result = import_work_hours(io.StringIO(csv_data))
+
+        self.assertEqual(result.imported, 1)
+        entry = WorkHour.objects.get(user=self.u1, date=date(2025, 1, 3))
+        self.assertEqual(entry.start_time, time(8, 0))
+
+    def test_repeated_row_counts_once_across_batches(self):
+        csv_data = "username,date,start_time,end_time,tag\n" + (
+            "jan,2025-01-03,07:00,15:00,\n" * 3
+        )
+
+        result = import_work_hours(io.StringIO(csv_data), batch_size=1)
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(WorkHour.objects.filter(user=self.u1).count(), 1)
+
+    def test_rejects_with_line_numbers(self):
+        csv_data = (
+            "username,date,start_time,end_time,tag\n"
+            "jan,2025-01-02,15:00,07:00,\n"
+            "nobody,2025-01-02,07:00,15:00,\n"
+            "jan,2025-02-30,07:00,15:00,\n"
+            "jan,2025-02-03,07:00,15:00,Budowa\n"
+            "jan,2025-01-05,07:00,,\n"
+            "ola,2025-01-06,07:00,15:00,\n"
+        )
+        rejects = io.StringIO()
+        result = import_work_hours(io.StringIO(csv_data), rejects=rejects)
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.rejected, 5)
+        self.assertEqual([line for line, _ in result.errors], [2, 3, 4, 5, 6])
+        self.assertIn("wcześniejszy", result.errors[0][1])
+
+        reject_lines = rejects.getvalue().splitlines()
+        self.assertEqual(
+            reject_lines[0], "line,username,date,start_time,end_time,tag,error"
+        )
+        self.assertTrue(reject_lines[1].startswith("2,jan,2025-01-02,15:00,07:00,"))
+        self.assertEqual(WorkHour.objects.count(), 1)
+
+    def test_missing_columns(self):
+        with self.assertRaises(ImportFormatError):
+            import_work_hours(io.StringIO("username,date\njan,2025-01-02\n"))
+
+
+class MachineLogImportTests(TestCase):
+    def setUp(self):
+        self.m1 = Machine.objects.create(name="Koparka")
+        self.m2 = Machine.objects.create(name="Dźwig")
+
+    def test_replaces_logged_machine_days(self):
+        MachineWorkLog.objects.create(
+            machine=self.m1,
+            date=date(2025, 1, 10),
+            start_time=time(6, 0),
+            end_time=time(7, 0),
+        )
+        MachineWorkLog.objects.create(
+            machine=self.m2,
+            date=date(2025, 1, 10),
+            start_time=time(6, 0),
+            end_time=time(7, 0),
+        )
+        csv_data = (
+            "machine,date,start_time,end_time\n"
+            "Koparka,2025-01-10,07:00,10:00\n"
+            "Koparka,2025-01-10,11:00,15:00\n"
+            "Nieznana,2025-01-10,11:00,15:00\n"
+        )
+        result = import_machine_logs(io.StringIO(csv_data), batch_size=1)
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(result.rejected, 1)
+        self.assertEqual(
+            MachineWorkLog.objects.filter(machine=self.m1).count(),
+            2,
+        )
+        self.assertEqual(
+            MachineWorkLog.objects.filter(machine=self.m2).count(),
+            1,
+        )
+
+
+class ImportViewTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username="admin", password="pass", is_staff=True)
+        self.client.login(username="admin", password="pass")
+        self.u1 = User.objects.create(username="jan")
+        self.url = reverse("import")
+
+    def test_upload(self):
+        upload = SimpleUploadedFile(
+            "hours.csv",
+            b"username,date,start_time,end_time,tag\n"
+            b"jan,2025-01-02,07:00,15:00,\n"
+            b"jan,2025-01-03,15:00,07:00,\n",
+        )
+        response = self.client.post(self.url, {"kind": "work-hours", "file": upload})
+        self.assertEqual(response.status_code, 302)
+
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertTrue(any(m.startswith("Wiersz 3:") for m in messages))
+        self.assertTrue(any("Zaimportowano 1" in m for m in messages))
+        self.assertTrue(
+            WorkHour.objects.filter(user=self.u1, date=date(2025, 1, 2)).exists()
+        )
+
+    def test_requires_staff(self):
+        User.objects.create_user(username="worker", password="pass")
+        self.client.login(username="worker", password="pass")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
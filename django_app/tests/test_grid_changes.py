@@ -0,0 +1,187 @@
+import json
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from django_app import reference_cache
+from django_app.models import AuditEntry, WorkHour, WorkTag
+
+
+class GridChangesTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.client.login(username="admin", password="pass")
+        self.jan = User.objects.create_user(username="jan")
+        self.ola = User.objects.create_user(username="ola")
+        self.tag = WorkTag.objects.create(name="Budowa", month=1, year=2025)
+        self.url = reverse("dashboard") + "?year=2025&month=1"
+
+    def post_changes(self, changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url, {"changes": json.dumps(changes)}, follow=True
+            )
+        return [str(m) for m in response.context["messages"]]
+
+    def test_page_has_payload_field(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, '<input type="hidden" name="changes" disabled>')
+
+    def test_applies_only_listed_cells(self):
+        WorkHour.objects.create(
+            user=self.jan,
+            date=date(2025, 1, 2),
+            start_time=time(7),
+            end_time=time(15),
+        )
+        WorkHour.objects.create(
+            user=self.ola,
+            date=date(2025, 1, 2),
+            start_time=time(6),
+            end_time=time(14),
+        )
+
+        messages = self.post_changes(
+            [
+                [self.jan.id, 2, 8 * 60, 16 * 60 + 30, self.tag.id, 1],
+                [self.ola.id, 3, None, None, self.tag.id, 0],
+            ]
+        )
+
+        self.assertIn("Dane zapisano poprawnie.", messages)
+        updated = WorkHour.objects.get(user=self.jan, date=date(2025, 1, 2))
+        self.assertEqual(
+            (updated.start_time, updated.end_time, updated.tag),
+            (time(8), time(16, 30), self.tag),
+        )
+        tag_only = WorkHour.objects.get(user=self.ola, date=date(2025, 1, 3))
+        self.assertEqual((tag_only.start_time, tag_only.tag), (None, self.tag))
+        untouched = WorkHour.objects.get(user=self.ola, date=date(2025, 1, 2))
+        self.assertEqual(untouched.start_time, time(6))
+        self.assertEqual(AuditEntry.objects.count(), 2)
+
+    def test_query_count_does_not_depend_on_team_size(self):
+        def count_save_queries(user_id):
+            self.client.post(
+                self.url, {"changes": json.dumps([[user_id, 5, 480, 960, None, 0]])}
+            )
+            payload = {"changes": json.dumps([[user_id, 5, 420, 960, None, 1]])}
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(self.url, payload)
+            return len(queries)
+
+        small = count_save_queries(self.jan.id)
+        User.objects.bulk_create(User(username=f"nowy{i}") for i in range(30))
+        reference_cache.invalidate()
+        self.assertEqual(count_save_queries(self.ola.id), small)
+
+    def test_invalid_range_is_reported(self):
+        messages = self.post_changes([[self.jan.id, 4, 16 * 60, 8 * 60, None, 0]])
+
+        self.assertIn(
+            "jan – 4: koniec pracy nie może być wcześniejszy niż początek.", messages
+        )
+        self.assertFalse(WorkHour.objects.exists())
+
+    def test_malformed_payload_saves_nothing(self):
+        for changes in (
+            [
+                [self.jan.id, 2, 480, 960, None, 0],
+                [self.admin.id, 2, 480, 960, None, 0],
+            ],
+            [[self.jan.id, 32, 480, 960, None, 0]],
+            [[self.jan.id, True, 480, 960, None, 0]],
+            [[{}, 2, 480, 960, None, 0]],
+            [[self.jan.id, [2], 480, 960, None, 0]],
+            [[self.jan.id, 2, "08:00", 960, None, 0]],
+            [[self.jan.id, 2, 480, 960, None]],
+            {"cells": []},
+        ):
+            with self.subTest(changes=changes):
+                messages = self.post_changes(changes)
+                self.assertTrue(
+                    any("Nieprawidłowe dane formularza" in m for m in messages)
+                )
+                self.assertFalse(WorkHour.objects.exists())
+
+    def test_stale_cell_is_reported_not_overwritten(self):
+        entry = WorkHour.objects.create(
+            user=self.jan,
+            date=date(2025, 1, 2),
+            start_time=time(7),
+            end_time=time(15),
+        )
+        # another admin saves the same cell after this page was rendered
+        entry.start_time = time(6)
+        entry.save()
+        self.assertEqual(entry.version, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                self.url,
+                {
+                    "changes": json.dumps(
+                        [
+                            [self.jan.id, 2, 8 * 60, 16 * 60, None, 1],
+                            [self.ola.id, 2, 8 * 60, 16 * 60, None, 0],
+                        ]
+                    )
+                },
+            )
+        response = self.client.get(self.url)
+        messages = [str(m) for m in response.context["messages"]]
+
+        self.assertIn(
+            "jan – 2: wpis został w międzyczasie zmieniony przez kogoś innego, "
+            "Twoja zmiana nie została zapisana.",
+            messages,
+        )
+        entry.refresh_from_db()
+        self.assertEqual((entry.start_time, entry.version), (time(6), 2))
+        # the other cell did not wait for or depend on the conflicting one
+        self.assertTrue(WorkHour.objects.filter(user=self.ola).exists())
+
+        self.assertTrue(response.context["grid"][self.jan.id][2].conflict)
+        self.assertFalse(response.context["grid"][self.ola.id][2].conflict)
+        self.assertContains(response, "conflict-cell", count=4)
+
+    def test_cell_created_meanwhile_is_a_conflict(self):
+        WorkHour.objects.create(
+            user=self.jan, date=date(2025, 1, 3), start_time=time(6), end_time=time(9)
+        )
+
+        self.post_changes([[self.jan.id, 3, 8 * 60, 16 * 60, None, 0]])
+
+        entry = WorkHour.objects.get(user=self.jan, date=date(2025, 1, 3))
+        self.assertEqual(entry.start_time, time(6))
+
+    def test_update_bumps_version(self):
+        entry = WorkHour.objects.create(
+            user=self.jan, date=date(2025, 1, 3), start_time=time(6), end_time=time(9)
+        )
+
+        self.post_changes([[self.jan.id, 3, 8 * 60, 16 * 60, None, 1]])
+        self.post_changes([[self.jan.id, 3, 9 * 60, 16 * 60, None, 2]])
+
+        entry.refresh_from_db()
+        self.assertEqual((entry.start_time, entry.version), (time(9), 3))
+
+    def test_partial_row_renders_its_version(self):
+        # e.g. only an end time came from an import
+        WorkHour.objects.create(user=self.jan, date=date(2025, 1, 3), end_time=time(9))
+
+        response = self.client.get(self.url)
+
+        self.assertRegex(
+            response.content.decode(),
+            rf'name="user_{self.jan.id}_day_3_tag"\s+data-version="1"',
+        )
+        self.post_changes([[self.jan.id, 3, 8 * 60, 16 * 60, None, 1]])
+        entry = WorkHour.objects.get(user=self.jan, date=date(2025, 1, 3))
+        self.assertEqual((entry.start_time, entry.version), (time(8), 2))
@@ -0,0 +1,84 @@
+import re
+from datetime import date, time
+from unittest import skipIf
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django_app.models import Machine, MachineWorkLog, WorkHour, WorkTag
+
+try:
+    import jinja2
+except ImportError:  # optional, see GRID_TEMPLATE_ENGINE
+    jinja2 = None
+
+re_csrf_value = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]+')
+
+
+@skipIf(jinja2 is None, "jinja2 is not installed")
+class JinjaGridTemplatesTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.jan = User.objects.create_user(username="jan", password="pass")
+        User.objects.create_user(username="o'neil", is_active=False)
+        tag = WorkTag.objects.create(name='Budowa "A" & <B>', month=1, year=2025)
+        WorkTag.objects.create(name="Urlop", is_static=True)
+        today = date.today()
+        for day in (date(2025, 1, 2), today):
+            WorkHour.objects.create(
+                user=self.jan,
+                date=day,
+                start_time=time(7, 15),
+                end_time=time(15, 45),
+                tag=tag,
+            )
+        WorkHour.objects.create(user=self.jan, date=date(2025, 1, 3), tag=tag)
+        machine = Machine.objects.create(name="Koparka <1>")
+        Machine.objects.create(name="Walec")
+        MachineWorkLog.objects.create(
+            machine=machine,
+            date=date(2025, 1, 2),
+            start_time=time(22),
+            end_time=time(2),
+        )
+        MachineWorkLog.objects.create(machine=machine, date=date(2025, 1, 2))
+
+    def render_both(self, url):
+        pages = []
+        for engine in ("django", "jinja2"):
+            with override_settings(GRID_TEMPLATE_ENGINE=engine):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            # only Django templates are recorded by the test client
+            self.assertEqual(bool(response.templates), engine == "django")
+            pages.append(re_csrf_value.sub(r"\1", response.content.decode()))
+        return pages
+
+    def assertSameMarkup(self, url):
+        django_page, jinja_page = self.render_both(url)
+        self.assertIn("<table", django_page)
+        self.assertEqual(jinja_page, django_page)
+
+    def test_admin_dashboard(self):
+        self.client.login(username="admin", password="pass")
+        self.assertSameMarkup(reverse("dashboard") + "?year=2025&month=1")
+
+    def test_machines_report(self):
+        self.client.login(username="admin", password="pass")
+        self.assertSameMarkup(reverse("machines-report") + "?year=2025&month=1")
+
+    def test_user_dashboard(self):
+        self.client.login(username="jan", password="pass")
+        today = date.today()
+        self.assertSameMarkup(reverse("dashboard") + "?year=2025&month=1")
+        self.assertSameMarkup(
+            reverse("dashboard") + f"?year={today.year}&month={today.month}"
+        )
+
+    @override_settings(MINIFY_HTML=False)
+    def test_unminified(self):
+        self.client.login(username="admin", password="pass")
+        self.assertSameMarkup(reverse("dashboard") + "?year=2025&month=1")
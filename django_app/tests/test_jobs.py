@@ -0,0 +1,118 @@
+import tempfile
+from datetime import date, time, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from django_app.jobs import (
+    JOB_HANDLERS,
+    enqueue,
+    requeue_stale_jobs,
+    run_pending_jobs,
+)
+from django_app.models import Job, WorkHour
+from django_app.reports import YEARLY_REPORT
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        self.results = tempfile.TemporaryDirectory()
+        self.addCleanup(self.results.cleanup)
+        settings_override = override_settings(JOB_RESULTS_DIR=self.results.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.client.login(username="admin", password="pass")
+        self.jan = User.objects.create_user(username="jan", password="pass")
+
+    def test_same_params_are_deduplicated_until_finished(self):
+        first = enqueue(YEARLY_REPORT, {"year": 2025})
+        self.assertEqual(enqueue(YEARLY_REPORT, {"year": 2025}), first)
+        self.assertNotEqual(enqueue(YEARLY_REPORT, {"year": 2024}), first)
+
+        run_pending_jobs()
+
+        self.assertNotEqual(enqueue(YEARLY_REPORT, {"year": 2025}), first)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            enqueue("nope", {})
+
+    def test_yearly_report_file(self):
+        for month in (1, 2):
+            WorkHour.objects.create(
+                user=self.jan,
+                date=date(2025, month, 3),
+                start_time=time(8, 0),
+                end_time=time(16, 0),
+            )
+        job = enqueue(YEARLY_REPORT, {"year": 2025})
+
+        self.assertEqual(run_pending_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        with open(f"{self.results.name}/{job.result_file}", encoding="utf-8-sig") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines[0].startswith("Pracownik,Styczeń"))
+        self.assertEqual(lines[1], "jan,8.0,8.0" + ",0.0" * 10 + ",16.0")
+
+    def test_failed_job_keeps_error(self):
+        def broken(params):
+            raise RuntimeError("boom")
+
+        JOB_HANDLERS["broken"] = broken
+        self.addCleanup(JOB_HANDLERS.pop, "broken")
+        job = enqueue("broken", {})
+
+        with self.assertLogs("django_app.jobs", "ERROR"):
+            run_pending_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn("boom", job.error)
+
+    def test_requeue_stale_jobs(self):
+        job = enqueue(YEARLY_REPORT, {"year": 2025})
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, started_at=timezone.now() - timedelta(hours=2)
+        )
+
+        self.assertEqual(requeue_stale_jobs(timedelta(hours=1)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    def test_view_enqueues_and_polls(self):
+        response = self.client.post(reverse("yearly-report"), {"report_year": 2025})
+        self.assertEqual(response.status_code, 302)
+        job = Job.objects.get()
+
+        status = self.client.get(reverse("job-status", args=[job.pk])).json()
+        self.assertEqual(status["status"], Job.QUEUED)
+        self.assertIsNone(status["download"])
+        page = self.client.get(reverse("yearly-report"))
+        self.assertContains(page, reverse("job-status", args=[job.pk]))
+
+        run_pending_jobs()
+
+        status = self.client.get(reverse("job-status", args=[job.pk])).json()
+        self.assertTrue(status["finished"])
+        response = self.client.get(status["download"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'filename="raport-roczny-2025.csv"', response.headers["Content-Disposition"]
+        )
+        response.close()
+
+    def test_views_require_staff(self):
+        job = enqueue(YEARLY_REPORT, {"year": 2025})
+        self.client.login(username="jan", password="pass")
+        self.assertEqual(self.client.get(reverse("yearly-report")).status_code, 302)
+        self.assertEqual(
+            self.client.get(reverse("job-status", args=[job.pk])).status_code, 302
+        )
@@ -0,0 +1,135 @@
+import json
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.live import latest_change_id, month_changes
+from django_app.models import AuditEntry, WorkHour, WorkTag
+
+
+class LiveUpdatesTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.jan = User.objects.create_user(username="jan", password="pass")
+        self.tag = WorkTag.objects.create(name="Budowa", is_static=True)
+        self.entry = WorkHour.objects.create(
+            user=self.jan,
+            date=date(2025, 1, 2),
+            start_time=time(7),
+            end_time=time(15, 30),
+            tag=self.tag,
+        )
+        self.last_change = self.change(date(2025, 1, 2))
+
+    def change(self, day):
+        return AuditEntry.objects.create(
+            action=AuditEntry.UPDATE, user=self.jan, date=day, after={}
+        )
+
+    def test_changed_cells(self):
+        WorkHour.objects.create(user=self.jan, date=date(2025, 1, 3), tag=self.tag)
+        self.change(date(2025, 1, 3))
+        self.change(date(2025, 1, 4))  # deleted meanwhile
+        last = self.change(date(2025, 2, 1))
+
+        cursor, payload = month_changes(2025, 1, 0)
+
+        self.assertEqual(cursor, last.id)
+        self.assertEqual(
+            payload["cells"],
+            [
+                {
+                    "user": self.jan.id,
+                    "day": 2,
+                    "start": 7 * 60,
+                    "end": 15 * 60 + 30,
+                    "tag": self.tag.id,
+                    "version": 1,
+                    "hours": "8.5",
+                    "filled": True,
+                },
+                {
+                    "user": self.jan.id,
+                    "day": 3,
+                    "start": None,
+                    "end": None,
+                    "tag": self.tag.id,
+                    "version": 1,
+                    "hours": "0.0",
+                    "filled": False,
+                },
+                {
+                    "user": self.jan.id,
+                    "day": 4,
+                    "start": None,
+                    "end": None,
+                    "tag": None,
+                    "version": 0,
+                    "hours": "—",
+                    "filled": False,
+                },
+            ],
+        )
+        self.assertEqual(payload["running"], {self.jan.id: {2: "8.5", 3: "8.5"}})
+        self.assertEqual(payload["weeks"], {self.jan.id: {1: "8.5"}})
+        self.assertEqual(payload["totals"], {self.jan.id: "8.5"})
+
+    def test_other_months_only_move_the_cursor(self):
+        after = latest_change_id()
+        last = self.change(date(2025, 2, 1))
+
+        self.assertEqual(month_changes(2025, 1, after), (last.id, None))
+        self.assertEqual(month_changes(2025, 1, last.id), (last.id, None))
+
+    async def test_page_starts_stream_after_latest_change(self):
+        await self.async_client.aforce_login(self.admin)
+
+        response = await self.async_client.get(
+            reverse("dashboard") + "?year=2025&month=1"
+        )
+
+        self.assertContains(
+            response,
+            f'data-events-url="{reverse("dashboard-events")}'
+            f'?year=2025&month=1&after={self.last_change.id}"',
+        )
+
+    def test_no_stream_under_wsgi(self):
+        self.client.login(username="admin", password="pass")
+
+        response = self.client.get(reverse("dashboard") + "?year=2025&month=1")
+        self.assertNotContains(response, "data-events-url")
+        response = self.client.get(reverse("dashboard-events"), {"after": 0})
+        self.assertEqual(response.status_code, 204)
+
+    async def test_stream(self):
+        await self.async_client.aforce_login(self.admin)
+
+        response = await self.async_client.get(
+            reverse("dashboard-events"),
+            {"year": 2025, "month": 1, "after": 0},
+            headers={"Accept-Encoding": "gzip"},
+        )
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b"retry: 3000\n\n")
+        event = (await anext(events)).decode()
+        await events.aclose()
+
+        head, data = event.rstrip("\n").rsplit("\n", 1)
+        self.assertEqual(head, f"id: {self.last_change.id}\nevent: cells")
+        payload = json.loads(data.removeprefix("data: "))
+        self.assertEqual([c["day"] for c in payload["cells"]], [2])
+
+    async def test_stream_is_staff_only(self):
+        await self.async_client.aforce_login(self.jan)
+
+        response = await self.async_client.get(reverse("dashboard-events"))
+
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,126 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app import reference_cache
+from django_app.models import Machine, MachineRate, MachineWorkLog
+from django_app.reports import machine_billing
+
+JANUARY, FEBRUARY = date(2025, 1, 1), date(2025, 2, 1)
+
+
+class MachineBillingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reference_cache.invalidate()
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.excavator = Machine.objects.create(name="Koparka")
+        self.crane = Machine.objects.create(name="Dźwig")
+        MachineRate.objects.create(
+            machine=self.excavator, valid_from=date(2025, 1, 1), hourly_rate=100
+        )
+        MachineRate.objects.create(
+            machine=self.excavator,
+            valid_from=date(2025, 1, 16),
+            hourly_rate=Decimal("120.50"),
+        )
+        for machine, day, start, end in (
+            (self.excavator, date(2024, 12, 31), time(8), time(10)),
+            (self.excavator, date(2025, 1, 10), time(8), time(16)),
+            # overnight, at the rate of the day it started
+            (self.excavator, date(2025, 1, 20), time(22), time(6)),
+            (self.excavator, date(2025, 2, 3), time(8), time(12, 30)),
+            (self.crane, date(2025, 1, 5), time(7), time(10)),
+        ):
+            self.log(machine, day, start, end)
+
+    def log(self, machine, day, start, end):
+        with self.captureOnCommitCallbacks(execute=True):
+            MachineWorkLog.objects.create(
+                machine=machine, date=day, start_time=start, end_time=end
+            )
+
+    def rows(self, report):
+        return [
+            (r.machine, r.month, r.hours, r.unpriced_hours, r.cost) for r in report.rows
+        ]
+
+    def test_cost_uses_rate_in_effect(self):
+        report = machine_billing(JANUARY, FEBRUARY)
+
+        self.assertEqual(
+            self.rows(report),
+            [
+                ("Dźwig", "2025-01", 3, 3, Decimal("0.00")),
+                ("Koparka", "2025-01", 16, 0, Decimal("1764.00")),
+                ("Koparka", "2025-02", 4.5, 0, Decimal("542.25")),
+            ],
+        )
+        self.assertEqual(report.hours, 23.5)
+        self.assertEqual(report.cost, Decimal("2306.25"))
+        # before the first rate
+        december = machine_billing(date(2024, 12, 1), date(2024, 12, 1))
+        self.assertEqual(
+            self.rows(december), [("Koparka", "2024-12", 2, 2, Decimal("0.00"))]
+        )
+
+    def test_months_are_cached_until_they_change(self):
+        machine_billing(JANUARY, FEBRUARY)
+
+        # only the change markers are read
+        with self.assertNumQueries(1):
+            machine_billing(JANUARY, FEBRUARY)
+
+        self.log(self.crane, date(2025, 2, 4), time(7), time(9))
+        with self.assertNumQueries(2):
+            report = machine_billing(JANUARY, FEBRUARY)
+        self.assertIn(("Dźwig", "2025-02", 2, 2, Decimal("0.00")), self.rows(report))
+
+    def test_rate_change_reprices_every_month(self):
+        machine_billing(JANUARY, FEBRUARY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MachineRate.objects.create(
+                machine=self.crane, valid_from=date(2024, 1, 1), hourly_rate=200
+            )
+
+        report = machine_billing(JANUARY, FEBRUARY)
+        self.assertEqual(
+            self.rows(report)[0], ("Dźwig", "2025-01", 3, 0, Decimal("600.00"))
+        )
+
+    def test_page_and_csv(self):
+        self.client.login(username="admin", password="pass")
+        url = reverse("machine-billing")
+        params = {"year": 2025, "month": 1, "from": "2025-01", "to": "2025-02"}
+
+        response = self.client.get(url, params)
+        self.assertContains(response, "<td>1764.00</td>", html=True)
+        self.assertContains(response, "<th>2306.25</th>", html=True)
+
+        response = self.client.get(url, {**params, "format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = response.content.decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[2], "Koparka,2025-01,16.0,0.0,1764.00")
+
+    def test_long_ranges_are_cut(self):
+        report = machine_billing(date(1900, 1, 1), date(9999, 12, 1))
+        self.assertEqual(report.rows, [])
+
+        self.client.login(username="admin", password="pass")
+        response = self.client.get(
+            reverse("machine-billing"), {"from": "2020-01", "to": "9999-12"}
+        )
+        # ten years
+        self.assertEqual(response.context["month_to"], date(2029, 12, 1))
+
+        response = self.client.get(
+            reverse("machine-billing"), {"from": "9999-12", "to": "9999-12"}
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,131 @@
+import io
+from datetime import date, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.archive import ARCHIVE_DB
+from django_app.models import Machine, MachineWorkLog
+
+OLD_YEAR = date.today().year - 3
+
+
+class MachineTimelineTests(TestCase):
+    databases = {"default", ARCHIVE_DB}
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.client.login(username="admin", password="pass")
+        self.excavator = Machine.objects.create(name="Koparka")
+        self.other = Machine.objects.create(name="Walec")
+
+    def log(self, machine, day, start, end):
+        return MachineWorkLog.objects.create(
+            machine=machine, date=day, start_time=start, end_time=end
+        )
+
+    def get_json(self, machine, **params):
+        url = reverse("machine-timeline-json", args=[machine.id])
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_daily_rollup(self):
+        self.log(self.excavator, date(2025, 3, 3), time(6), time(10))
+        self.log(self.excavator, date(2025, 3, 3), time(12), time(14, 30))
+        self.log(self.excavator, date(2025, 3, 4), time(22), time(2))
+        self.log(self.other, date(2025, 3, 3), time(6), time(18))
+
+        data = self.get_json(
+            self.excavator, **{"from": "2025-03-01", "to": "2025-03-31"}
+        )
+
+        self.assertEqual(
+            data["rows"],
+            [
+                {"period": "2025-03-03", "hours": 6.5, "logs": 2},
+                {"period": "2025-03-04", "hours": 4.0, "logs": 1},
+            ],
+        )
+        self.assertEqual(data["total_hours"], 10.5)
+
+    def test_weekly_rollup(self):
+        self.log(self.excavator, date(2025, 3, 3), time(6), time(10))
+        self.log(self.excavator, date(2025, 3, 9), time(6), time(10))
+        self.log(self.excavator, date(2025, 3, 10), time(6), time(7))
+
+        data = self.get_json(
+            self.excavator,
+            **{"from": "2025-03-01", "to": "2025-03-31", "group": "week"},
+        )
+
+        self.assertEqual(
+            [(row["period"], row["hours"]) for row in data["rows"]],
+            [("2025-03-03", 8.0), ("2025-03-10", 1.0)],
+        )
+
+    def test_pages_across_archive(self):
+        start = date(OLD_YEAR, 12, 1)
+        for offset in range(70):
+            self.log(self.excavator, start + timedelta(days=offset), time(8), time(9))
+        call_command("archive_years", str(OLD_YEAR), stdout=io.StringIO())
+
+        params = {"from": f"{OLD_YEAR}-12-01", "to": f"{OLD_YEAR + 1}-12-31"}
+        first = self.get_json(self.excavator, **params)
+        second = self.get_json(self.excavator, **params, page=2)
+
+        self.assertEqual((first["num_pages"], first["total_hours"]), (2, 70.0))
+        periods = [row["period"] for row in first["rows"] + second["rows"]]
+        self.assertEqual(len(periods), 70)
+        self.assertEqual(periods, sorted(periods))
+        self.assertEqual(periods[0], f"{OLD_YEAR}-12-01")
+        self.assertEqual(periods[31], f"{OLD_YEAR + 1}-01-01")
+
+    def test_week_across_archive_is_one_row(self):
+        # 2021 starts on a Friday, in the week of Monday 2020-12-28
+        self.log(self.excavator, date(2020, 12, 28), time(8), time(10))
+        self.log(self.excavator, date(2021, 1, 1), time(8), time(9))
+        call_command("archive_years", "2020", stdout=io.StringIO())
+
+        data = self.get_json(
+            self.excavator, **{"from": "2020-12-01", "to": "2021-01-31"}, group="week"
+        )
+
+        self.assertEqual(
+            data["rows"], [{"period": "2020-12-28", "hours": 3.0, "logs": 2}]
+        )
+        self.assertEqual(data["num_pages"], 1)
+
+    def test_range_query_uses_index(self):
+        index = MachineWorkLog._meta.indexes[0].name
+        plan = MachineWorkLog.objects.filter(
+            machine=self.excavator, date__range=(date(2025, 1, 1), date(2025, 3, 31))
+        ).explain()
+        self.assertIn(index, plan)
+
+    def test_page(self):
+        self.log(self.excavator, date(2025, 3, 3), time(6), time(10))
+
+        response = self.client.get(
+            reverse("machine-timeline"),
+            {"machine": self.excavator.id, "from": "2025-03-01", "to": "2025-03-31"},
+        )
+
+        self.assertContains(response, "2025-03-03")
+        self.assertContains(response, "<strong>4.0 h</strong>", html=True)
+
+    def test_impossible_dates_fall_back(self):
+        data = self.get_json(
+            self.excavator, **{"from": "2025-02-30", "to": "2025-13-01"}
+        )
+
+        today = date.today()
+        self.assertEqual(data["to"], today.isoformat())
+        self.assertEqual(
+            data["from"],
+            date(today.year, (today.month - 1) // 3 * 3 + 1, 1).isoformat(),
+        )
@@ -90,3 +90,89 @@ class MachineReportTests(TestCase):
 
         self.assertEqual(response.status_code, 302)
         self.assertIn("/machines-report", response.url)
+
+    def rendered_tokens(self):
+        return self.client.get(self.url).context["machine_tokens"]
+
+    def test_untouched_day_keeps_concurrent_change(self):
+        log = MachineWorkLog.objects.create(
+            machine=self.m1,
+            date=date(2025, 1, 10),
+            start_time=time(6, 0),
+            end_time=time(10, 0),
+        )
+        tokens = self.rendered_tokens()
+        log.end_time = time(12, 0)
+        log.save()
+
+        data = self.payload(
+            10,
+            1,
+            [{"machine": self.m1, "sh": "06", "sm": "00", "eh": "10", "em": "00"}],
+        )
+        data["day_10_token"] = tokens[10]
+        data.update(
+            self.payload(
+                11,
+                1,
+                [{"machine": self.m2, "sh": "07", "sm": "00", "eh": "15", "em": "00"}],
+            )
+        )
+        data["day_11_token"] = tokens[11]
+        self.client.post(self.url, data)
+
+        log.refresh_from_db()
+        self.assertEqual(log.end_time, time(12, 0))
+        self.assertTrue(
+            MachineWorkLog.objects.filter(machine=self.m2, date=date(2025, 1, 11))
+        )
+
+    def test_stale_day_is_reported(self):
+        log = MachineWorkLog.objects.create(
+            machine=self.m1,
+            date=date(2025, 1, 10),
+            start_time=time(6, 0),
+            end_time=time(10, 0),
+        )
+        tokens = self.rendered_tokens()
+        log.end_time = time(12, 0)
+        log.save()
+
+        data = self.payload(
+            10,
+            1,
+            [{"machine": self.m1, "sh": "07", "sm": "00", "eh": "15", "em": "00"}],
+        )
+        data["day_10_token"] = tokens[10]
+        response = self.client.post(self.url, data)
+
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertTrue(any("Dzień 10: wpisy maszyn" in m for m in messages))
+        log.refresh_from_db()
+        self.assertEqual((log.start_time, log.end_time), (time(6, 0), time(12, 0)))
+
+    def test_current_day_is_replaced(self):
+        MachineWorkLog.objects.create(
+            machine=self.m1,
+            date=date(2025, 1, 10),
+            start_time=time(6, 0),
+            end_time=time(10, 0),
+        )
+        tokens = self.rendered_tokens()
+
+        data = self.payload(
+            10,
+            1,
+            [{"machine": self.m2, "sh": "07", "sm": "00", "eh": "15", "em": "00"}],
+        )
+        data["day_10_token"] = tokens[10]
+        self.client.post(self.url, data)
+
+        self.assertEqual(
+            list(
+                MachineWorkLog.objects.filter(date=date(2025, 1, 10)).values_list(
+                    "machine_id", flat=True
+                )
+            ),
+            [self.m2.id],
+        )
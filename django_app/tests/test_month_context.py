@@ -0,0 +1,113 @@
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from django_app import reference_cache
+from django_app.models import Machine, MachineWorkLog, WorkHour, WorkTag
+from django_app.month_context import MonthContext, get_month_context
+
+
+class MonthContextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reference_cache.invalidate()
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.tag = WorkTag.objects.create(name="Budowa", month=1, year=2025)
+        self.machine = Machine.objects.create(name="Koparka")
+        self.workers = []
+        self.add_workers(2)
+        self.client.login(username="admin", password="pass")
+
+    def add_workers(self, count):
+        start = len(self.workers)
+        for i in range(start, start + count):
+            user = User.objects.create_user(username=f"pracownik{i}")
+            self.workers.append(user)
+            WorkHour.objects.bulk_create(
+                WorkHour(
+                    user=user,
+                    date=date(2025, 1, day),
+                    start_time=time(8),
+                    end_time=time(16),
+                    tag=self.tag,
+                )
+                for day in range(1, 11)
+            )
+        reference_cache.invalidate()
+
+    def count_queries(self, url):
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_workers(self):
+        for name in ("dashboard", "monthly-report"):
+            with self.subTest(name):
+                url = reverse(name) + "?year=2025&month=1"
+                before = self.count_queries(url)
+                self.add_workers(3)
+                self.assertEqual(self.count_queries(url), before)
+
+    def test_query_count_does_not_grow_with_machine_logs(self):
+        url = reverse("machines-report") + "?year=2025&month=1"
+        before = self.count_queries(url)
+        MachineWorkLog.objects.bulk_create(
+            MachineWorkLog(
+                machine=self.machine,
+                date=date(2025, 1, day),
+                start_time=time(6),
+                end_time=time(14),
+            )
+            for day in range(1, 21)
+        )
+        self.assertEqual(self.count_queries(url), before)
+
+    def test_loader_is_memoized_per_request(self):
+        request = RequestFactory().get("/", {"year": 2025, "month": 1})
+        request.user = self.workers[0]
+
+        ctx = get_month_context(request, per_user=True)
+        self.assertIs(get_month_context(request, per_user=True), ctx)
+        self.assertIsNot(get_month_context(request), ctx)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(ctx.total_hours, 80)
+            self.assertEqual(ctx.hours[1].tag, self.tag)
+            self.assertEqual(len(ctx.hours), 10)
+
+    def test_week_and_running_totals(self):
+        worker = self.workers[0]
+        # outside the month: week 1 of 2025 starts on 30 December
+        WorkHour.objects.create(
+            user=worker, date=date(2024, 12, 31), start_time=time(8), end_time=time(16)
+        )
+        WorkHour.objects.filter(user=worker, date=date(2025, 1, 10)).update(
+            start_time=time(22), end_time=time(6)
+        )
+        WorkHour.objects.create(user=worker, date=date(2025, 1, 12), tag=self.tag)
+        ctx = MonthContext(2025, 1, worker)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(ctx.week_hours, {1: 40, 2: 40})
+            self.assertEqual(ctx.running_hours[3], 24)
+            self.assertEqual(ctx.running_hours[12], 80)
+            self.assertEqual(ctx.total_hours, 80)
+
+        grid = MonthContext(2025, 1).grid
+        self.assertEqual(grid[worker.id].weeks, {1: 40, 2: 40})
+        self.assertEqual(grid[worker.id][3].running_hours, 24)
+        self.assertEqual(grid[worker.id].total_hours, 80)
+
+        response = self.client.get(reverse("dashboard") + "?year=2025&month=1")
+        self.assertContains(response, f'<td id="week_{worker.id}_2">40.0</td>')
+        self.assertContains(response, '<small class="running-hours">Σ 24.0</small>')
+        self.assertContains(response, "Tydzień 5:")
@@ -0,0 +1,80 @@
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.archive import archived_years
+from django_app.expressions import worked_minutes
+from django_app.models import WorkHour, WorkTag
+from django_app.reports import NO_TAG, pivot_report
+
+
+class PivotReportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.client.login(username="admin", password="pass")
+        self.jan = User.objects.create_user(username="jan")
+        self.ola = User.objects.create_user(username="ola")
+        self.budowa = WorkTag.objects.create(name="Budowa", is_static=True)
+        self.hala = WorkTag.objects.create(name="Hala", is_static=True)
+
+        rows = [
+            (self.jan, date(2025, 1, 2), time(8, 0), time(16, 0), self.budowa),
+            (self.jan, date(2025, 1, 3), time(8, 0), time(12, 30), self.budowa),
+            (self.jan, date(2025, 2, 3), time(22, 0), time(6, 0), self.hala),
+            (self.ola, date(2025, 1, 2), time(7, 0), time(15, 15), None),
+            (self.ola, date(2025, 1, 3), None, None, self.hala),
+            (self.admin, date(2025, 1, 2), time(8, 0), time(16, 0), self.budowa),
+        ]
+        for user, day, start, end, tag in rows:
+            WorkHour.objects.create(
+                user=user, date=day, start_time=start, end_time=end, tag=tag
+            )
+
+    def test_worked_minutes_matches_total_hours(self):
+        for wh in WorkHour.objects.annotate(minutes=worked_minutes()):
+            if wh.start_time is None:
+                self.assertIsNone(wh.minutes)
+            else:
+                self.assertEqual(wh.minutes / 60, wh.total_hours)
+        total = WorkHour.objects.aggregate(total=Sum(worked_minutes()))["total"]
+        self.assertEqual(total, (8 + 4.5 + 8 + 8.25 + 8) * 60)
+
+    def test_user_by_tag(self):
+        report = pivot_report(date(2025, 1, 1), date(2025, 2, 28))
+
+        self.assertEqual([r.username for r in report.rows], ["jan", "ola"])
+        jan, ola = report.rows
+        self.assertEqual(jan.months[0].cells, [("Budowa", 12.5), ("Hala", 8.0)])
+        self.assertEqual(jan.total, 20.5)
+        # the tag-only day has no hours, so it is not a cell
+        self.assertEqual(ola.months[0].cells, [(NO_TAG, 8.25)])
+        self.assertEqual(report.cells, 3)
+        self.assertEqual(report.total, 28.75)
+
+    def test_by_month(self):
+        report = pivot_report(date(2025, 1, 1), date(2025, 2, 28), by_month=True)
+
+        jan = report.rows[0]
+        self.assertEqual(
+            [(m.label, m.cells) for m in jan.months],
+            [("2025-01", [("Budowa", 12.5)]), ("2025-02", [("Hala", 8.0)])],
+        )
+
+    def test_single_grouped_query(self):
+        archived_years()
+        with self.assertNumQueries(1):
+            pivot_report(date(2025, 1, 1), date(2025, 12, 31), by_month=True)
+
+    def test_view(self):
+        response = self.client.get(
+            reverse("pivot-report"), {"from": "2025-01", "to": "2025-01"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["report"].total, 20.75)
+        self.assertContains(response, "Budowa: 12.5")
@@ -0,0 +1,108 @@
+import json
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.models import PunchEvent, PunchTerminal, WorkHour, WorkTag
+from django_app.punch import round_to_quarter
+
+
+class PunchEventsTests(TestCase):
+    def setUp(self):
+        self.terminal = PunchTerminal.objects.create(name="Brama 1")
+        self.u1 = User.objects.create(username="jan")
+        self.u2 = User.objects.create(username="ola")
+        self.url = reverse("punch-events")
+
+    def post(self, events, token=None):
+        return self.client.post(
+            self.url,
+            json.dumps({"events": events}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {token or self.terminal.token}",
+        )
+
+    def test_requires_token(self):
+        response = self.post([], token="wrong")
+        self.assertEqual(response.status_code, 401)
+
+    def test_inactive_terminal(self):
+        self.terminal.is_active = False
+        self.terminal.save()
+        response = self.post([])
+        self.assertEqual(response.status_code, 401)
+
+    def test_folds_events_into_work_hours(self):
+        response = self.post(
+            [
+                {"user": "jan", "kind": "in", "timestamp": "2025-01-05T07:02:00"},
+                {"user": "jan", "kind": "in", "timestamp": "2025-01-05T07:20:00"},
+                {"user": "jan", "kind": "out", "timestamp": "2025-01-05T12:00:00"},
+                {"user": "jan", "kind": "out", "timestamp": "2025-01-05T15:01:00"},
+                {"user": "ola", "kind": "in", "timestamp": "2025-01-05T06:00:00"},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"accepted": 5, "rejected": []})
+        self.assertEqual(PunchEvent.objects.count(), 5)
+
+        e1 = WorkHour.objects.get(user=self.u1, date=date(2025, 1, 5))
+        self.assertEqual(e1.start_time, time(7, 0))
+        self.assertEqual(e1.end_time, time(15, 0))
+
+        e2 = WorkHour.objects.get(user=self.u2, date=date(2025, 1, 5))
+        self.assertEqual(e2.start_time, time(6, 0))
+        self.assertIsNone(e2.end_time)
+
+    def test_later_batch_completes_existing_entry(self):
+        tag = WorkTag.objects.create(name="Budowa", month=1, year=2025)
+        WorkHour.objects.create(user=self.u2, date=date(2025, 1, 6), tag=tag)
+
+        self.post([{"user": "ola", "kind": "in", "timestamp": "2025-01-06T06:00"}])
+        self.post([{"user": "ola", "kind": "out", "timestamp": "2025-01-06T14:00"}])
+
+        entry = WorkHour.objects.get(user=self.u2, date=date(2025, 1, 6))
+        self.assertEqual(entry.tag, tag)
+        self.assertEqual(entry.total_hours, 8.0)
+
+    def test_merged_row_never_ends_before_it_starts(self):
+        WorkHour.objects.create(
+            user=self.u1, date=date(2025, 1, 7), start_time=time(10), end_time=time(18)
+        )
+
+        self.post([{"user": "jan", "kind": "out", "timestamp": "2025-01-07T08:00"}])
+
+        entry = WorkHour.objects.get(user=self.u1, date=date(2025, 1, 7))
+        self.assertEqual((entry.start_time, entry.end_time), (time(10), time(18)))
+
+        self.post([{"user": "jan", "kind": "in", "timestamp": "2025-01-07T19:00"}])
+
+        entry.refresh_from_db()
+        self.assertEqual((entry.start_time, entry.end_time), (time(19), None))
+
+    def test_rejects_invalid_events(self):
+        response = self.post(
+            [
+                {"user": "nobody", "kind": "in", "timestamp": "2025-01-05T07:00"},
+                {"user": "jan", "kind": "break", "timestamp": "2025-01-05T07:00"},
+                {"user": "jan", "kind": "in", "timestamp": "yesterday"},
+                {"user": "jan", "kind": "in", "timestamp": "2025-01-05T07:00"},
+            ]
+        )
+        data = response.json()
+        self.assertEqual(data["accepted"], 1)
+        self.assertEqual([r["index"] for r in data["rejected"]], [0, 1, 2])
+
+    def test_events_are_append_only(self):
+        self.post([{"user": "jan", "kind": "in", "timestamp": "2025-01-05T07:00"}])
+        event = PunchEvent.objects.get()
+        event.kind = PunchEvent.OUT
+        with self.assertRaises(ValueError):
+            event.save()
+
+    def test_round_to_quarter(self):
+        self.assertEqual(round_to_quarter(time(7, 7)), time(7, 0))
+        self.assertEqual(round_to_quarter(time(7, 8)), time(7, 15))
+        self.assertEqual(round_to_quarter(time(23, 59)), time(23, 45))
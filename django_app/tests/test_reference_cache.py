@@ -0,0 +1,71 @@
+from datetime import date, time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from django_app import reference_cache
+from django_app.models import Machine, WorkHour, WorkTag
+from django_app.utils import get_machines, get_month_users, get_tags
+
+
+class ReferenceCacheTests(TestCase):
+    def setUp(self):
+        reference_cache.invalidate()
+        self.static_tag = WorkTag.objects.create(name="Urlop", is_static=True)
+        self.jan_tag = WorkTag.objects.create(name="Budowa", month=1, year=2025)
+
+    def test_tags_are_cached_per_month(self):
+        self.assertEqual(set(get_tags(2025, 1)), {self.static_tag, self.jan_tag})
+        with self.assertNumQueries(0):
+            get_tags(2025, 1)
+        self.assertEqual(set(get_tags(2025, 2)), {self.static_tag})
+
+    def test_tag_change_invalidates(self):
+        get_tags(2025, 1)
+        new_tag = WorkTag.objects.create(name="Hala", month=1, year=2025)
+        self.assertIn(new_tag, get_tags(2025, 1))
+
+        new_tag.delete()
+        self.assertNotIn(new_tag, get_tags(2025, 1))
+
+    def test_machine_change_invalidates(self):
+        m1 = Machine.objects.create(name="Koparka")
+        self.assertEqual(get_machines(), (m1,))
+        with self.assertNumQueries(0):
+            get_machines()
+
+        m2 = Machine.objects.create(name="Dźwig")
+        self.assertEqual(get_machines(), (m2, m1))
+
+    def test_month_users(self):
+        active = User.objects.create(username="jan")
+        inactive = User.objects.create(username="ola", is_active=False)
+        User.objects.create(username="szef", is_staff=True)
+        WorkHour.objects.create(
+            user=inactive,
+            date=date(2025, 1, 3),
+            start_time=time(8, 0),
+            end_time=time(12, 0),
+        )
+
+        self.assertEqual(get_month_users(2025, 1), [active, inactive])
+        self.assertEqual(get_month_users(2025, 2), [active])
+
+    def test_login_does_not_invalidate(self):
+        user = User.objects.create(username="jan")
+        get_machines()
+        user.save(update_fields=["last_login"])
+        with self.assertNumQueries(0):
+            get_machines()
+
+    @override_settings(REFERENCE_CACHE_ALIAS="default")
+    def test_shared_generation_syncs_workers(self):
+        get_tags(2025, 1)
+        with self.assertNumQueries(0):
+            get_tags(2025, 1)
+
+        # Another worker invalidated: only the shared token changes here.
+        cache.set(reference_cache.GENERATION_KEY, "other-worker", timeout=None)
+        with self.assertNumQueries(1):
+            get_tags(2025, 1)
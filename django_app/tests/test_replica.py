@@ -0,0 +1,88 @@
+import io
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import date, time, timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from django_app import replica
+from django_app.models import WorkHour
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        replica._last_check = None
+        self.addCleanup(setattr, replica, "_last_check", None)
+
+    def test_primary_without_replica(self):
+        with replica.replica_reads():
+            self.assertEqual(replica.read_db(), "default")
+
+    def test_replica_only_inside_replica_reads(self):
+        with (
+            mock.patch.object(replica, "replica_configured", return_value=True),
+            mock.patch.object(replica, "replica_lag", return_value=timedelta(0)),
+        ):
+            self.assertEqual(replica.read_db(), "default")
+            with replica.replica_reads():
+                self.assertEqual(replica.read_db(), "replica")
+
+    def test_stale_replica_falls_back_to_primary(self):
+        with (
+            self.settings(REPLICA_MAX_STALENESS=60),
+            mock.patch.object(replica, "replica_configured", return_value=True),
+            mock.patch.object(
+                replica, "replica_lag", return_value=timedelta(minutes=5)
+            ) as lag,
+            replica.replica_reads(),
+        ):
+            self.assertEqual(replica.read_db(), "default")
+            replica.read_db()
+            # checked once per interval, not on every query
+            self.assertEqual(lag.call_count, 1)
+
+    def test_replica_is_never_migrated(self):
+        router = replica.ReplicaRouter()
+        self.assertFalse(router.allow_migrate("replica", "django_app"))
+        self.assertIsNone(router.allow_migrate("default", "django_app"))
+
+    def test_monthly_report_without_replica(self):
+        User.objects.create_user(username="admin", password="pass", is_staff=True)
+        self.client.login(username="admin", password="pass")
+        response = self.client.get(reverse("monthly-report"))
+        self.assertEqual(response.status_code, 200)
+
+
+class RefreshReplicaTests(TransactionTestCase):
+    # The backup needs to read the database, which a TestCase keeps locked
+    # in its open transaction.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "replica.sqlite3"
+
+    def test_snapshot_holds_data_and_heartbeat(self):
+        user = User.objects.create_user(username="jan")
+        WorkHour.objects.create(
+            user=user, date=date(2025, 1, 2), start_time=time(8), end_time=time(16)
+        )
+
+        call_command("refresh_replica", output=self.path, stdout=io.StringIO())
+
+        with closing(sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)) as db:
+            self.assertEqual(
+                db.execute("SELECT COUNT(*) FROM django_app_workhour").fetchone(), (1,)
+            )
+            self.assertEqual(
+                db.execute(
+                    "SELECT COUNT(*) FROM django_app_replicaheartbeat"
+                ).fetchone(),
+                (1,),
+            )
+            self.assertEqual(db.execute("PRAGMA journal_mode").fetchone(), ("delete",))
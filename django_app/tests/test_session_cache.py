@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from django_app.auth import user_cache_key
+
+
+class SessionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="jan", password="pass")
+        self.client.login(username="jan", password="pass")
+        self.url = reverse("dashboard") + "?year=2025&month=1"
+        self.client.get(self.url)
+
+    def test_dashboard_queries_only_month_data(self):
+        # change markers + month hours
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_is_cached_after_first_request(self):
+        self.assertEqual(cache.get(user_cache_key(self.user.pk)), self.user)
+
+    def test_user_change_invalidates_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
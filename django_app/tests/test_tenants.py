@@ -0,0 +1,134 @@
+import io
+import json
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django_app import reference_cache
+from django_app.archive import ARCHIVE_DB
+from django_app.jobs import JOB_HANDLERS, enqueue
+from django_app.models import AuditEntry, Job, MonthRevision, WorkHour, WorkTag
+from django_app.tenants import current_tenant, using_tenant
+from django_app.utils import get_tags
+
+# The two test databases stand in for two companies' files.
+TENANTS = override_settings(
+    TENANT_HOSTS={"a.example.com": "a", "b.example.com": "b"},
+    TENANT_DATABASES={"a": "default", "b": ARCHIVE_DB},
+    ALLOWED_HOSTS=[".example.com"],
+)
+
+
+@TENANTS
+class TenantTests(TestCase):
+    databases = {"default", ARCHIVE_DB}
+
+    def setUp(self):
+        reference_cache.invalidate()
+        with using_tenant("a"):
+            self.jan = User.objects.create_user(username="jan")
+        with using_tenant("b"):
+            self.admin = User.objects.create_user(username="admin", is_staff=True)
+            self.ola = User.objects.create_user(username="ola")
+            self.client.force_login(self.admin)
+
+    def get(self, host, url):
+        return self.client.get(url, HTTP_HOST=host)
+
+    def test_host_selects_database(self):
+        url = reverse("dashboard") + "?year=2025&month=1"
+
+        response = self.get("b.example.com", url)
+        self.assertEqual([u.username for u in response.context["users"]], ["ola"])
+        # the session only exists in company b's database
+        self.assertEqual(self.get("a.example.com", url).status_code, 302)
+
+    def test_unknown_host(self):
+        self.assertEqual(self.get("c.example.com", reverse("login")).status_code, 404)
+
+    def test_writes_stay_in_tenant_database(self):
+        changes = [[self.ola.id, 2, 8 * 60, 16 * 60, None, 0]]
+        # in a request the callbacks run at commit, still inside the tenant
+        with (
+            using_tenant("b"),
+            self.captureOnCommitCallbacks(using=ARCHIVE_DB, execute=True),
+        ):
+            self.client.post(
+                reverse("dashboard") + "?year=2025&month=1",
+                {"changes": json.dumps(changes)},
+                HTTP_HOST="b.example.com",
+            )
+
+        for model in (WorkHour, AuditEntry, MonthRevision):
+            with self.subTest(model=model.__name__):
+                self.assertTrue(model.objects.using(ARCHIVE_DB).exists())
+                self.assertFalse(model.objects.using("default").exists())
+        self.assertEqual(
+            WorkHour.objects.using(ARCHIVE_DB).get().date, date(2025, 1, 2)
+        )
+
+    def test_caches_are_per_tenant(self):
+        with using_tenant("a"):
+            WorkTag.objects.create(name="Budowa A", is_static=True)
+            cache.set("probe", "a")
+            self.assertEqual([t.name for t in get_tags(2025, 1)], ["Budowa A"])
+        with using_tenant("b"):
+            self.assertIsNone(cache.get("probe"))
+            self.assertEqual(get_tags(2025, 1), ())
+
+    def test_one_worker_runs_every_tenants_jobs(self):
+        JOB_HANDLERS["tenant"] = lambda params: (
+            "tenant.txt",
+            current_tenant().encode(),
+        )
+        self.addCleanup(JOB_HANDLERS.pop, "tenant")
+        jobs = {}
+        for tenant in ("a", "b"):
+            with using_tenant(tenant):
+                jobs[tenant] = enqueue("tenant", {})
+
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(JOB_RESULTS_DIR=directory):
+                call_command("run_jobs", once=True, stdout=io.StringIO())
+
+            for tenant, job in jobs.items():
+                with self.subTest(tenant=tenant), using_tenant(tenant):
+                    job.refresh_from_db()
+                    self.assertEqual(job.status, Job.DONE)
+                    path = Path(directory, tenant, job.result_file)
+                    self.assertEqual(path.read_text(), tenant)
+
+    def test_analytics_snapshot_per_tenant(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(ANALYTICS_DIR=directory):
+                for tenant in ("a", "b"):
+                    with using_tenant(tenant):
+                        call_command("export_analytics", stdout=io.StringIO())
+
+            self.assertEqual(
+                sorted(p.name for p in Path(directory).iterdir()), ["a", "b"]
+            )
+            names = json.loads(Path(directory, "b", "names.json").read_text())
+            self.assertEqual(names["user"], ["", "admin", "ola"])
+
+    def test_benchmarks_refuse_tenant_mode(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_grid", stdout=io.StringIO())
+
+    def test_migrate_tenants(self):
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(TENANT_DB_DIR=directory):
+                call_command("migrate_tenants", stdout=out)
+
+        self.assertIn("a (default)", out.getvalue())
+        self.assertIn(f"b ({ARCHIVE_DB})", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("migrate_tenants", "c", stdout=out)
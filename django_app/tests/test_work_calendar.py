@@ -0,0 +1,55 @@
+from dataclasses import FrozenInstanceError
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase
+
+from django_app.utils import get_days_list, get_days_list_editable
+from django_app.work_calendar import (
+    easter_sunday,
+    get_month_calendar,
+    polish_holidays,
+)
+
+
+class WorkCalendarTests(SimpleTestCase):
+    def test_easter(self):
+        self.assertEqual(easter_sunday(2024), date(2024, 3, 31))
+        self.assertEqual(easter_sunday(2025), date(2025, 4, 20))
+        self.assertEqual(easter_sunday(2026), date(2026, 4, 5))
+
+    def test_movable_holidays(self):
+        holidays = polish_holidays(2025)
+        self.assertEqual(holidays[date(2025, 4, 21)], "Poniedziałek Wielkanocny")
+        self.assertEqual(holidays[date(2025, 6, 8)], "Zielone Świątki")
+        self.assertEqual(holidays[date(2025, 6, 19)], "Boże Ciało")
+        self.assertIn(date(2025, 12, 24), holidays)
+        self.assertNotIn(date(2024, 12, 24), polish_holidays(2024))
+
+    def test_month_days(self):
+        january = get_month_calendar(2025, 1)
+        self.assertEqual(len(january.days), 31)
+
+        first = january.days[0]
+        self.assertEqual(first.day, 1)
+        self.assertEqual(first.weekday, "Środa")
+        self.assertEqual(first.holiday, "Nowy Rok")
+        self.assertTrue(january.days[3].is_weekend)
+
+        # 31 days - 8 weekend days - 1 and 6 January
+        self.assertEqual(january.working_days, 21)
+        self.assertEqual(january.working_hours, 168)
+
+    def test_memoized_and_immutable(self):
+        self.assertIs(get_month_calendar(2025, 5), get_month_calendar(2025, 5))
+        self.assertIs(get_days_list(2025, 5), get_month_calendar(2025, 5).days)
+        with self.assertRaises(FrozenInstanceError):
+            get_days_list(2025, 5)[0].day = 2  # type: ignore[misc]
+
+    def test_editable_days(self):
+        today = date.today()
+        days = get_days_list_editable(today.year, today.month)
+        by_date = {d.date: d for d in days}
+        self.assertTrue(by_date[today].editable)
+        old_day = today - timedelta(days=4)
+        if old_day in by_date:
+            self.assertFalse(by_date[old_day].editable)
@@ -5,9 +5,24 @@ from . import auth, views
 
 urlpatterns = [
     path("", views.dashboard, name="dashboard"),
+    path("dashboard/events", views.admin_dashboard_events, name="dashboard-events"),
     path("monthly-report", views.admin_monthly_report, name="monthly-report"),
     path("employer-report", views.admin_employer_report, name="employer-report"),
     path("machines-report", views.admin_machines_report, name="machines-report"),
+    path("import", views.admin_import, name="import"),
+    path("audit-log", views.admin_audit_log, name="audit-log"),
+    path("pivot-report", views.admin_pivot_report, name="pivot-report"),
+    path("machine-timeline", views.admin_machine_timeline, name="machine-timeline"),
+    path("machine-billing", views.admin_machine_billing, name="machine-billing"),
+    path(
+        "api/machines/<int:machine_id>/timeline",
+        views.machine_timeline_json,
+        name="machine-timeline-json",
+    ),
+    path("yearly-report", views.admin_yearly_report, name="yearly-report"),
+    path("jobs/<int:job_id>", views.job_status, name="job-status"),
+    path("jobs/<int:job_id>/download", views.job_download, name="job-download"),
+    path("api/punch-events", views.punch_events, name="punch-events"),
     path(
         "login/", auth_views.LoginView.as_view(template_name="login.html"), name="login"
     ),
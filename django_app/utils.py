@@ -1,36 +1,43 @@
-import calendar
-from collections.abc import Iterable
+import json
+from collections.abc import Iterable, Sequence
 from datetime import date, time, timedelta
-from typing import Any, cast
+from typing import cast
 
 from django.contrib import messages
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models
+from django.db.models import F
 from django.http import HttpRequest
 
-from .constants import POLISH_MONTHS, POLISH_WEEKDAYS
-from .models import MachineWorkLog, WorkHour, WorkTag
+from . import reference_cache, tenants
+from .audit import AuditBuffer, Snapshot, snapshot
+from .constants import POLISH_MONTHS
+from .models import Machine, MachineWorkLog, WorkHour, WorkTag
+from .revisions import mark_dates_changed
+from .work_calendar import (
+    CalendarDay,
+    EditableDay,
+    get_editable_days,
+    get_month_calendar,
+)
 
+GRID_CHANGES_FIELD = "changes"
+GRID_CONFLICTS_SESSION_KEY = "grid_conflicts"
+
+# (user_id, date) -> (start, end, tag_id, version the editor saw, 0 for empty)
+GridChanges = dict[tuple[int, date], tuple[time | None, time | None, int | None, int]]
 
-def get_days_list(year: int, month: int) -> list[dict[str, int | str]]:
-    num_days = calendar.monthrange(year, month)[1]
-    return [
-        {"day": d, "weekday": POLISH_WEEKDAYS[date(year, month, d).weekday()]}
-        for d in range(1, num_days + 1)
-    ]
 
+class GridChangeError(ValueError):
+    pass
 
-def get_days_list_editable(year: int, month: int) -> list[dict[str, int | str]]:
-    today = date.today()
-    max_edit_day = today - timedelta(days=3)
 
-    days = get_days_list(year=year, month=month)
+def get_days_list(year: int, month: int) -> tuple[CalendarDay, ...]:
+    return get_month_calendar(year, month).days
 
-    for d in days:
-        day_date = date(year, month, d["day"])  # type: ignore[arg-type]
-        d["editable"] = day_date >= max_edit_day
 
-    return days
+def get_days_list_editable(year: int, month: int) -> tuple[EditableDay, ...]:
+    return get_editable_days(year, month, date.today() - timedelta(days=3))
 
 
 def get_months_list() -> list[dict[str, str | int]]:
@@ -40,27 +47,65 @@ def get_months_list() -> list[dict[str, str | int]]:
     return months
 
 
-def get_total_hours(entries: Iterable[WorkHour]) -> float:
-    return sum(e.total_hours for e in entries) if entries else 0
+def is_valid_time_range(start_time: time, end_time: time) -> bool:
+    return end_time >= start_time
+
+
+def is_editable_date(date_obj: date) -> bool:
+    return date_obj >= date.today() - timedelta(days=3)
+
+
+def get_tags(year: int, month: int) -> tuple[WorkTag, ...]:
+    return reference_cache.cached(
+        ("tags", year, month),
+        lambda: tuple(
+            WorkTag.objects.filter(
+                models.Q(is_static=True) | models.Q(month=month, year=year)
+            )
+        ),
+    )
 
 
-def get_tags(year: int, month: int) -> Iterable[WorkTag]:
-    return WorkTag.objects.filter(
-        models.Q(is_static=True) | models.Q(month=month, year=year)
+def get_machines() -> tuple[Machine, ...]:
+    return reference_cache.cached(
+        ("machines",), lambda: tuple(Machine.objects.all().order_by("name"))
     )
 
 
+def get_workers() -> tuple[User, ...]:
+    return reference_cache.cached(
+        ("workers",),
+        lambda: tuple(User.objects.filter(is_staff=False).order_by("username")),
+    )
+
+
+def get_month_users(year: int, month: int) -> list[User]:
+    # Active workers plus inactive ones who still have hours in this month.
+    workers = get_workers()
+    inactive_ids = [u.id for u in workers if not u.is_active]
+    with_hours: set[int] = set()
+    if inactive_ids:
+        with_hours = set(
+            WorkHour.objects.filter(
+                user_id__in=inactive_ids, date__year=year, date__month=month
+            ).values_list("user_id", flat=True)
+        )
+    return [u for u in workers if u.is_active or u.id in with_hours]
+
+
+@tenants.atomic
 def save_work_hours(
     request: HttpRequest,
-    days: list[dict[str, Any]],
+    days: Sequence[CalendarDay],
     year: int,
     month: int,
     is_employer: bool = False,
 ) -> None:
     is_error = False
+    audit = AuditBuffer(editor=cast(User, request.user))
     for day in days:
-        day_num = day["day"]
-        date_obj = date(year, month, day_num)
+        day_num = day.day
+        date_obj = day.date
 
         start_h = request.POST.get(f"start_hour_{day_num}")
         start_m = request.POST.get(f"start_minute_{day_num}")
@@ -72,6 +117,7 @@ def save_work_hours(
         obj = WorkHour.objects.filter(
             user=cast(User, request.user), date=date_obj
         ).first()
+        before = snapshot(obj)
 
         if not (start_h and start_m and end_h and end_m):
             if tag_id:
@@ -79,19 +125,20 @@ def save_work_hours(
                     obj.tag = tag
                     obj.save()
                 else:
-                    WorkHour.objects.create(
+                    obj = WorkHour.objects.create(
                         user=cast(User, request.user),
                         date=date_obj,
                         tag=tag,
                         start_time=None,
                         end_time=None,
                     )
+                audit.work_hour(request.user.pk, date_obj, before, snapshot(obj))
             continue
 
         start_time = time(int(start_h), int(start_m))
         end_time = time(int(end_h), int(end_m))
 
-        if end_time < start_time:
+        if not is_valid_time_range(start_time, end_time):
             is_error = True
             messages.error(
                 request,
@@ -99,39 +146,46 @@ def save_work_hours(
             )
             continue
 
-        if not is_employer and date_obj < date.today() - timedelta(days=3):
+        if not is_employer and not is_editable_date(date_obj):
             messages.error(
                 request, f"Dzień {day_num}: nie można edytować starszych zapisów."
             )
             is_error = True
             continue
 
-        WorkHour.objects.update_or_create(
-            user=request.user,
-            date=date_obj,
-            defaults={
-                "start_time": start_time,
-                "end_time": end_time,
-                "tag": tag,
-            },
-        )
+        if obj:
+            obj.start_time = start_time
+            obj.end_time = end_time
+            obj.tag = tag
+            obj.save()
+        else:
+            obj = WorkHour.objects.create(
+                user=cast(User, request.user),
+                date=date_obj,
+                start_time=start_time,
+                end_time=end_time,
+                tag=tag,
+            )
+        audit.work_hour(request.user.pk, date_obj, before, snapshot(obj))
 
     if not is_error:
         messages.success(request, "Dane zapisano poprawnie.")
 
 
+@tenants.atomic
 def save_admin_work_hours(
     request: HttpRequest,
     users: list[User],
-    days: list[dict[str, Any]],
+    days: Sequence[CalendarDay],
     year: int,
     month: int,
 ) -> None:
     is_error = False
+    audit = AuditBuffer(editor=cast(User, request.user))
     for user in users:
         for day in days:
-            day_num = day["day"]
-            date_obj = date(year, month, day_num)
+            day_num = day.day
+            date_obj = day.date
 
             prefix = f"user_{user.id}_day_{day_num}"
 
@@ -143,6 +197,7 @@ def save_admin_work_hours(
 
             tag = WorkTag.objects.filter(id=tag_id).first() if tag_id else None
             obj = WorkHour.objects.filter(user=user, date=date_obj).first()
+            before = snapshot(obj)
 
             if not (start_h and start_m and end_h and end_m):
                 if tag:
@@ -152,19 +207,20 @@ def save_admin_work_hours(
                         obj.end_time = None
                         obj.save()
                     else:
-                        WorkHour.objects.create(
+                        obj = WorkHour.objects.create(
                             user=user,
                             date=date_obj,
                             tag=tag,
                             start_time=None,
                             end_time=None,
                         )
+                    audit.work_hour(user.id, date_obj, before, snapshot(obj))
                 continue
 
             start_time = time(int(start_h), int(start_m))
             end_time = time(int(end_h), int(end_m))
 
-            if end_time < start_time:
+            if not is_valid_time_range(start_time, end_time):
                 is_error = True
                 messages.error(
                     request,
@@ -178,41 +234,272 @@ def save_admin_work_hours(
                 obj.tag = tag
                 obj.save()
             else:
-                WorkHour.objects.create(
+                obj = WorkHour.objects.create(
                     user=user,
                     date=date_obj,
                     start_time=start_time,
                     end_time=end_time,
                     tag=tag,
                 )
+            audit.work_hour(user.id, date_obj, before, snapshot(obj))
     if not is_error:
         messages.success(request, "Dane zapisano poprawnie.")
 
 
-def get_month_machine_logs(year: int, month: int) -> dict[int, list[MachineWorkLog]]:
-    logs = MachineWorkLog.objects.filter(
-        date__year=year, date__month=month
-    ).select_related("machine")
+def _minutes_to_time(value: object) -> time | None:
+    if value is None:
+        return None
+    if type(value) is not int or not 0 <= value < 24 * 60:
+        raise GridChangeError(f"nieprawidłowa godzina: {value!r}")
+    return time(*divmod(value, 60))
+
+
+def parse_grid_changes(
+    raw: str, user_ids: set[int], days: Sequence[CalendarDay]
+) -> GridChanges:
+    # The admin grid script sends only the edited cells, as a JSON list of
+    # [user_id, day, start, end, tag_id, version] with times in minutes after
+    # midnight (null when not set) and the version the cell was rendered with.
+    try:
+        cells = json.loads(raw)
+    except ValueError:
+        raise GridChangeError("nieprawidłowy JSON") from None
+    if not isinstance(cells, list):
+        raise GridChangeError("oczekiwano listy komórek")
+
+    dates = {d.day: d.date for d in days}
+    changes: GridChanges = {}
+    for cell in cells:
+        if not isinstance(cell, list) or len(cell) != 6:
+            raise GridChangeError(f"nieprawidłowa komórka: {cell!r}")
+        user_id, day, start, end, tag_id, version = cell
+        # type() rather than isinstance: True would pass as 1, and lists or
+        # objects cannot be looked up in the sets at all
+        if (
+            type(user_id) is not int
+            or type(day) is not int
+            or user_id not in user_ids
+            or day not in dates
+        ):
+            raise GridChangeError(f"nieznana komórka: {cell!r}")
+        if tag_id is not None and type(tag_id) is not int:
+            raise GridChangeError(f"nieprawidłowy tag: {tag_id!r}")
+        if type(version) is not int or version < 0:
+            raise GridChangeError(f"nieprawidłowa wersja: {version!r}")
+        changes[(user_id, dates[day])] = (
+            _minutes_to_time(start),
+            _minutes_to_time(end),
+            tag_id,
+            version,
+        )
+    return changes
+
+
+def _create_work_hours(objs: list[WorkHour]) -> list[WorkHour]:
+    # Returns the rows someone else created first.
+    try:
+        with tenants.atomic():
+            WorkHour.objects.bulk_create(objs)
+        return []
+    except IntegrityError:
+        pass
+    taken = []
+    for obj in objs:
+        try:
+            with tenants.atomic():
+                obj.save(force_insert=True)
+        except IntegrityError:
+            taken.append(obj)
+    return taken
+
+
+@tenants.atomic
+def save_admin_grid_changes(
+    request: HttpRequest,
+    users: list[User],
+    days: Sequence[CalendarDay],
+    year: int,
+    month: int,
+) -> None:
+    # Same rules as save_admin_work_hours, but only for the cells in the
+    # payload, and each one only while it still has the version the editor
+    # saw: updates carry it in their WHERE clause and new rows rely on the
+    # (user, date) unique constraint. Cells changed by someone else in the
+    # meantime are reported back instead of overwritten; nothing is locked.
+    usernames = {u.id: u.username for u in users}
+    try:
+        changes = parse_grid_changes(
+            request.POST[GRID_CHANGES_FIELD], set(usernames), days
+        )
+    except GridChangeError as e:
+        messages.error(
+            request, f"Nieprawidłowe dane formularza ({e}), nic nie zapisano."
+        )
+        return
 
-    result: dict[int, list[MachineWorkLog]] = {}
-    num_days = calendar.monthrange(year, month)[1]
-    for d in range(1, num_days + 1):
-        result[d] = []
+    is_error = False
+    audit = AuditBuffer(editor=cast(User, request.user))
+    tag_ids = {tag_id for _, _, tag_id, _ in changes.values() if tag_id is not None}
+    known_tags = set(
+        WorkTag.objects.filter(id__in=tag_ids).values_list("id", flat=True)
+        if tag_ids
+        else ()
+    )
+    existing = {
+        (wh.user_id, wh.date): wh
+        for wh in WorkHour.objects.filter(
+            user_id__in={user_id for user_id, _ in changes},
+            date__in={date_obj for _, date_obj in changes},
+        )
+    }
+
+    conflicts: list[tuple[int, date]] = []
+    to_create: list[WorkHour] = []
+    saved: list[tuple[WorkHour, Snapshot | None]] = []
+    for key, (start_time, end_time, tag_id, version) in changes.items():
+        user_id, date_obj = key
+        if tag_id not in known_tags:
+            tag_id = None
+        if start_time is None or end_time is None:
+            if tag_id is None:
+                continue
+            start_time = end_time = None
+        elif not is_valid_time_range(start_time, end_time):
+            is_error = True
+            messages.error(
+                request,
+                f"{usernames[user_id]} – {date_obj.day}: "
+                "koniec pracy nie może być wcześniejszy niż początek.",
+            )
+            continue
+
+        obj = existing.get(key)
+        if (obj.version if obj is not None else 0) != version:
+            conflicts.append(key)
+            continue
+        before = snapshot(obj)
+        if obj is None:
+            obj = WorkHour(user_id=user_id, date=date_obj)
+            to_create.append(obj)
+        elif not WorkHour.objects.filter(pk=obj.pk, version=version).update(
+            start_time=start_time,
+            end_time=end_time,
+            tag_id=tag_id,
+            version=F("version") + 1,
+        ):
+            conflicts.append(key)
+            continue
+        obj.start_time = start_time
+        obj.end_time = end_time
+        obj.tag_id = tag_id
+        saved.append((obj, before))
+
+    taken = _create_work_hours(to_create)
+    conflicts.extend((obj.user_id, obj.date) for obj in taken)
+    for obj, before in saved:
+        if obj not in taken:
+            audit.work_hour(obj.user_id, obj.date, before, snapshot(obj))
+    mark_dates_changed((obj.user_id, obj.date) for obj, _ in saved)
+
+    if conflicts:
+        is_error = True
+        request.session[GRID_CONFLICTS_SESSION_KEY] = [
+            [user_id, date_obj.isoformat()] for user_id, date_obj in conflicts
+        ]
+        for user_id, date_obj in sorted(conflicts):
+            messages.warning(
+                request,
+                f"{usernames[user_id]} – {date_obj.day}: wpis został w międzyczasie "
+                "zmieniony przez kogoś innego, Twoja zmiana nie została zapisana.",
+            )
+    if not is_error:
+        messages.success(request, "Dane zapisano poprawnie.")
+
+
+def pop_grid_conflicts(request: HttpRequest) -> dict[int, set[date]]:
+    conflicts: dict[int, set[date]] = {}
+    for user_id, day in request.session.pop(GRID_CONFLICTS_SESSION_KEY, ()):
+        conflicts.setdefault(user_id, set()).add(date.fromisoformat(day))
+    return conflicts
 
-    for log in logs:
-        result[log.date.day].append(log)
 
-    return result
+MachineRow = tuple[int, int, int]  # machine id, start and end in minutes
+
+
+def _minutes(value: time | None) -> int:
+    return -1 if value is None else value.hour * 60 + value.minute
+
+
+def machine_day_token(logs: Iterable[MachineWorkLog]) -> str:
+    # What the machines form saw for one day: id and version of every log
+    # plus its values, so a save can tell "not edited here" from "changed
+    # by someone else since".
+    return ",".join(
+        sorted(
+            f"{log.pk}.{log.version}.{log.machine_id}."
+            f"{_minutes(log.start_time)}.{_minutes(log.end_time)}"
+            for log in logs
+        )
+    )
+
+
+def _parse_machine_day_token(
+    token: str,
+) -> tuple[set[tuple[int, int]], list[MachineRow]]:
+    versions: set[tuple[int, int]] = set()
+    rows: list[MachineRow] = []
+    for item in filter(None, token.split(",")):
+        pk, version, machine_id, start, end = map(int, item.split("."))
+        versions.add((pk, version))
+        rows.append((machine_id, start, end))
+    return versions, sorted(rows)
+
+
+class _StaleMachineDay(Exception):
+    pass
+
+
+def _replace_machine_day(
+    date_obj: date, current: list[MachineWorkLog], rows: list[MachineRow]
+) -> list[MachineWorkLog]:
+    # Deletes the day's logs only at the versions read before, and gives up
+    # (rolling back to the savepoint) if any of them changed or a new one
+    # appeared in the meantime.
+    with tenants.atomic():
+        seen = models.Q(pk__in=[])
+        for log in current:
+            seen |= models.Q(pk=log.pk, version=log.version)
+        deleted, _ = MachineWorkLog.objects.filter(seen, date=date_obj).delete()
+        if (
+            deleted != len(current)
+            or MachineWorkLog.objects.filter(date=date_obj).exists()
+        ):
+            raise _StaleMachineDay
+        return MachineWorkLog.objects.bulk_create(
+            MachineWorkLog(
+                machine_id=machine_id,
+                date=date_obj,
+                start_time=time(*divmod(start, 60)),
+                end_time=time(*divmod(end, 60)),
+            )
+            for machine_id, start, end in rows
+        )
 
 
+@tenants.atomic
 def save_machine_work(
-    request: HttpRequest, days: list[dict[str, Any]], year: int, month: int
+    request: HttpRequest, days: Sequence[CalendarDay], year: int, month: int
 ) -> None:
     is_error = False
+    audit = AuditBuffer(editor=cast(User, request.user))
+
+    previous: dict[date, list[MachineWorkLog]] = {}
+    for log in MachineWorkLog.objects.filter(date__in=[d.date for d in days]):
+        previous.setdefault(log.date, []).append(log)
 
     for day in days:
-        day_num = day["day"]
-        date_obj = date(year, month, day_num)
+        day_num = day.day
+        date_obj = day.date
 
         count_raw = request.POST.get(f"day_{day_num}_count")
         if count_raw is not None:
@@ -226,8 +513,7 @@ def save_machine_work(
                 else:
                     break
 
-        MachineWorkLog.objects.filter(date=date_obj).delete()
-
+        rows: list[MachineRow] = []
         for i in range(count):
             machine_id = request.POST.get(f"day_{day_num}_machine_{i}")
             start_h = request.POST.get(f"day_{day_num}_start_hour_{i}")
@@ -241,7 +527,7 @@ def save_machine_work(
             start_time = time(int(start_h), int(start_m))
             end_time = time(int(end_h), int(end_m))
 
-            if end_time < start_time:
+            if not is_valid_time_range(start_time, end_time):
                 is_error = True
                 messages.error(
                     request,
@@ -249,12 +535,43 @@ def save_machine_work(
                 )
                 continue
 
-            MachineWorkLog.objects.create(
-                machine_id=machine_id,
-                date=date_obj,
-                start_time=start_time,
-                end_time=end_time,
+            rows.append((int(machine_id), _minutes(start_time), _minutes(end_time)))
+
+        current = previous.get(date_obj, [])
+        token = request.POST.get(f"day_{day_num}_token")
+        if token is None:
+            # form without versions: the day is replaced as before
+            MachineWorkLog.objects.filter(date=date_obj).delete()
+            saved = MachineWorkLog.objects.bulk_create(
+                MachineWorkLog(
+                    machine_id=machine_id,
+                    date=date_obj,
+                    start_time=time(*divmod(start, 60)),
+                    end_time=time(*divmod(end, 60)),
+                )
+                for machine_id, start, end in rows
             )
+        else:
+            try:
+                seen_versions, seen_rows = _parse_machine_day_token(token)
+                if sorted(rows) == seen_rows:
+                    continue
+                if {(log.pk, log.version) for log in current} != seen_versions:
+                    raise _StaleMachineDay
+                saved = _replace_machine_day(date_obj, current, rows)
+            except (ValueError, _StaleMachineDay):
+                is_error = True
+                messages.warning(
+                    request,
+                    f"Dzień {day_num}: wpisy maszyn zostały w międzyczasie "
+                    "zmienione przez kogoś innego, Twoje zmiany z tego dnia "
+                    "nie zostały zapisane.",
+                )
+                continue
+
+        audit.machine_day(date_obj, current, saved)
+        if saved:
+            mark_dates_changed([(None, date_obj)])
 
     if not is_error:
         messages.success(request, "Dane maszyn zapisano poprawnie.")
@@ -1,23 +1,55 @@
+import calendar
+import csv
+import io
+import json
 from collections import defaultdict
 from datetime import date
 from typing import cast
 
-from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
-from django.db import models
-from django.http import HttpRequest
-from django.shortcuts import redirect, render
-
-from .constants import HOURS_LIST, MINUTES_LIST
-from .models import Machine, MachineWorkLog, WorkHour
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Paginator
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .archive import is_archived, route_month_reads
+from .conditional import conditional_month_page
+from .importers import IMPORTERS, ImportFormatError
+from .jobs import enqueue, results_dir
+from .live import latest_change_id, month_events
+from .models import AuditEntry, Job, Machine, WorkTag
+from .month_context import get_month_context, month_from_request
+from .punch import MAX_BATCH_SIZE, get_terminal, ingest_punch_events
+from .replica import reads_from_replica
+from .reports import (
+    YEARLY_REPORT,
+    billing_months,
+    machine_billing,
+    machine_timeline,
+    pivot_report,
+    timeline_row,
+)
+from .tenants import current_tenant
 from .utils import (
-    get_days_list,
-    get_days_list_editable,
-    get_month_machine_logs,
-    get_months_list,
-    get_tags,
-    get_total_hours,
+    GRID_CHANGES_FIELD,
+    get_machines,
+    pop_grid_conflicts,
+    save_admin_grid_changes,
     save_admin_work_hours,
     save_machine_work,
     save_work_hours,
@@ -32,118 +64,109 @@ def dashboard(request: HttpRequest):
 
 
 @login_required
+@route_month_reads
+@conditional_month_page(per_user=True)
 def user_dashboard(request: HttpRequest):
-    today = date.today()
-    year = int(request.GET.get("year", today.year))
-    month = int(request.GET.get("month", today.month))
-
-    days = get_days_list_editable(year=year, month=month)
+    ctx = get_month_context(request, per_user=True)
+    year, month = ctx.year, ctx.month
 
     if request.method == "POST":
-        save_work_hours(request=request, days=days, year=year, month=month)
+        save_work_hours(request=request, days=ctx.editable_days, year=year, month=month)
         return redirect(f"/?month={month}&year={year}")
 
-    today_day = today.day if (year == today.year and month == today.month) else None
-    work_hours = WorkHour.objects.filter(
-        user=cast(User, request.user), date__year=year, date__month=month
-    )
-
     return render(
         request,
         "user_dashboard.html",
-        {
-            "days": days,
-            "month": month,
-            "year": year,
-            "hours": {e.date.day: e for e in work_hours},
-            "total_hours": get_total_hours(work_hours),
-            "today_day": today_day,  # to recolor current day
-            "tags": get_tags(year=year, month=month),
-            "months_list": get_months_list(),
-            "years_list": list(range(today.year - 2, today.year + 3)),
-            "hours_list": HOURS_LIST,
-            "minutes_list": MINUTES_LIST,
-        },
+        ctx.page_context(
+            days=ctx.editable_days,
+            hours=ctx.hours,
+            running_hours=ctx.running_hours,
+            week_hours=ctx.week_hours,
+            total_hours=ctx.total_hours,
+            tags=ctx.tags,
+        ),
+        using=settings.GRID_TEMPLATE_ENGINE,
     )
 
 
 @login_required
 @user_passes_test(lambda u: u.is_staff)
+@route_month_reads
+@conditional_month_page()
 def admin_dashboard(request: HttpRequest):
-    today = date.today()
-    year = int(request.GET.get("year", today.year))
-    month = int(request.GET.get("month", today.month))
-
-    days = get_days_list(year=year, month=month)
-
-    User = get_user_model()
-
-    users = list(
-        User.objects.filter(is_staff=False)
-        .filter(
-            models.Q(is_active=True)
-            | models.Q(workhour__date__year=year, workhour__date__month=month)
-        )
-        .distinct()
-        .order_by("username")
-    )
+    ctx = get_month_context(request)
+    year, month = ctx.year, ctx.month
 
     if request.method == "POST":
-        save_admin_work_hours(
-            request=request,
-            users=users,
-            days=days,
-            year=year,
-            month=month,
+        save = (
+            save_admin_grid_changes
+            if GRID_CHANGES_FIELD in request.POST
+            else save_admin_work_hours
         )
+        save(request=request, users=ctx.users, days=ctx.days, year=year, month=month)
         return redirect(f"/?month={month}&year={year}")
 
-    work_hours = WorkHour.objects.select_related("user", "tag").filter(
-        date__year=year, date__month=month, user__in=users
-    )
-
-    entries_dict = {u.id: {} for u in users}  # type: ignore[var-annotated]
-    total_hours_dict = {u.id: 0 for u in users}
-
-    for entry in work_hours:
-        entries_dict[entry.user.id][entry.date.day] = entry
-        total_hours_dict[entry.user.id] += entry.total_hours  # type: ignore[assignment]
-
-    today_day = today.day if (year == today.year and month == today.month) else None
+    for user_id, dates in pop_grid_conflicts(request).items():
+        if user_id in ctx.grid:
+            ctx.grid[user_id].conflicts.update(
+                d.day for d in dates if (d.year, d.month) == (year, month)
+            )
 
     return render(
         request,
         "admin_dashboard.html",
-        {
-            "days": days,
-            "users": users,
-            "entries_dict": entries_dict,
-            "total_hours_dict": total_hours_dict,
-            "tags": get_tags(year=year, month=month),
-            "today_day": today_day,
-            "month": month,
-            "year": year,
-            "months_list": get_months_list(),
-            "years_list": list(range(today.year - 2, today.year + 3)),
-            "hours_list": HOURS_LIST,
-            "minutes_list": MINUTES_LIST,
-        },
+        ctx.page_context(
+            days=ctx.days,
+            users=ctx.users,
+            grid=ctx.grid,
+            total_hours_dict=ctx.total_hours_dict,
+            tags=ctx.tags,
+            # A stream holds its connection for minutes; under WSGI that is a
+            # whole worker, so the page only opens one when served over ASGI.
+            live_updates=isinstance(request, ASGIRequest),
+            events_after=latest_change_id(),
+        ),
+        using=settings.GRID_TEMPLATE_ENGINE,
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+async def admin_dashboard_events(request: HttpRequest):
+    # Server-Sent Events for the admin grid: the cells other admins, users
+    # and terminals change while the page is open (see live.month_events).
+    if not isinstance(request, ASGIRequest):
+        # see admin_dashboard; 204 stops the browser reconnecting
+        return HttpResponse(status=204)
+    year, month = month_from_request(request)
+    if await sync_to_async(is_archived)(year):
+        # archived months never change; 204 stops the browser reconnecting
+        return HttpResponse(status=204)
+
+    last_id = request.headers.get("Last-Event-ID") or request.GET.get("after", "")
+    if last_id.isdigit():
+        after = int(last_id)
+    else:
+        after = await sync_to_async(latest_change_id)()
+    response = StreamingHttpResponse(
+        month_events(current_tenant(), year, month, after),
+        content_type="text/event-stream",
     )
+    response["Cache-Control"] = "no-cache"
+    return response
 
 
 @login_required
 @user_passes_test(lambda u: u.is_staff)
+@route_month_reads
+@reads_from_replica
+@conditional_month_page()
 def admin_monthly_report(request: HttpRequest):  #! Roboty
-    today = date.today()
-    year = int(request.GET.get("year", today.year))
-    month = int(request.GET.get("month", today.month))
+    ctx = get_month_context(request)
 
     # Tag report
-    work_hours = WorkHour.objects.filter(
-        date__year=year, date__month=month, user__is_staff=False
-    )
     tag_sums: dict[str, float] = defaultdict(float)
-    for wh in work_hours:
+    for wh in ctx.work_hours:
         if wh.tag:
             tag_sums[wh.tag.name] += wh.total_hours
     tag_hours = sorted(
@@ -152,16 +175,13 @@ def admin_monthly_report(request: HttpRequest):  #! Roboty
     )
 
     # Machine report
-    machine_logs = MachineWorkLog.objects.filter(
-        date__year=year, date__month=month
-    ).select_related("machine")
-
     machine_sums: dict[str, float] = defaultdict(float)
 
-    for log in machine_logs:
-        hours = log.total_hours
-        if hours > 0:
-            machine_sums[log.machine.name] += hours
+    for logs in ctx.machine_logs.values():
+        for log in logs:
+            hours = log.total_hours
+            if hours > 0:
+                machine_sums[log.machine.name] += hours
 
     machine_hours = sorted(
         [(machine, hours) for machine, hours in machine_sums.items() if hours > 0],
@@ -171,85 +191,396 @@ def admin_monthly_report(request: HttpRequest):  #! Roboty
     return render(
         request,
         "admin_monthly_report.html",
+        ctx.page_context(tag_hours=tag_hours, machine_hours=machine_hours),
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@route_month_reads
+@conditional_month_page(per_user=True)
+def admin_employer_report(request: HttpRequest):  #!Pracodawca
+    ctx = get_month_context(request, per_user=True)
+    year, month = ctx.year, ctx.month
+
+    if request.method == "POST":
+        save_work_hours(
+            request, days=ctx.days, year=year, month=month, is_employer=True
+        )
+        return redirect(f"/employer-report?month={month}&year={year}")
+
+    return render(
+        request,
+        "admin_employer_report.html",
+        ctx.page_context(
+            days=ctx.days,
+            hours=ctx.hours,
+            total_hours=ctx.total_hours,
+            tags=ctx.tags,
+        ),
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@route_month_reads
+@conditional_month_page()
+def admin_machines_report(request: HttpRequest):  #! Maszyny
+    ctx = get_month_context(request)
+    year, month = ctx.year, ctx.month
+
+    if request.method == "POST":
+        save_machine_work(request, ctx.days, year, month)
+        return redirect(f"/machines-report?month={month}&year={year}")
+
+    return render(
+        request,
+        "admin_machines_report.html",
+        ctx.page_context(
+            days=ctx.days,
+            machines=ctx.machines,
+            logs_dict=ctx.machine_logs,
+            machine_tokens=ctx.machine_tokens,
+        ),
+        using=settings.GRID_TEMPLATE_ENGINE,
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def admin_import(request: HttpRequest):  #! Import CSV
+    today = date.today()
+    year = int(request.GET.get("year", today.year))
+    month = int(request.GET.get("month", today.month))
+
+    if request.method == "POST":
+        importer = IMPORTERS.get(request.POST.get("kind", ""))
+        upload = request.FILES.get("file")
+        if importer is None or upload is None:
+            messages.error(request, "Wybierz rodzaj danych i plik CSV.")
+            return redirect(f"/import?month={month}&year={year}")
+
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            result = importer(stream, editor=cast(User, request.user))
+        except (ImportFormatError, UnicodeDecodeError) as e:
+            messages.error(request, f"Nie można wczytać pliku: {e}")
+            return redirect(f"/import?month={month}&year={year}")
+
+        for line, error in result.errors:
+            messages.error(request, f"Wiersz {line}: {error}")
+        if result.rejected > len(result.errors):
+            messages.error(
+                request,
+                f"... oraz {result.rejected - len(result.errors)} kolejnych błędów.",
+            )
+        messages.success(
+            request,
+            f"Zaimportowano {result.imported} wierszy, odrzucono {result.rejected}.",
+        )
+        return redirect(f"/import?month={month}&year={year}")
+
+    return render(
+        request,
+        "admin_import.html",
         {
             "month": month,
             "year": year,
-            "tag_hours": tag_hours,
-            "machine_hours": machine_hours,
-            "months_list": get_months_list(),
-            "years_list": list(range(today.year - 2, today.year + 3)),
         },
     )
 
 
+def _parse_month(value: str | None, default: date) -> date:
+    try:
+        year, month = (int(part) for part in (value or "").split("-"))
+        return date(year, month, 1)
+    except ValueError:
+        return default
+
+
 @login_required
 @user_passes_test(lambda u: u.is_staff)
-def admin_employer_report(request: HttpRequest):  #!Pracodawca
+@reads_from_replica
+def admin_pivot_report(request: HttpRequest):  #! Pracownicy x roboty
+    today = date.today()
+    year = int(request.GET.get("year", today.year))
+    month = int(request.GET.get("month", today.month))
+
+    month_from = _parse_month(request.GET.get("from"), date(year, month, 1))
+    month_to = max(_parse_month(request.GET.get("to"), month_from), month_from)
+    date_to = month_to.replace(
+        day=calendar.monthrange(month_to.year, month_to.month)[1]
+    )
+    by_month = request.GET.get("by_month") == "1"
+
+    return render(
+        request,
+        "admin_pivot_report.html",
+        {
+            "report": pivot_report(month_from, date_to, by_month=by_month),
+            "month_from": month_from,
+            "month_to": month_to,
+            "by_month": by_month,
+            "month": month,
+            "year": year,
+        },
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@reads_from_replica
+def admin_machine_billing(request: HttpRequest):  #! Rozliczenie maszyn
     today = date.today()
     year = int(request.GET.get("year", today.year))
     month = int(request.GET.get("month", today.month))
 
-    days = get_days_list(year=year, month=month)
+    month_from = _parse_month(request.GET.get("from"), date(year, month, 1))
+    month_to = max(_parse_month(request.GET.get("to"), month_from), month_from)
+    month_to = billing_months(month_from, month_to)[-1]
+    report = machine_billing(month_from, month_to)
+
+    if request.GET.get("format") == "csv":
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(
+            ["Maszyna", "Miesiąc", "Godziny", "Godziny bez stawki", "Kwota (zł)"]
+        )
+        for row in report.rows:
+            writer.writerow(
+                [row.machine, row.month, row.hours, row.unpriced_hours, row.cost]
+            )
+        response = HttpResponse(
+            output.getvalue().encode("utf-8-sig"), content_type="text/csv"
+        )
+        response["Content-Disposition"] = (
+            "attachment; filename="
+            f'"rozliczenie-maszyn-{month_from:%Y-%m}-{month_to:%Y-%m}.csv"'
+        )
+        return response
+
+    return render(
+        request,
+        "admin_machine_billing.html",
+        {
+            "report": report,
+            "month_from": month_from,
+            "month_to": month_to,
+            "month": month,
+            "year": year,
+        },
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def admin_yearly_report(request: HttpRequest):  #! Raport roczny
+    today = date.today()
+    year = int(request.GET.get("year", today.year))
+    month = int(request.GET.get("month", today.month))
 
     if request.method == "POST":
-        save_work_hours(request, days=days, year=year, month=month, is_employer=True)
-        return redirect(f"/employer-report?month={month}&year={year}")
+        report_year = int(request.POST.get("report_year", year))
+        enqueue(YEARLY_REPORT, {"year": report_year}, user=cast(User, request.user))
+        messages.success(
+            request, f"Raport za rok {report_year} został dodany do kolejki."
+        )
+        return redirect(f"/yearly-report?month={month}&year={year}")
 
-    today_day = today.day if (year == today.year and month == today.month) else None
-    work_hours = WorkHour.objects.filter(
-        user=cast(User, request.user), date__year=year, date__month=month
+    jobs = list(
+        Job.objects.filter(kind=YEARLY_REPORT).select_related("created_by")[:20]
     )
 
     return render(
         request,
-        "admin_employer_report.html",
+        "admin_yearly_report.html",
         {
-            "days": days,
+            "jobs": jobs,
+            "pending_jobs": [job for job in jobs if not job.is_finished],
             "month": month,
             "year": year,
-            "hours": {e.date.day: e for e in work_hours},
-            "total_hours": get_total_hours(work_hours),
-            "today_day": today_day,  # to recolor current day
-            "tags": get_tags(year=year, month=month),
-            "months_list": get_months_list(),
             "years_list": list(range(today.year - 2, today.year + 3)),
-            "hours_list": HOURS_LIST,
-            "minutes_list": MINUTES_LIST,
         },
     )
 
 
 @login_required
 @user_passes_test(lambda u: u.is_staff)
-def admin_machines_report(request: HttpRequest):  #! Maszyny
+def job_status(request: HttpRequest, job_id: int):
+    job = get_object_or_404(Job, pk=job_id)
+    return JsonResponse(
+        {
+            "id": job.pk,
+            "status": job.status,
+            "finished": job.is_finished,
+            "download": reverse("job-download", args=[job.pk])
+            if job.status == Job.DONE
+            else None,
+        }
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def job_download(request: HttpRequest, job_id: int):
+    job = get_object_or_404(Job, pk=job_id, status=Job.DONE)
+    path = results_dir() / job.result_file
+    if not path.is_file():
+        raise Http404("Plik raportu nie istnieje.")
+    return FileResponse(
+        path.open("rb"),
+        as_attachment=True,
+        filename=job.result_file.partition("-")[2],
+    )
+
+
+TIMELINE_PAGE_SIZE = 60
+
+
+def _parse_day(value: str | None, default: date | None) -> date | None:
+    try:
+        return parse_date(value or "") or default
+    except ValueError:
+        # well formed but impossible, e.g. 2025-02-30
+        return default
+
+
+def _timeline_params(request: HttpRequest) -> tuple[date, date, bool]:
+    today = date.today()
+    quarter_start = date(today.year, (today.month - 1) // 3 * 3 + 1, 1)
+    date_from = _parse_day(request.GET.get("from"), quarter_start)
+    date_to = max(_parse_day(request.GET.get("to"), today), date_from)
+    return date_from, date_to, request.GET.get("group") == "week"
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@reads_from_replica
+def admin_machine_timeline(request: HttpRequest):  #! Historia maszyn
     today = date.today()
     year = int(request.GET.get("year", today.year))
     month = int(request.GET.get("month", today.month))
 
-    days = get_days_list(year=year, month=month)
-    machines = Machine.objects.all().order_by("name")
+    machines = get_machines()
+    machine_id = request.GET.get("machine", "")
+    machine = next((m for m in machines if str(m.id) == machine_id), None)
+    if machine is None and machines:
+        machine = machines[0]
+    date_from, date_to, by_week = _timeline_params(request)
 
-    logs_dict = get_month_machine_logs(year, month)
+    page = None
+    total_hours = 0.0
+    if machine is not None:
+        periods, total_hours = machine_timeline(machine.id, date_from, date_to, by_week)
+        page = Paginator(periods, TIMELINE_PAGE_SIZE).get_page(request.GET.get("page"))
+        page.object_list = [timeline_row(row, by_week) for row in page.object_list]
 
-    if request.method == "POST":
-        save_machine_work(request, days, year, month)
-        return redirect(f"/machines-report?month={month}&year={year}")
+    return render(
+        request,
+        "admin_machine_timeline.html",
+        {
+            "machines": machines,
+            "machine": machine,
+            "page": page,
+            "total_hours": total_hours,
+            "date_from": date_from,
+            "date_to": date_to,
+            "by_week": by_week,
+            "month": month,
+            "year": year,
+        },
+    )
 
-    today_day = today.day if (year == today.year and month == today.month) else None
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@reads_from_replica
+def machine_timeline_json(request: HttpRequest, machine_id: int):
+    machine = get_object_or_404(Machine, pk=machine_id)
+    date_from, date_to, by_week = _timeline_params(request)
+    periods, total_hours = machine_timeline(machine.id, date_from, date_to, by_week)
+    page = Paginator(periods, TIMELINE_PAGE_SIZE).get_page(request.GET.get("page"))
+    return JsonResponse(
+        {
+            "machine": machine.name,
+            "from": date_from.isoformat(),
+            "to": date_to.isoformat(),
+            "group": "week" if by_week else "day",
+            "total_hours": total_hours,
+            "page": page.number,
+            "num_pages": page.paginator.num_pages,
+            "rows": [
+                {
+                    "period": row.period.isoformat(),
+                    "hours": row.hours,
+                    "logs": row.logs,
+                }
+                for row in (timeline_row(values, by_week) for values in page)
+            ],
+        }
+    )
+
+
+AUDIT_PAGE_SIZE = 100
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def admin_audit_log(request: HttpRequest):  #! Historia zmian
+    today = date.today()
+    year = int(request.GET.get("year", today.year))
+    month = int(request.GET.get("month", today.month))
+
+    entries = AuditEntry.objects.select_related("editor", "user", "machine")
+    user_id = request.GET.get("user", "")
+    editor_id = request.GET.get("editor", "")
+    date_from = _parse_day(request.GET.get("date_from"), None)
+    date_to = _parse_day(request.GET.get("date_to"), None)
+    if user_id.isdigit():
+        entries = entries.filter(user_id=user_id)
+    if editor_id.isdigit():
+        entries = entries.filter(editor_id=editor_id)
+    if date_from:
+        entries = entries.filter(date__gte=date_from)
+    if date_to:
+        entries = entries.filter(date__lte=date_to)
+
+    page = Paginator(entries, AUDIT_PAGE_SIZE).get_page(request.GET.get("page"))
 
     return render(
         request,
-        "admin_machines_report.html",
+        "admin_audit_log.html",
         {
-            "days": days,
-            "machines": machines,
-            "logs_dict": logs_dict,
-            "today_day": today_day,
+            "page": page,
+            "users": User.objects.order_by("username"),
+            "tag_names": dict(WorkTag.objects.values_list("id", "name")),
+            "user_id": user_id,
+            "editor_id": editor_id,
+            "date_from": date_from,
+            "date_to": date_to,
             "month": month,
             "year": year,
-            "months_list": get_months_list(),
-            "years_list": list(range(today.year - 2, today.year + 3)),
-            "hours_list": HOURS_LIST,
-            "minutes_list": MINUTES_LIST,
         },
     )
+
+
+@csrf_exempt
+@require_POST
+def punch_events(request: HttpRequest):
+    terminal = get_terminal(request)
+    if terminal is None:
+        return JsonResponse({"error": "invalid token"}, status=401)
+
+    try:
+        events = json.loads(request.body).get("events")
+    except (ValueError, AttributeError):
+        events = None
+    if not isinstance(events, list):
+        return JsonResponse({"error": "expected {'events': [...]}"}, status=400)
+    if len(events) > MAX_BATCH_SIZE:
+        return JsonResponse(
+            {"error": f"at most {MAX_BATCH_SIZE} events per batch"}, status=413
+        )
+
+    result = ingest_punch_events(terminal, events)
+    return JsonResponse({"accepted": result.accepted, "rejected": result.rejected})
@@ -0,0 +1,130 @@
+import calendar
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from types import MappingProxyType
+
+from .constants import POLISH_WEEKDAYS
+
+WORKING_HOURS_PER_DAY = 8
+
+
+@dataclass(frozen=True, slots=True)
+class CalendarDay:
+    day: int
+    date: date
+    weekday: str
+    is_weekend: bool
+    holiday: str | None = None
+
+    @property
+    def is_day_off(self) -> bool:
+        return self.is_weekend or self.holiday is not None
+
+    @property
+    def week(self) -> int:
+        return self.date.isocalendar().week
+
+    @property
+    def is_sunday(self) -> bool:
+        return self.date.weekday() == 6
+
+
+@dataclass(frozen=True, slots=True)
+class EditableDay(CalendarDay):
+    editable: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class MonthCalendar:
+    year: int
+    month: int
+    days: tuple[CalendarDay, ...]
+    working_days: int
+
+    @property
+    def working_hours(self) -> int:
+        return self.working_days * WORKING_HOURS_PER_DAY
+
+
+def easter_sunday(year: int) -> date:
+    # Anonymous Gregorian algorithm (Meeus/Jones/Butcher).
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    m = (32 + 2 * e + 2 * i - h - k) % 7
+    n = (a + 11 * h + 22 * m) // 451
+    month, day = divmod(h + m - 7 * n + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=32)
+def polish_holidays(year: int) -> Mapping[date, str]:
+    easter = easter_sunday(year)
+    holidays = {
+        date(year, 1, 1): "Nowy Rok",
+        date(year, 1, 6): "Święto Trzech Króli",
+        easter: "Wielkanoc",
+        easter + timedelta(days=1): "Poniedziałek Wielkanocny",
+        date(year, 5, 1): "Święto Pracy",
+        date(year, 5, 3): "Święto Konstytucji 3 Maja",
+        easter + timedelta(days=49): "Zielone Świątki",
+        easter + timedelta(days=60): "Boże Ciało",
+        date(year, 8, 15): "Wniebowzięcie NMP",
+        date(year, 11, 1): "Wszystkich Świętych",
+        date(year, 11, 11): "Święto Niepodległości",
+        date(year, 12, 25): "Boże Narodzenie",
+        date(year, 12, 26): "Drugi dzień Bożego Narodzenia",
+    }
+    if year >= 2025:
+        holidays[date(year, 12, 24)] = "Wigilia"
+    return MappingProxyType(holidays)
+
+
+@lru_cache(maxsize=256)
+def get_month_calendar(year: int, month: int) -> MonthCalendar:
+    holidays = polish_holidays(year)
+    num_days = calendar.monthrange(year, month)[1]
+
+    days = []
+    for d in range(1, num_days + 1):
+        day_date = date(year, month, d)
+        weekday = day_date.weekday()
+        days.append(
+            CalendarDay(
+                day=d,
+                date=day_date,
+                weekday=POLISH_WEEKDAYS[weekday],
+                is_weekend=weekday >= 5,
+                holiday=holidays.get(day_date),
+            )
+        )
+
+    return MonthCalendar(
+        year=year,
+        month=month,
+        days=tuple(days),
+        working_days=sum(1 for d in days if not d.is_day_off),
+    )
+
+
+@lru_cache(maxsize=64)
+def get_editable_days(
+    year: int, month: int, first_editable: date
+) -> tuple[EditableDay, ...]:
+    return tuple(
+        EditableDay(
+            day=d.day,
+            date=d.date,
+            weekday=d.weekday,
+            is_weekend=d.is_weekend,
+            holiday=d.holiday,
+            editable=d.date >= first_editable,
+        )
+        for d in get_month_calendar(year, month).days
+    )
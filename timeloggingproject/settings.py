@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import importlib.util
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -53,6 +55,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "django_app.tenants.TenantMiddleware",
+    "django_app.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -67,8 +71,13 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    ["django_app.template_loaders.MinifyingLoader"],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
@@ -78,27 +87,176 @@ TEMPLATES = [
     },
 ]
 
+# Engine for the grid pages (admin dashboard, user dashboard, machines):
+# "django", or "jinja2" for the ports in django_app/jinja2, which needs the
+# optional jinja2 package. Compiled templates are cached in
+# JINJA2_BYTECODE_DIR (default: a per-user temp directory).
+GRID_TEMPLATE_ENGINE = os.getenv("GRID_TEMPLATE_ENGINE", "django")
+JINJA2_BYTECODE_DIR = os.getenv("JINJA2_BYTECODE_DIR") or None
+
+if importlib.util.find_spec("jinja2") is not None:
+    TEMPLATES.append(
+        {
+            "BACKEND": "django.template.backends.jinja2.Jinja2",
+            "DIRS": [],
+            "APP_DIRS": True,
+            "OPTIONS": {
+                "environment": "django_app.jinja_env.environment",
+                "context_processors": [
+                    "django.template.context_processors.request",
+                    "django.contrib.auth.context_processors.auth",
+                    "django.contrib.messages.context_processors.messages",
+                ],
+            },
+        }
+    )
+elif GRID_TEMPLATE_ENGINE == "jinja2":
+    raise ImproperlyConfigured(
+        "GRID_TEMPLATE_ENGINE=jinja2 needs the jinja2 package (uv sync --extra jinja2)."
+    )
+
 WSGI_APPLICATION = "timeloggingproject.wsgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# IMMEDIATE transactions take the write lock up front, so concurrent writers
+# (e.g. punch terminals flushing at shift change) queue on the busy timeout
+# instead of failing with "database is locked"; WAL keeps readers unblocked.
+SQLITE_OPTIONS = {
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 20,
+    "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+}
+
+# Closed years are moved to the archive database by the archive_years
+# command; see django_app.archive for how reads are routed there.
 if DEBUG:
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
-        }
+            "OPTIONS": SQLITE_OPTIONS,
+        },
+        "archive": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "archive.sqlite3",
+            "OPTIONS": SQLITE_OPTIONS,
+        },
     }
 else:
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": "/app/persistent_db/db.sqlite3",
-        }
+            "OPTIONS": SQLITE_OPTIONS,
+        },
+        "archive": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": "/app/persistent_db/archive.sqlite3",
+            "OPTIONS": SQLITE_OPTIONS,
+        },
     }
 
+# Multi-tenant mode: one deployment serves several companies, each with its
+# own SQLite file in TENANT_DB_DIR, picked by the request's host name, e.g.
+# TENANTS=elkam.example.com=elkam,budmax.example.com=budmax
+# Management commands run for the company named in TENANT (migrate_tenants
+# migrates all of them). The archive and the read replica are not available.
+TENANT_HOSTS = {
+    host: tenant
+    for host, tenant in (
+        pair.split("=", 1) for pair in os.getenv("TENANTS", "").split(",") if pair
+    )
+}
+TENANT = os.getenv("TENANT") or None
+TENANT_DB_DIR = os.getenv(
+    "TENANT_DB_DIR",
+    os.path.join(BASE_DIR, "tenants") if DEBUG else "/app/persistent_db/tenants",
+)
+TENANT_DATABASES = {
+    tenant: f"tenant_{tenant}" for tenant in sorted(set(TENANT_HOSTS.values()))
+}
+for tenant, alias in TENANT_DATABASES.items():
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(TENANT_DB_DIR, f"{tenant}.sqlite3"),
+        "OPTIONS": SQLITE_OPTIONS,
+    }
+if TENANT_HOSTS:
+    del DATABASES["archive"]
+
+# Optional read-only replica for report pages, range reports and exports:
+# a SQLite snapshot refreshed by the refresh_replica command (REPLICA_NAME is
+# its path). The report queries use SQLite functions, so it has to be SQLite
+# like the primary. Reads fall back to the primary when the replica lags more
+# than REPLICA_MAX_STALENESS seconds.
+REPLICA_NAME = os.getenv("REPLICA_NAME")
+REPLICA_MAX_STALENESS = int(os.getenv("REPLICA_MAX_STALENESS", "900"))
+if REPLICA_NAME and not TENANT_HOSTS:
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": f"file:{REPLICA_NAME}?mode=ro",
+        "OPTIONS": {"timeout": 20},
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = [
+    "django_app.tenants.TenantRouter",
+    "django_app.archive.ArchiveRouter",
+    "django_app.replica.ReplicaRouter",
+]
+
+# Result files of background jobs (see the run_jobs command).
+JOB_RESULTS_DIR = os.getenv(
+    "JOB_RESULTS_DIR",
+    os.path.join(BASE_DIR, "job_results")
+    if DEBUG
+    else "/app/persistent_db/job_results",
+)
+
+# Where the backup_db command keeps its backups.
+BACKUP_DIR = os.getenv(
+    "BACKUP_DIR",
+    os.path.join(BASE_DIR, "backups") if DEBUG else "/app/persistent_db/backups",
+)
+
+# Column files written by the export_analytics command.
+ANALYTICS_DIR = os.getenv(
+    "ANALYTICS_DIR",
+    os.path.join(BASE_DIR, "analytics") if DEBUG else "/app/persistent_db/analytics",
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# With several gunicorn workers point CACHE_BACKEND at a shared backend
+# (e.g. django.core.cache.backends.filebased.FileBasedCache) and set
+# REFERENCE_CACHE_ALIAS=default so reference data invalidations reach every worker.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+        "KEY_FUNCTION": "django_app.tenants.make_cache_key",
+    }
+}
+REFERENCE_CACHE_ALIAS = os.getenv("REFERENCE_CACHE_ALIAS") or None
+
+# Sessions are read from the cache and written through to the database, and
+# the logged-in user is cached, so a page view only queries its own data.
+SESSION_ENGINE = os.getenv(
+    "SESSION_ENGINE", "django.contrib.sessions.backends.cached_db"
+)
+AUTHENTICATION_BACKENDS = [
+    "django_app.auth.CachedModelBackend",
+    # keeps sessions created before the cached backend valid
+    "django.contrib.auth.backends.ModelBackend",
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -142,6 +300,11 @@ STATICFILES_DIRS = [
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 
+# Strip indentation from templates when they are compiled; the grid pages
+# otherwise repeat it for every user x day cell.
+MINIFY_HTML = os.getenv("MINIFY_HTML", "1").lower() in ("1", "true", "yes")
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 